@@ -1,58 +1,113 @@
-from flask import Flask
+import click
+from flask import Flask, send_from_directory
 from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from flask_mail import Mail
-from flasgger import Swagger
-import cloudinary
 from config import config
+from app.utils.rate_limit import RateLimiter
+from app.utils.load_shedding import LoadShedder
+from app.utils.query_stats import QueryStats
+from app.utils.task_queue import TaskQueue
+from app.utils.database import configure_engine_options, install_engine_hooks
+from app.utils.replicas import ReplicaRouter, RoutingSession
+from app.utils.json_encoding import output_json
+from app.utils.pubsub import PubSub
+from app.utils.outbox import EventBus, outbox_cli
+from app.utils.cache import Cache
+from app.utils.openapi import init_swagger, openapi_cli
 
-db = SQLAlchemy()
-migrate = Migrate()
+# Heavy optional dependencies (flasgger, Flask-Migrate/alembic, Flask-Mail,
+# sendgrid, cloudinary, PIL) are imported where they are first used so
+# worker boot only pays for what serving requests needs.
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
-mail = Mail()
+limiter = RateLimiter()
+shedder = LoadShedder()
+query_stats = QueryStats()
+tasks = TaskQueue()
+replicas = ReplicaRouter()
+pubsub = PubSub()
+events = EventBus()
+cache = Cache()
 
-def create_app(config_name='default'):
+def create_app(config_name='default', overrides=None):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
+    
+    # Behind the proxy, remote_addr is the proxy's: rate limits and replica
+    # stickiness key on the client address it forwards instead
+    trusted_proxies = app.config.get('TRUSTED_PROXY_COUNT', 0)
+    if trusted_proxies:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies, x_host=trusted_proxies)
     
     # Initialize extensions
+    configure_engine_options(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        install_engine_hooks(db.engine, app.config)
+    replicas.init_app(app)
     jwt.init_app(app)
-    mail.init_app(app)
+    limiter.init_app(app)
+    shedder.init_app(app)
+    query_stats.init_app(app)
+    tasks.init_app(app)
+    pubsub.init_app(app)
+    events.init_app(app)
+    cache.init_app(app)
     CORS(app)
     
-    # Initialize Cloudinary
-    if app.config.get('CLOUDINARY_CLOUD_NAME'):
-        cloudinary.config(
-            cloud_name=app.config['CLOUDINARY_CLOUD_NAME'],
-            api_key=app.config['CLOUDINARY_API_KEY'],
-            api_secret=app.config['CLOUDINARY_API_SECRET']
-        )
-    
-    # Initialize Swagger
-    swagger = Swagger(app, template={
-        "swagger": "2.0",
-        "info": {
-            "title": "GemCart API",
-            "description": "Luxury Jewelry E-commerce API",
-            "version": "1.0.0"
-        }
-    })
+    # Product, category, user, order and review writes record domain events
+    # in the outbox, which stamp the product change feed and feed the order
+    # status streams, the product_listing read model and cache invalidation
+    from app.services.product_changes import install_product_change_tracking
+    from app.services.domain_events import install_domain_events
+    from app.services.order_events import install_order_events
+    from app.services.product_listing import install_product_listing, listing_cli
+    from app.services.cache_invalidation import install_cache_invalidation
+    install_domain_events()
+    install_product_change_tracking(events)
+    install_order_events(events)
+    install_product_listing(events)
+    install_cache_invalidation(events)  # after the listing: list pages are built from it
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(listing_cli)
+    
+    from app.services.image_service import images_cli
+    app.cli.add_command(images_cli)
+    
+    # Flask-Migrate pulls in alembic; only the `flask db` CLI needs it
+    migrate_enabled = app.config.get('MIGRATE_ENABLED')
+    if migrate_enabled is None:
+        migrate_enabled = click.get_current_context(silent=True) is not None
+    if migrate_enabled:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    
+    # Initialize Swagger (production serves the precomputed spec instead)
+    init_swagger(app)
+    app.cli.add_command(openapi_cli)
+    
+    # Serve locally stored images (production should serve these from the proxy or a CDN)
+    @app.route(app.config['IMAGE_STORAGE_URL'].rstrip('/') + '/<path:key>')
+    def media(key):
+        return send_from_directory(app.config['IMAGE_STORAGE_ROOT'], key, max_age=31536000)
     
     # Initialize API
     api = Api(app)
+    api.representation('application/json')(output_json)
     
     # Register routes
     from app.routes.auth import AuthRegister, AuthLogin, AuthProfile
-    from app.routes.products import ProductListAPI, ProductDetailAPI
+    from app.routes.products import ProductListAPI, ProductBatchAPI, ProductChangesAPI, ProductDetailAPI
+    from app.routes.product_images import ProductImageListAPI, ProductImageDetailAPI
     from app.routes.categories import CategoryListAPI
-    from app.routes.orders import OrderListAPI, OrderDetailAPI
+    from app.routes.orders import OrderListAPI, OrderDetailAPI, OrderStreamAPI, OrderStreamTicketAPI
     from app.routes.reviews import ReviewListAPI
-    from app.routes.admin import AdminDashboard, AdminUsers
+    from app.routes.admin import AdminDashboard, AdminUsers, AdminUserImport, AdminMetrics, AdminImageDuplicates, AdminOrderStream, AdminOrderStreamTicket
+    from app.routes.batch import BatchAPI
     
     # Auth routes
     api.add_resource(AuthRegister, '/api/auth/register')
@@ -61,7 +116,11 @@ def create_app(config_name='default'):
     
     # Product routes
     api.add_resource(ProductListAPI, '/api/products')
+    api.add_resource(ProductBatchAPI, '/api/products/batch')
+    api.add_resource(ProductChangesAPI, '/api/products/changes')
     api.add_resource(ProductDetailAPI, '/api/products/<int:product_id>')
+    api.add_resource(ProductImageListAPI, '/api/products/<int:product_id>/images')
+    api.add_resource(ProductImageDetailAPI, '/api/products/<int:product_id>/images/<int:image_id>')
     
     # Category routes
     api.add_resource(CategoryListAPI, '/api/categories')
@@ -69,6 +128,8 @@ def create_app(config_name='default'):
     # Order routes
     api.add_resource(OrderListAPI, '/api/orders')
     api.add_resource(OrderDetailAPI, '/api/orders/<int:order_id>')
+    api.add_resource(OrderStreamAPI, '/api/orders/stream')
+    api.add_resource(OrderStreamTicketAPI, '/api/orders/stream/ticket')
     
     # Review routes
     api.add_resource(ReviewListAPI, '/api/reviews')
@@ -76,5 +137,13 @@ def create_app(config_name='default'):
     # Admin routes
     api.add_resource(AdminDashboard, '/api/admin/dashboard')
     api.add_resource(AdminUsers, '/api/admin/users')
+    api.add_resource(AdminUserImport, '/api/admin/users/import')
+    api.add_resource(AdminMetrics, '/api/admin/metrics')
+    api.add_resource(AdminImageDuplicates, '/api/admin/images/duplicates')
+    api.add_resource(AdminOrderStream, '/api/admin/orders/stream')
+    api.add_resource(AdminOrderStreamTicket, '/api/admin/orders/stream/ticket')
+    
+    # Batch route
+    api.add_resource(BatchAPI, '/api/batch')
     
     return app
\ No newline at end of file
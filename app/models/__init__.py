@@ -1,7 +1,11 @@
 from .user import User
-from .product import Product
+from .product import Product, ProductImage
 from .category import Category
 from .order import Order, OrderItem
 from .review import Review
+from .image_asset import ImageAsset
+from .change_sequence import ChangeSequence
+from .outbox_event import OutboxEvent
+from .product_listing import ProductListing
 
-__all__ = ['User', 'Product', 'Category', 'Order', 'OrderItem', 'Review']
\ No newline at end of file
+__all__ = ['User', 'Product', 'ProductImage', 'Category', 'Order', 'OrderItem', 'Review', 'ImageAsset', 'ChangeSequence', 'OutboxEvent', 'ProductListing']
\ No newline at end of file
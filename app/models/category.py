@@ -26,7 +26,27 @@ class Category(db.Model):
     
     @property
     def product_count(self):
+        count = self.__dict__.get('_product_count')
+        if count is not None:
+            return count
         return self.products.filter_by(is_active=True).count()
     
+    @classmethod
+    def prefetch_product_counts(cls, categories):
+        """
+        Active product counts for a set of categories in one grouped query
+        """
+        from app.models.product import Product, product_categories
+        
+        categories = {category.id: category for category in categories}
+        rows = db.session.query(product_categories.c.category_id, db.func.count(Product.id)).join(
+            Product, Product.id == product_categories.c.product_id
+        ).filter(
+            product_categories.c.category_id.in_(categories), Product.is_active == True
+        ).group_by(product_categories.c.category_id).all()
+        counts = dict(rows)
+        for category_id, category in categories.items():
+            category._product_count = counts.get(category_id, 0)
+    
     def __repr__(self):
         return f'<Category {self.name}>'
\ No newline at end of file
@@ -0,0 +1,43 @@
+from sqlalchemy import DDL, event
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+class ChangeSequence(db.Model):
+    """
+    Named counters for change feeds. Allocating takes the row lock until
+    the transaction ends, so writers commit in sequence order and a reader
+    never sees a value before all smaller ones are committed. Allocate from
+    short transactions of their own (see product_changes), never from
+    request writes, or every writer queues behind the lock.
+    """
+    __tablename__ = 'change_sequences'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    @classmethod
+    def allocate(cls, connection, name):
+        """
+        Next value of counter ``name``, on the writing transaction's connection
+        """
+        table = cls.__table__
+        result = connection.execute(
+            table.update().where(table.c.name == name).values(value=table.c.value + 1)
+        )
+        if result.rowcount == 0:
+            # Counters are created with the table; this covers ones added later
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(name=name, value=1))
+                return 1
+            except IntegrityError:
+                # A concurrent first writer created it: take the next value
+                return cls.allocate(connection, name)
+        return connection.execute(db.select(table.c.value).where(table.c.name == name)).scalar_one()
+    
+    def __repr__(self):
+        return f'<ChangeSequence {self.name}={self.value}>'
+
+event.listen(ChangeSequence.__table__, 'after_create', DDL(
+    "INSERT INTO change_sequences (name, value) VALUES ('products', 0)"
+))
@@ -0,0 +1,32 @@
+from datetime import datetime
+from app import db
+
+class ImageAsset(db.Model):
+    __tablename__ = 'image_assets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)  # SHA-256 of the upload
+    
+    # 64-bit perceptual hash, stored signed, plus its four 16-bit bands.
+    # Hashes within Hamming distance 3 share at least one band exactly,
+    # so near-duplicate lookup is an indexed equality query per band.
+    phash = db.Column(db.BigInteger, nullable=False)
+    phash_band0 = db.Column(db.Integer, nullable=False, index=True)
+    phash_band1 = db.Column(db.Integer, nullable=False, index=True)
+    phash_band2 = db.Column(db.Integer, nullable=False, index=True)
+    phash_band3 = db.Column(db.Integer, nullable=False, index=True)
+    
+    # Stored variants; a duplicate reuses its canonical asset's variants
+    variants = db.Column(db.JSON, nullable=False)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('image_assets.id'), index=True)
+    duplicate_of = db.relationship('ImageAsset', remote_side=[id], backref='duplicates')
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def canonical(self):
+        return self.duplicate_of or self
+    
+    def __repr__(self):
+        return f'<ImageAsset {self.content_hash[:12]}>'
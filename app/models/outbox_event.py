@@ -0,0 +1,32 @@
+from datetime import datetime
+from app import db
+
+class OutboxEvent(db.Model):
+    """
+    Domain event written in the same transaction as the change it
+    describes, then delivered to consumers by the EventBus dispatcher
+    """
+    __tablename__ = 'outbox_events'
+    __table_args__ = (
+        db.Index('ix_outbox_events_pending', 'dispatched_at', 'available_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False, index=True)
+    aggregate_type = db.Column(db.String(50), nullable=False)
+    aggregate_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    
+    # Delivery state
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # next attempt, or end of the current claim
+    attempts = db.Column(db.Integer, default=0)
+    claimed_by = db.Column(db.String(36))
+    delivered_to = db.Column(db.JSON)  # consumers that already handled it
+    last_error = db.Column(db.Text)
+    dispatched_at = db.Column(db.DateTime)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<OutboxEvent {self.id} {self.event_type} {self.aggregate_type}#{self.aggregate_id}>'
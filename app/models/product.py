@@ -8,6 +8,9 @@ product_categories = db.Table('product_categories',
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_change_seq_id', 'change_seq', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False, index=True)
@@ -19,6 +22,9 @@ class Product(db.Model):
     # Images
     image_url = db.Column(db.String(500))
     image_public_id = db.Column(db.String(200))  # Cloudinary public ID
+    image_hash = db.Column(db.String(64), index=True)  # SHA-256 of the original upload
+    image_variants = db.Column(db.JSON)  # {name: {width, height, jpeg, webp}}
+    image_status = db.Column(db.String(20))  # pending, ready, failed
     
     # Product details
     weight = db.Column(db.Numeric(8, 2))  # in grams
@@ -37,14 +43,23 @@ class Product(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Change feed position, stamped after every write commits (app/services/product_changes.py)
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
     # Relationships
     categories = db.relationship('Category', secondary=product_categories, 
                                backref=db.backref('products', lazy='dynamic'))
     reviews = db.relationship('Review', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     order_items = db.relationship('OrderItem', backref='product', lazy='dynamic')
+    images = db.relationship('ProductImage', backref='product', lazy='selectin',
+                             order_by='ProductImage.position', cascade='all, delete-orphan')
     
     @property
     def average_rating(self):
+        stats = self.__dict__.get('_rating_stats')
+        if stats is not None:
+            total, count = stats
+            return total / count if count else 0
         reviews = self.reviews.all()
         if not reviews:
             return 0
@@ -52,7 +67,44 @@ class Product(db.Model):
     
     @property
     def review_count(self):
+        stats = self.__dict__.get('_rating_stats')
+        if stats is not None:
+            return stats[1]
         return self.reviews.count()
     
+    @classmethod
+    def prefetch_ratings(cls, products):
+        """
+        Load rating totals for a page of products in one grouped query, so
+        average_rating and review_count don't query per product
+        """
+        from app.models.review import Review
+        
+        rows = db.session.query(Review.product_id, db.func.sum(Review.rating), db.func.count(Review.id)).filter(
+            Review.product_id.in_({product.id for product in products})
+        ).group_by(Review.product_id).all()
+        stats = {product_id: (total, count) for product_id, total, count in rows}
+        for product in products:
+            product._rating_stats = stats.get(product.id, (0, 0))
+    
+    def __repr__(self):
+        return f'<Product {self.title}>'
+
+class ProductImage(db.Model):
+    __tablename__ = 'product_images'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Filled in by the background upload task
+    image_url = db.Column(db.String(500))
+    image_hash = db.Column(db.String(64), index=True)
+    image_variants = db.Column(db.JSON)
+    status = db.Column(db.String(20), default='pending')  # pending, ready, failed
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
     def __repr__(self):
-        return f'<Product {self.title}>'
\ No newline at end of file
+        return f'<ProductImage {self.product_id}#{self.position}>'
\ No newline at end of file
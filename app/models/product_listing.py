@@ -0,0 +1,48 @@
+from app import db
+
+class ProductListing(db.Model):
+    """
+    Flattened storefront row per active product: display fields, category
+    slugs, seller name and rating totals. Read by the product list; kept in
+    step with product, category and review writes by
+    app/services/product_listing.py, never written by request handlers.
+    """
+    __tablename__ = 'product_listing'
+    
+    id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)  # the product's id
+    title = db.Column(db.String(200), nullable=False, index=True)
+    sku = db.Column(db.String(100), nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False, index=True)
+    inventory_count = db.Column(db.Integer)
+    material = db.Column(db.String(100))
+    gemstone = db.Column(db.String(100))
+    is_featured = db.Column(db.Boolean)
+    
+    # Primary image
+    image_url = db.Column(db.String(500))
+    image_variants = db.Column(db.JSON)
+    
+    # Denormalized from categories, users and reviews
+    category_slugs = db.Column(db.Text, nullable=False, default='|')  # '|rings|gold|' for LIKE matching
+    seller_id = db.Column(db.Integer, nullable=False)
+    seller_name = db.Column(db.String(80))
+    rating_total = db.Column(db.Integer, nullable=False, default=0)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Title and description, for search
+    search_text = db.Column(db.Text)
+    
+    # Product timestamps
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    
+    @staticmethod
+    def slug_pattern(slug):
+        return f'%|{slug}|%'
+    
+    @property
+    def average_rating(self):
+        return self.rating_total / self.review_count if self.review_count else 0
+    
+    def __repr__(self):
+        return f'<ProductListing {self.id} {self.title}>'
@@ -1,15 +1,77 @@
-from flask import request
+import csv
+import io
+from flask import request, current_app
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from marshmallow import ValidationError, EXCLUDE
 from sqlalchemy import func
-from app import db
+from sqlalchemy.orm import aliased
+from app import cache, db
 from app.models.user import User
 from app.models.product import Product
 from app.models.order import Order
 from app.models.review import Review
-from app.schemas.user_schema import UserSchema
+from app.models.image_asset import ImageAsset
+from app.schemas.user_schema import UserSchema, UserImportSchema
+from app.services.order_events import ADMIN_CHANNEL
+from app.services.user_service import register_users, user_access
+from app.utils.database import pool_stats
+from app.utils.load_shedding import load_priority
 from app.utils.decorators import role_required
 from app.utils.pagination import paginate_query
+from app.utils.pubsub import event_stream_response, issue_stream_ticket, stream_identity
+from app.utils.replicas import read_only
+
+def dashboard_statistics():
+    """
+    Dashboard figures; cached for CACHE_DASHBOARD_TTL seconds
+    """
+    # Get statistics
+    total_users = User.query.count()
+    total_products = Product.query.filter_by(is_active=True).count()
+    total_orders = Order.query.count()
+    total_reviews = Review.query.count()
+    
+    # Revenue statistics
+    total_revenue = db.session.query(func.sum(Order.total_amount)).filter_by(status='delivered').scalar() or 0
+    pending_orders = Order.query.filter_by(status='pending').count()
+    
+    # Recent orders
+    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
+    
+    # Top products by sales
+    top_products = db.session.query(
+        Product.id,
+        Product.title,
+        func.sum(Order.total_amount).label('revenue')
+    ).join(Order).group_by(Product.id).order_by(func.sum(Order.total_amount).desc()).limit(5).all()
+    
+    return {
+        'statistics': {
+            'total_users': total_users,
+            'total_products': total_products,
+            'total_orders': total_orders,
+            'total_reviews': total_reviews,
+            'total_revenue': float(total_revenue),
+            'pending_orders': pending_orders
+        },
+        'recent_orders': [
+            {
+                'id': order.id,
+                'order_number': order.order_number,
+                'total_amount': float(order.total_amount),
+                'status': order.status,
+                'created_at': order.created_at.isoformat()
+            } for order in recent_orders
+        ],
+        'top_products': [
+            {
+                'id': product.id,
+                'title': product.title,
+                'revenue': float(product.revenue)
+            } for product in top_products
+        ]
+    }
 
 class AdminDashboard(Resource):
     """
@@ -19,6 +81,8 @@ class AdminDashboard(Resource):
       - Admin
     """
     
+    @load_priority('low')
+    @read_only
     @jwt_required()
     @role_required(['admin'])
     def get(self):
@@ -34,52 +98,7 @@ class AdminDashboard(Resource):
             description: Insufficient permissions
         """
         
-        # Get statistics
-        total_users = User.query.count()
-        total_products = Product.query.filter_by(is_active=True).count()
-        total_orders = Order.query.count()
-        total_reviews = Review.query.count()
-        
-        # Revenue statistics
-        total_revenue = db.session.query(func.sum(Order.total_amount)).filter_by(status='delivered').scalar() or 0
-        pending_orders = Order.query.filter_by(status='pending').count()
-        
-        # Recent orders
-        recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
-        
-        # Top products by sales
-        top_products = db.session.query(
-            Product.id,
-            Product.title,
-            func.sum(Order.total_amount).label('revenue')
-        ).join(Order).group_by(Product.id).order_by(func.sum(Order.total_amount).desc()).limit(5).all()
-        
-        return {
-            'statistics': {
-                'total_users': total_users,
-                'total_products': total_products,
-                'total_orders': total_orders,
-                'total_reviews': total_reviews,
-                'total_revenue': float(total_revenue),
-                'pending_orders': pending_orders
-            },
-            'recent_orders': [
-                {
-                    'id': order.id,
-                    'order_number': order.order_number,
-                    'total_amount': float(order.total_amount),
-                    'status': order.status,
-                    'created_at': order.created_at.isoformat()
-                } for order in recent_orders
-            ],
-            'top_products': [
-                {
-                    'id': product.id,
-                    'title': product.title,
-                    'revenue': float(product.revenue)
-                } for product in top_products
-            ]
-        }, 200
+        return cache.get_or_set('admin:dashboard', dashboard_statistics, ttl=current_app.config['CACHE_DASHBOARD_TTL']), 200
 
 class AdminUsers(Resource):
     """
@@ -89,6 +108,7 @@ class AdminUsers(Resource):
       - Admin
     """
     
+    @read_only
     @jwt_required()
     @role_required(['admin'])
     def get(self):
@@ -139,4 +159,301 @@ class AdminUsers(Resource):
                 'per_page': pagination_result['per_page'],
                 'total': pagination_result['total']
             }
-        }, 200
\ No newline at end of file
+        }, 200
+
+class AdminUserImport(Resource):
+    """
+    Admin Bulk User Import
+    ---
+    tags:
+      - Admin
+    """
+    
+    @load_priority('low')
+    @jwt_required()
+    @role_required(['admin'])
+    def post(self):
+        """
+        Import Users from CSV
+        ---
+        security:
+          - Bearer: []
+        consumes:
+          - multipart/form-data
+          - text/csv
+        parameters:
+          - in: formData
+            name: file
+            type: file
+            description: CSV with a header row of username, email, password and optional first_name, last_name, phone, role
+          - in: query
+            name: batch_size
+            type: integer
+            default: 500
+        responses:
+          200:
+            description: Import summary with per-line errors
+          400:
+            description: Missing or malformed CSV
+          403:
+            description: Insufficient permissions
+        """
+        
+        upload = request.files.get('file')
+        if upload:
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        elif request.mimetype == 'text/csv':
+            stream = io.StringIO(request.get_data(as_text=True), newline='')
+        else:
+            return {'message': 'CSV file required'}, 400
+        
+        reader = csv.DictReader(stream)
+        missing = {'username', 'email', 'password'} - set(reader.fieldnames or [])
+        if missing:
+            return {'message': f'Missing columns: {", ".join(sorted(missing))}'}, 400
+        
+        batch_size = min(max(request.args.get('batch_size', 500, type=int), 1), 5000)
+        schema = UserImportSchema()
+        errors = {}
+        line_numbers = []
+        
+        def valid_rows():
+            # Line 1 is the header
+            for line_number, row in enumerate(reader, start=2):
+                row = {key: value for key, value in row.items() if key and value not in (None, '')}
+                try:
+                    data = schema.load(row, unknown=EXCLUDE)
+                except ValidationError as err:
+                    errors[line_number] = err.messages
+                    continue
+                line_numbers.append(line_number)
+                yield data
+        
+        try:
+            created, import_errors = register_users(valid_rows(), batch_size=batch_size)
+        except csv.Error as err:
+            return {'message': f'Malformed CSV: {err}'}, 400
+        
+        for index, messages in import_errors.items():
+            errors[line_numbers[index]] = messages
+        
+        return {
+            'created': created,
+            'failed': len(errors),
+            'errors': {str(line): errors[line] for line in sorted(errors)}
+        }, 200
+
+class AdminMetrics(Resource):
+    """
+    Admin Runtime Metrics
+    ---
+    tags:
+      - Admin
+    """
+    
+    @load_priority('critical')
+    @jwt_required()
+    @role_required(['admin'])
+    def get(self):
+        """
+        Get Per-Worker Runtime Metrics
+        ---
+        security:
+          - Bearer: []
+        responses:
+          200:
+            description: Metrics for the worker that served the request
+          403:
+            description: Insufficient permissions
+        """
+        
+        limiter = current_app.extensions.get('rate_limiter')
+        task_queue = current_app.extensions.get('task_queue')
+        replicas = current_app.extensions.get('replica_router')
+        pubsub = current_app.extensions.get('pubsub')
+        event_bus = current_app.extensions.get('event_bus')
+        shedder = current_app.extensions.get('load_shedder')
+        query_stats = current_app.extensions.get('query_stats')
+        return {
+            'rate_limits': limiter.stats() if limiter else {},
+            'load_shedding': shedder.stats() if shedder else {},
+            'task_queue': task_queue.stats() if task_queue else {},
+            'database': pool_stats(db.engine),
+            'queries': query_stats.stats() if query_stats else {},
+            'replicas': replicas.stats() if replicas else {},
+            'streams': pubsub.stats() if pubsub else {},
+            'outbox': event_bus.stats() if event_bus else {},
+            'cache': cache.stats()
+        }, 200
+
+class AdminOrderStream(Resource):
+    """
+    Admin Order Status Stream
+    ---
+    tags:
+      - Admin
+    """
+    
+    def get(self):
+        """
+        Stream Status Changes for All Orders (Server-Sent Events)
+        ---
+        description: >
+          Same events as /api/orders/stream, for every customer's orders.
+          Authenticate with the Authorization header or a ticket from
+          POST /api/admin/orders/stream/ticket.
+        produces:
+          - text/event-stream
+        security:
+          - Bearer: []
+        parameters:
+          - in: query
+            name: ticket
+            type: string
+            description: Stream ticket, for clients that cannot set Authorization
+          - in: header
+            name: Last-Event-ID
+            type: string
+        responses:
+          200:
+            description: Event stream
+          401:
+            description: Missing, invalid or expired token or ticket
+          403:
+            description: Insufficient permissions
+          503:
+            description: Too many open streams on this worker
+        """
+        
+        user_id = stream_identity('admin-orders')
+        user = user_access(user_id) if user_id is not None else None
+        if not user or not user['is_active']:
+            return {'message': 'Authorization header or valid stream ticket required'}, 401
+        if user['role'] != 'admin':
+            return {'message': 'Insufficient permissions'}, 403
+        return event_stream_response(ADMIN_CHANNEL)
+
+class AdminOrderStreamTicket(Resource):
+    """
+    Admin Order Status Stream Ticket
+    ---
+    tags:
+      - Admin
+    """
+    
+    @jwt_required()
+    @role_required(['admin'])
+    def post(self):
+        """
+        Get a Ticket to Open the Admin Order Status Stream
+        ---
+        description: Short-lived ticket for GET /api/admin/orders/stream?ticket=...
+        security:
+          - Bearer: []
+        responses:
+          201:
+            description: Ticket and its lifetime in seconds
+          403:
+            description: Insufficient permissions
+        """
+        
+        return {
+            'ticket': issue_stream_ticket(get_jwt_identity(), 'admin-orders'),
+            'expires_in': current_app.config['STREAM_TICKET_SECONDS']
+        }, 201
+
+class AdminImageDuplicates(Resource):
+    """
+    Admin Duplicate Image Report
+    ---
+    tags:
+      - Admin
+    """
+    
+    @load_priority('low')
+    @read_only
+    @jwt_required()
+    @role_required(['admin'])
+    def get(self):
+        """
+        Get Duplicate Image Clusters
+        ---
+        security:
+          - Bearer: []
+        parameters:
+          - in: query
+            name: type
+            type: string
+            enum: [assets, urls]
+            default: assets
+            description: assets groups uploads by perceptual hash; urls groups products sharing an identical image_url
+          - in: query
+            name: page
+            type: integer
+            default: 1
+          - in: query
+            name: per_page
+            type: integer
+            default: 50
+        responses:
+          200:
+            description: Duplicate clusters, largest first
+          403:
+            description: Insufficient permissions
+        """
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(request.args.get('per_page', 50, type=int), 200)
+        
+        if request.args.get('type', 'assets') == 'urls':
+            # Products pointing at the same external URL (e.g. reused stock photos)
+            size = func.count(Product.id).label('size')
+            query = db.session.query(Product.image_url, size).filter(
+                Product.image_url.isnot(None),
+                Product.is_active == True
+            ).group_by(Product.image_url).having(func.count(Product.id) > 1).order_by(size.desc(), Product.image_url)
+            
+            pagination_result = paginate_query(query, page, per_page)
+            urls = [row.image_url for row in pagination_result['items']]
+            product_ids = {url: [] for url in urls}
+            for product_id, image_url in db.session.query(Product.id, Product.image_url).filter(
+                    Product.image_url.in_(urls), Product.is_active == True).order_by(Product.id):
+                product_ids[image_url].append(product_id)
+            
+            clusters = [
+                {'image_url': row.image_url, 'size': row.size, 'product_ids': product_ids[row.image_url]}
+                for row in pagination_result['items']
+            ]
+        else:
+            # Canonical assets with at least one near-duplicate upload folded into them
+            duplicate = aliased(ImageAsset)
+            size = func.count(duplicate.id).label('duplicates')
+            query = db.session.query(ImageAsset.id, ImageAsset.content_hash, ImageAsset.variants, size).join(
+                duplicate, duplicate.duplicate_of_id == ImageAsset.id
+            ).group_by(ImageAsset.id).order_by(size.desc(), ImageAsset.id)
+            
+            pagination_result = paginate_query(query, page, per_page)
+            hashes = [row.content_hash for row in pagination_result['items']]
+            product_counts = dict(db.session.query(Product.image_hash, func.count(Product.id)).filter(
+                Product.image_hash.in_(hashes), Product.is_active == True
+            ).group_by(Product.image_hash).all())
+            
+            clusters = [
+                {
+                    'asset_id': row.id,
+                    'content_hash': row.content_hash,
+                    'thumbnail': (row.variants or {}).get('thumbnail', {}).get('jpeg'),
+                    'duplicates': row.duplicates,
+                    'products': product_counts.get(row.content_hash, 0)
+                } for row in pagination_result['items']
+            ]
+        
+        return {
+            'clusters': clusters,
+            'pagination': {
+                'page': pagination_result['page'],
+                'pages': pagination_result['pages'],
+                'per_page': pagination_result['per_page'],
+                'total': pagination_result['total']
+            }
+        }, 200
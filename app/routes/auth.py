@@ -6,7 +6,10 @@ from app import db
 from app.models.user import User
 from app.schemas.user_schema import UserSchema, UserRegistrationSchema, UserLoginSchema
 from app.utils.decorators import role_required
+from app.utils.rate_limit import rate_limit
+from app.utils.load_shedding import load_priority
 from app.services.email_service import send_verification_email
+from app.services.user_service import register_user
 
 class AuthRegister(Resource):
     """
@@ -51,18 +54,10 @@ class AuthRegister(Resource):
         except ValidationError as err:
             return {'errors': err.messages}, 400
         
-        user = User(
-            username=data['username'],
-            email=data['email'],
-            first_name=data.get('first_name'),
-            last_name=data.get('last_name'),
-            phone=data.get('phone'),
-            role=data.get('role', 'customer')
-        )
-        user.set_password(data['password'])
-        
-        db.session.add(user)
-        db.session.commit()
+        try:
+            user = register_user(data)
+        except ValidationError as err:
+            return {'errors': err.messages}, 400
         
         # Send verification email
         send_verification_email(user.email, user.username)
@@ -100,8 +95,12 @@ class AuthLogin(Resource):
         description: Login successful
       401:
         description: Invalid credentials
+      429:
+        description: Too many login attempts
     """
     
+    @load_priority('critical')
+    @rate_limit('login')
     def post(self):
         schema = UserLoginSchema()
         try:
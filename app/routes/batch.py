@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, current_app
+from flask_restful import Resource
+from marshmallow import ValidationError
+from werkzeug.test import EnvironBuilder
+from app.schemas.batch_schema import BatchRequestSchema
+
+# Request headers passed on to every sub-request
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'User-Agent', 'X-Forwarded-For')
+
+def dispatch(app, path, headers, remote_addr):
+    """
+    Run a GET for ``path`` through the app in its own app and request
+    context (own ``g`` and database session), returning (status, body)
+    """
+    environ = EnvironBuilder(
+        path=path, method='GET', headers=headers, environ_base={'REMOTE_ADDR': remote_addr}
+    ).get_environ()
+    with app.app_context(), app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            app.logger.error(f'Batch sub-request {path} failed: {str(e)}')
+            return 500, {'message': 'Internal server error'}
+        if response.mimetype == 'text/event-stream':
+            # Would never finish
+            response.close()
+            return 400, {'message': 'Streaming endpoints cannot be batched'}
+        body = response.get_json(silent=True)
+        if body is None and response.status_code != 304:
+            body = response.get_data(as_text=True)
+        return response.status_code, body
+
+class BatchAPI(Resource):
+    """
+    Batch Requests
+    ---
+    tags:
+      - Batch
+    """
+    
+    def post(self):
+        """
+        Run Several GET Requests in One Round Trip
+        ---
+        description: >
+          Each sub-request is dispatched inside the app with the caller's
+          Authorization header, so it is authenticated, authorized and rate
+          limited as if it had been sent on its own. With parallel, the
+          sub-requests run concurrently (up to BATCH_MAX_WORKERS at a time).
+        parameters:
+          - in: body
+            name: body
+            schema:
+              type: object
+              required:
+                - requests
+              properties:
+                requests:
+                  type: array
+                  items:
+                    type: object
+                    required:
+                      - path
+                    properties:
+                      id:
+                        type: string
+                      method:
+                        type: string
+                        enum: [GET]
+                      path:
+                        type: string
+                        example: /api/products?sort=newest
+                parallel:
+                  type: boolean
+        responses:
+          200:
+            description: One result per sub-request, in order, each with its own status and body
+          400:
+            description: Validation error or too many sub-requests
+        """
+        
+        schema = BatchRequestSchema()
+        try:
+            data = schema.load(request.json)
+        except ValidationError as err:
+            return {'errors': err.messages}, 400
+        
+        items = data['requests']
+        max_requests = current_app.config['BATCH_MAX_REQUESTS']
+        if len(items) > max_requests:
+            return {'message': f'At most {max_requests} sub-requests per batch'}, 400
+        
+        app = current_app._get_current_object()
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        remote_addr = request.remote_addr
+        
+        def run(item):
+            return dispatch(app, item['path'], headers, remote_addr)
+        
+        workers = min(len(items), current_app.config['BATCH_MAX_WORKERS'])
+        if data['parallel'] and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+                results = list(executor.map(run, items))
+        else:
+            results = [run(item) for item in items]
+        
+        return {
+            'responses': [
+                {'id': item.get('id', str(index)), 'status': status, 'body': body}
+                for index, (item, (status, body)) in enumerate(zip(items, results))
+            ]
+        }, 200
@@ -1,6 +1,13 @@
 from flask_restful import Resource
+from app import cache
 from app.models.category import Category
 from app.schemas.category_schema import CategorySchema
+from app.services.cache_invalidation import CATEGORIES_TAG
+from app.utils.replicas import read_only
+
+def active_categories():
+    categories = Category.query.filter_by(is_active=True).order_by(Category.sort_order, Category.name).all()
+    return CategorySchema(many=True).dump(categories)
 
 class CategoryListAPI(Resource):
     """
@@ -10,6 +17,7 @@ class CategoryListAPI(Resource):
       - Categories
     """
     
+    @read_only
     def get(self):
         """
         Get All Categories
@@ -19,7 +27,4 @@ class CategoryListAPI(Resource):
             description: List of categories
         """
         
-        categories = Category.query.filter_by(is_active=True).order_by(Category.sort_order, Category.name).all()
-        schema = CategorySchema(many=True)
-        
-        return {'categories': schema.dump(categories)}, 200
\ No newline at end of file
+        return {'categories': cache.get_or_set('categories:active', active_categories, tags=[CATEGORIES_TAG])}, 200
\ No newline at end of file
@@ -1,14 +1,30 @@
-from flask import request
+from flask import current_app, request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy.orm import lazyload, load_only, selectinload
 from app import db
 from app.models.order import Order, OrderItem
 from app.models.product import Product
 from app.schemas.order_schema import OrderSchema, OrderCreateSchema
+from app.schemas.compiled import compile_schema
+from app.services.order_events import user_channel
+from app.services.user_service import user_access
+from app.utils.fieldsets import FieldSpec, Include
 from app.utils.pagination import paginate_query
+from app.utils.pubsub import event_stream_response, issue_stream_ticket, stream_identity
+from app.utils.rate_limit import rate_limit
+from app.utils.load_shedding import load_priority
 import uuid
 
+ORDER_FIELDS = FieldSpec(Order, OrderSchema, includes={
+    'items': Include(['items'], load=lambda: [
+        selectinload(Order.items).selectinload(OrderItem.product).options(
+            load_only(Product.id, Product.title, Product.image_url), lazyload(Product.images))
+    ]),
+    'customer': Include(['customer'], load=lambda: [selectinload(Order.customer)], columns=['customer_id']),
+})
+
 class OrderListAPI(Resource):
     """
     Order List and Create
@@ -33,22 +49,38 @@ class OrderListAPI(Resource):
             name: per_page
             type: integer
             default: 10
+          - in: query
+            name: fields
+            type: string
+            description: Comma-separated fields to return, e.g. id,order_number,status (id is always returned)
+          - in: query
+            name: include
+            type: string
+            description: Comma-separated related data to add (items, customer); all by default
         responses:
           200:
             description: List of user orders
+          400:
+            description: Unknown field or include
         """
         
+        try:
+            selection = ORDER_FIELDS.parse(request.args)
+        except ValueError as err:
+            return {'errors': err.args[0]}, 400
+        
         user_id = get_jwt_identity()
         query = Order.query.filter_by(customer_id=user_id).order_by(Order.created_at.desc())
         
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 50)
         
+        query = ORDER_FIELDS.apply(query, selection)
         pagination_result = paginate_query(query, page, per_page)
         
-        schema = OrderSchema(many=True)
+        schema = compile_schema(OrderSchema, only=selection.only)
         return {
-            'orders': schema.dump(pagination_result['items']),
+            'orders': schema.dump(pagination_result['items'], many=True),
             'pagination': {
                 'page': pagination_result['page'],
                 'pages': pagination_result['pages'],
@@ -57,7 +89,9 @@ class OrderListAPI(Resource):
             }
         }, 200
     
+    @load_priority('critical')
     @jwt_required()
+    @rate_limit('checkout')
     def post(self):
         """
         Create New Order
@@ -83,6 +117,8 @@ class OrderListAPI(Resource):
             description: Order created successfully
           400:
             description: Validation error
+          429:
+            description: Too many orders
         """
         
         schema = OrderCreateSchema()
@@ -155,7 +191,7 @@ class OrderListAPI(Resource):
         
         db.session.commit()
         
-        order_schema = OrderSchema()
+        order_schema = compile_schema(OrderSchema)
         return {
             'message': 'Order created successfully',
             'order': order_schema.dump(order)
@@ -194,5 +230,78 @@ class OrderDetailAPI(Resource):
         if not order:
             return {'message': 'Order not found'}, 404
         
-        schema = OrderSchema()
-        return {'order': schema.dump(order)}, 200
\ No newline at end of file
+        schema = compile_schema(OrderSchema)
+        return {'order': schema.dump(order)}, 200
+
+class OrderStreamAPI(Resource):
+    """
+    Order Status Stream
+    ---
+    tags:
+      - Orders
+    """
+    
+    def get(self):
+        """
+        Stream Order Status Changes (Server-Sent Events)
+        ---
+        description: >
+          Pushes order.created and order.status events for the caller's
+          orders as they are committed. EventSource cannot send headers, so
+          instead of the access token it may pass a ticket from
+          POST /api/orders/stream/ticket as ?ticket=. Reconnects resume from
+          the Last-Event-ID header (or ?last_event_id= with a new ticket).
+        produces:
+          - text/event-stream
+        security:
+          - Bearer: []
+        parameters:
+          - in: query
+            name: ticket
+            type: string
+            description: Stream ticket, for clients that cannot set Authorization
+          - in: header
+            name: Last-Event-ID
+            type: string
+        responses:
+          200:
+            description: Event stream
+          401:
+            description: Missing, invalid or expired token or ticket
+          503:
+            description: Too many open streams on this worker
+        """
+        
+        user_id = stream_identity('orders')
+        user = user_access(user_id) if user_id is not None else None
+        if not user or not user['is_active']:
+            return {'message': 'Authorization header or valid stream ticket required'}, 401
+        return event_stream_response(user_channel(user_id))
+
+class OrderStreamTicketAPI(Resource):
+    """
+    Order Status Stream Ticket
+    ---
+    tags:
+      - Orders
+    """
+    
+    @jwt_required()
+    def post(self):
+        """
+        Get a Ticket to Open the Order Status Stream
+        ---
+        description: >
+          Short-lived ticket for GET /api/orders/stream?ticket=..., so the
+          access token never appears in a URL (and in access logs)
+        security:
+          - Bearer: []
+        responses:
+          201:
+            description: Ticket and its lifetime in seconds
+        """
+        
+        return {
+            'ticket': issue_stream_ticket(get_jwt_identity(), 'orders'),
+            'expires_in': current_app.config['STREAM_TICKET_SECONDS']
+        }, 201
@@ -0,0 +1,335 @@
+import os
+import tempfile
+from flask import request, current_app
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
+from app import db
+from app.models.product import Product, ProductImage
+from app.models.user import User
+from app.schemas.product_schema import ProductImageSchema
+from app.services.image_service import (
+    inspect_image, queue_gallery_image, queue_image_deletion, sync_primary_image, ImageTooLargeError, InvalidImageError
+)
+from app.utils.decorators import role_required
+from app.utils.replicas import read_only
+
+def get_owned_product(product_id):
+    """
+    Return (product, None) if the current user may edit the product, else (None, error response)
+    """
+    product = Product.query.get(product_id)
+    if not product:
+        return None, ({'message': 'Product not found'}, 404)
+
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id)
+
+    # Check if user owns the product or is admin
+    if product.seller_id != user_id and not user.is_admin():
+        return None, ({'message': 'Insufficient permissions'}, 403)
+
+    return product, None
+
+class FileTooLarge(RequestEntityTooLarge):
+    def __init__(self, filename):
+        super().__init__()
+        self.filename = filename
+
+class LimitedSpool:
+    """
+    Temp file for one uploaded part that raises FileTooLarge as soon as
+    more than ``max_bytes`` are written to it
+    """
+
+    def __init__(self, file, max_bytes, filename):
+        self.file = file
+        self.max_bytes = max_bytes
+        self.filename = filename
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise FileTooLarge(self.filename)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+def parse_spooled_upload(max_content_length, max_file_bytes):
+    """
+    Parse a multipart request, writing every file part straight to its own
+    temp file on disk. Returns (form, files, spooled_paths); the caller owns
+    the paths. Nothing is spooled in memory, unlike request.files. A part
+    over ``max_file_bytes`` stops the parse with FileTooLarge when it
+    crosses the limit, not after it has been written out.
+    """
+    spooled = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        stream = tempfile.NamedTemporaryFile(
+            'wb+', prefix='gemcart-upload-', dir=current_app.config.get('UPLOAD_TMP_DIR'), delete=False
+        )
+        spooled.append(stream.name)
+        return LimitedSpool(stream, max_file_bytes, filename)
+
+    try:
+        _, form, files = parse_form_data(
+            request.environ,
+            stream_factory=stream_factory,
+            max_content_length=max_content_length,
+            max_form_memory_size=500 * 1024,
+            max_form_parts=current_app.config['IMAGE_UPLOAD_MAX_FILES'] * 2 + 10,
+            silent=False
+        )
+    except Exception:
+        remove_files(spooled)
+        raise
+
+    return form, files, spooled
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+class ProductImageListAPI(Resource):
+    """
+    Product Image Gallery
+    ---
+    tags:
+      - Products
+    """
+
+    @read_only
+    def get(self, product_id):
+        """
+        List Product Images in Display Order
+        ---
+        parameters:
+          - in: path
+            name: product_id
+            type: integer
+            required: true
+        responses:
+          200:
+            description: Product images
+          404:
+            description: Product not found
+        """
+
+        product = Product.query.filter_by(id=product_id, is_active=True).first()
+        if not product:
+            return {'message': 'Product not found'}, 404
+
+        schema = ProductImageSchema(many=True)
+        return {'images': schema.dump(product.images)}, 200
+
+    @jwt_required()
+    @role_required(['seller', 'admin'])
+    def post(self, product_id):
+        """
+        Upload Product Images
+        ---
+        security:
+          - Bearer: []
+        consumes:
+          - multipart/form-data
+        parameters:
+          - in: path
+            name: product_id
+            type: integer
+            required: true
+          - in: formData
+            name: images
+            type: file
+            required: true
+            description: One or more image files, appended to the gallery in the order sent
+        responses:
+          202:
+            description: Images accepted and queued for processing
+          400:
+            description: Missing or invalid image
+          403:
+            description: Insufficient permissions
+          404:
+            description: Product not found
+          413:
+            description: Upload too large
+        """
+
+        product, error = get_owned_product(product_id)
+        if error:
+            return error
+
+        if request.mimetype != 'multipart/form-data':
+            return {'message': 'multipart/form-data required'}, 400
+
+        max_bytes = current_app.config['IMAGE_UPLOAD_MAX_BYTES']
+        max_files = current_app.config['IMAGE_UPLOAD_MAX_FILES']
+
+        try:
+            _, files, spooled = parse_spooled_upload(max_bytes * max_files, max_bytes)
+        except FileTooLarge as e:
+            return {'errors': {e.filename or 'images': [f'File exceeds {max_bytes} bytes']}}, 413
+        except RequestEntityTooLarge:
+            return {'message': f'Upload exceeds {max_bytes * max_files} bytes'}, 413
+        except ValueError as e:
+            return {'message': f'Malformed upload: {str(e)}'}, 400
+
+        uploads = files.getlist('images') + files.getlist('image')
+        for upload in uploads:
+            upload.stream.close()
+        paths = [upload.stream.name for upload in uploads]
+
+        # Anything spooled that is not an image field is discarded
+        remove_files(set(spooled) - set(paths))
+
+        errors = {}
+        if not uploads:
+            errors['images'] = ['At least one image is required']
+        elif len(uploads) > max_files:
+            errors['images'] = [f'At most {max_files} images per request']
+
+        for index, upload in enumerate(uploads if not errors else []):
+            try:
+                inspect_image(upload.stream.name, current_app.config.get('IMAGE_MAX_PIXELS', 50_000_000))
+            except (ImageTooLargeError, InvalidImageError) as e:
+                errors[upload.filename or str(index)] = [str(e)]
+
+        if errors:
+            remove_files(paths)
+            return {'errors': errors}, 400
+
+        next_position = max((image.position for image in product.images), default=-1) + 1
+        images = []
+        for offset in range(len(paths)):
+            image = ProductImage(product_id=product.id, position=next_position + offset, status='pending')
+            db.session.add(image)
+            images.append(image)
+        db.session.commit()
+
+        for image, path in zip(images, paths):
+            queue_gallery_image(image.id, path)
+
+        schema = ProductImageSchema(many=True)
+        return {
+            'message': 'Images accepted for processing',
+            'images': schema.dump(images)
+        }, 202
+
+    @jwt_required()
+    @role_required(['seller', 'admin'])
+    def put(self, product_id):
+        """
+        Reorder Product Images
+        ---
+        security:
+          - Bearer: []
+        parameters:
+          - in: path
+            name: product_id
+            type: integer
+            required: true
+          - in: body
+            name: body
+            schema:
+              type: object
+              required:
+                - image_ids
+              properties:
+                image_ids:
+                  type: array
+                  items:
+                    type: integer
+                  description: Every image id of the product, in the new display order
+        responses:
+          200:
+            description: Images reordered
+          400:
+            description: image_ids does not match the product's images
+          403:
+            description: Insufficient permissions
+          404:
+            description: Product not found
+        """
+
+        product, error = get_owned_product(product_id)
+        if error:
+            return error
+
+        image_ids = (request.json or {}).get('image_ids')
+        images_by_id = {image.id: image for image in product.images}
+        if not isinstance(image_ids, list) or sorted(image_ids) != sorted(images_by_id):
+            return {'message': 'image_ids must list every image of the product exactly once'}, 400
+
+        for position, image_id in enumerate(image_ids):
+            images_by_id[image_id].position = position
+        product.images.sort(key=lambda image: image.position)
+        sync_primary_image(product)
+        db.session.commit()
+
+        schema = ProductImageSchema(many=True)
+        return {
+            'message': 'Images reordered successfully',
+            'images': schema.dump(product.images)
+        }, 200
+
+class ProductImageDetailAPI(Resource):
+    """
+    Product Image Operations
+    ---
+    tags:
+      - Products
+    """
+
+    @jwt_required()
+    @role_required(['seller', 'admin'])
+    def delete(self, product_id, image_id):
+        """
+        Delete Product Image
+        ---
+        security:
+          - Bearer: []
+        parameters:
+          - in: path
+            name: product_id
+            type: integer
+            required: true
+          - in: path
+            name: image_id
+            type: integer
+            required: true
+        responses:
+          200:
+            description: Image deleted
+          403:
+            description: Insufficient permissions
+          404:
+            description: Product or image not found
+        """
+
+        product, error = get_owned_product(product_id)
+        if error:
+            return error
+
+        image = next((image for image in product.images if image.id == image_id), None)
+        if not image:
+            return {'message': 'Image not found'}, 404
+
+        image_hash = image.image_hash
+        product.images.remove(image)
+        for position, remaining in enumerate(product.images):
+            remaining.position = position
+        sync_primary_image(product)
+        if product.image_hash == image_hash and not any(image.status == 'ready' for image in product.images):
+            product.image_url = product.image_hash = product.image_variants = product.image_status = None
+        db.session.commit()
+
+        queue_image_deletion([image_hash])
+
+        return {'message': 'Image deleted successfully'}, 200
@@ -1,16 +1,153 @@
-from flask import request
+from urllib.parse import urlencode
+from flask import current_app, request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
-from sqlalchemy import or_
-from app import db
+from sqlalchemy import and_, false, or_
+from sqlalchemy.orm import lazyload, selectinload
+from app import cache, db
 from app.models.product import Product
 from app.models.category import Category
+from app.models.product_listing import ProductListing
 from app.models.user import User
-from app.schemas.product_schema import ProductSchema, ProductCreateSchema, ProductUpdateSchema
+from app.schemas.product_schema import ProductSchema, ProductListingSchema, ProductCreateSchema, ProductUpdateSchema
+from app.schemas.compiled import compile_schema
 from app.utils.decorators import role_required
-from app.utils.pagination import paginate_query
-from app.services.image_service import upload_image, delete_image
+from app.utils.fieldsets import FieldSpec, Include
+from app.utils.replicas import read_only
+from app.utils.pagination import paginate_query, encode_cursor, decode_cursor
+from app.utils.rate_limit import rate_limit
+from app.utils.load_shedding import load_priority
+from app.services.cache_invalidation import PRODUCT_LIST_TAG, product_tag
+from app.services.image_service import queue_product_image, queue_image_deletion
+
+def prefetch_categories(products):
+    categories = {category for product in products for category in product.categories}
+    categories.update(child for category in list(categories) for child in category.children)
+    if categories:
+        Category.prefetch_product_counts(categories)
+
+PRODUCT_FIELDS = FieldSpec(Product, ProductSchema, includes={
+    'categories': Include(
+        ['categories'],
+        load=lambda: [selectinload(Product.categories).selectinload(Category.children)],
+        prefetch=prefetch_categories,
+    ),
+    'seller': Include(['seller'], load=lambda: [selectinload(Product.seller)], columns=['seller_id']),
+    'images': Include(['images'], skip=lambda: [lazyload(Product.images)]),
+    'rating': Include(['average_rating', 'review_count'], prefetch=Product.prefetch_ratings),
+}, requires={'image_srcset': ['image_variants']})
+
+# Product fields the list can serve from product_listing rows alone
+LISTING_FIELDS = frozenset(ProductListingSchema().dump_fields)
+
+BATCH_MAX = 100
+CHANGES_MAX = 500
+
+def load_active_products(column, values, selection):
+    """
+    Active products whose ``column`` is in ``values``, in one query, keyed by
+    that column. Shared by the detail and batch endpoints.
+    """
+    query = Product.query.filter(column.in_(values), Product.is_active == True)
+    products = PRODUCT_FIELDS.apply(query, selection, columns=[column.key]).all()
+    PRODUCT_FIELDS.prefetch(products, selection)
+    return {getattr(product, column.key): product for product in products}
+
+def list_products(args, selection):
+    """
+    One page of the product list as a response body
+    """
+    # Filter, sort and page the flattened product_listing table (one row
+    # per active product, no joins)
+    query = ProductListing.query
+    
+    # Search filter (title and description)
+    search = args.get('search')
+    if search:
+        query = query.filter(ProductListing.search_text.ilike(f'%{search}%'))
+    
+    # Category filter, by name or slug
+    category = args.get('category')
+    if category:
+        slug = db.session.scalar(
+            db.select(Category.slug).filter(or_(Category.name == category, Category.slug == category)).limit(1)
+        )
+        query = query.filter(ProductListing.category_slugs.like(ProductListing.slug_pattern(slug)) if slug else false())
+    
+    # Price filters
+    min_price = args.get('min_price', type=float)
+    if min_price:
+        query = query.filter(ProductListing.price >= min_price)
+    
+    max_price = args.get('max_price', type=float)
+    if max_price:
+        query = query.filter(ProductListing.price <= max_price)
+    
+    # Sorting
+    sort = args.get('sort', 'newest')
+    if sort == 'price_asc':
+        query = query.order_by(ProductListing.price.asc())
+    elif sort == 'price_desc':
+        query = query.order_by(ProductListing.price.desc())
+    elif sort == 'name_asc':
+        query = query.order_by(ProductListing.title.asc())
+    elif sort == 'name_desc':
+        query = query.order_by(ProductListing.title.desc())
+    else:  # newest
+        query = query.order_by(ProductListing.created_at.desc())
+    
+    # Pagination
+    page = args.get('page', 1, type=int)
+    per_page = min(args.get('per_page', 12, type=int), 100)
+    
+    pagination_result = paginate_query(query, page, per_page)
+    
+    if selection.only is not None and selection.only <= LISTING_FIELDS:
+        # Card fields come straight from the listing rows
+        items = pagination_result['items']
+        schema = compile_schema(ProductListingSchema, only=selection.only)
+    else:
+        # Anything else loads the page's products, in listing order
+        ids = [listing.id for listing in pagination_result['items']]
+        found = load_active_products(Product.id, ids, selection)
+        items = [found[product_id] for product_id in ids if product_id in found]
+        schema = compile_schema(ProductSchema, only=selection.only)
+    
+    return {
+        'products': schema.dump(items, many=True),
+        'pagination': {
+            'page': pagination_result['page'],
+            'pages': pagination_result['pages'],
+            'per_page': pagination_result['per_page'],
+            'total': pagination_result['total']
+        }
+    }
+
+def dump_product(product_id):
+    """
+    Full serialized product, or None if it is missing or inactive
+    """
+    product = load_active_products(Product.id, [product_id], PRODUCT_FIELDS.everything()).get(product_id)
+    return compile_schema(ProductSchema).dump(product) if product else None
+
+def dump_products(product_ids):
+    """
+    Full serialized active products keyed by id, from the ``product:{id}``
+    entries the detail endpoint caches. Only the misses are loaded, in one
+    query, and cached for both endpoints.
+    """
+    keys = {product_id: f'product:{product_id}' for product_id in product_ids}
+    cached = cache.get_many(list(keys.values()))
+    products = {product_id: cached[key] for product_id, key in keys.items() if key in cached}
+    
+    missing = [product_id for product_id in product_ids if product_id not in products]
+    if missing:
+        schema = compile_schema(ProductSchema)
+        for product_id, product in load_active_products(Product.id, missing, PRODUCT_FIELDS.everything()).items():
+            products[product_id] = schema.dump(product)
+            cache.set(keys[product_id], products[product_id], tags=[product_tag(product_id)])
+    return products
 
 class ProductListAPI(Resource):
     """
@@ -20,6 +157,9 @@ class ProductListAPI(Resource):
       - Products
     """
     
+    @load_priority('low', when=lambda: bool(request.args.get('search')))
+    @read_only
+    @rate_limit('search', when=lambda: bool(request.args.get('search')))
     def get(self):
         """
         Get Products with Pagination and Filtering
@@ -39,6 +179,7 @@ class ProductListAPI(Resource):
           - in: query
             name: category
             type: string
+            description: Category name or slug
           - in: query
             name: min_price
             type: number
@@ -49,66 +190,41 @@ class ProductListAPI(Resource):
             name: sort
             type: string
             enum: [price_asc, price_desc, name_asc, name_desc, newest]
+          - in: query
+            name: fields
+            type: string
+            description: >
+              Comma-separated fields to return, e.g. id,title,price (id is
+              always returned). Card fields (title, sku, price, image_url,
+              image_srcset, seller, average_rating, review_count and similar)
+              are served from the listing table without loading products.
+          - in: query
+            name: include
+            type: string
+            description: Comma-separated related data to add (categories, seller, images, rating); all by default
         responses:
           200:
             description: List of products
+          400:
+            description: Unknown field or include
+          429:
+            description: Too many search requests
         """
         
-        query = Product.query.filter_by(is_active=True)
-        
-        # Search filter
-        search = request.args.get('search')
-        if search:
-            query = query.filter(
-                or_(
-                    Product.title.ilike(f'%{search}%'),
-                    Product.description.ilike(f'%{search}%')
-                )
-            )
-        
-        # Category filter
-        category = request.args.get('category')
-        if category:
-            query = query.join(Product.categories).filter(Category.name == category)
-        
-        # Price filters
-        min_price = request.args.get('min_price', type=float)
-        if min_price:
-            query = query.filter(Product.price >= min_price)
-        
-        max_price = request.args.get('max_price', type=float)
-        if max_price:
-            query = query.filter(Product.price <= max_price)
-        
-        # Sorting
-        sort = request.args.get('sort', 'newest')
-        if sort == 'price_asc':
-            query = query.order_by(Product.price.asc())
-        elif sort == 'price_desc':
-            query = query.order_by(Product.price.desc())
-        elif sort == 'name_asc':
-            query = query.order_by(Product.title.asc())
-        elif sort == 'name_desc':
-            query = query.order_by(Product.title.desc())
-        else:  # newest
-            query = query.order_by(Product.created_at.desc())
-        
-        # Pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 12, type=int), 100)
-        
-        pagination_result = paginate_query(query, page, per_page)
-        
-        schema = ProductSchema(many=True)
-        return {
-            'products': schema.dump(pagination_result['items']),
-            'pagination': {
-                'page': pagination_result['page'],
-                'pages': pagination_result['pages'],
-                'per_page': pagination_result['per_page'],
-                'total': pagination_result['total']
-            }
-        }, 200
+        try:
+            selection = PRODUCT_FIELDS.parse(request.args)
+        except ValueError as err:
+            return {'errors': err.args[0]}, 400
+        
+        # Searches are too varied to be worth caching
+        if request.args.get('search'):
+            return list_products(request.args, selection), 200
+        
+        key = 'products:' + urlencode(sorted(request.args.items(multi=True)))
+        return cache.get_or_set(
+            key, lambda: list_products(request.args, selection),
+            ttl=current_app.config['CACHE_PRODUCT_LIST_TTL'], tags=[PRODUCT_LIST_TAG]
+        ), 200
     
     @jwt_required()
     @role_required(['seller', 'admin'])
@@ -138,6 +254,9 @@ class ProductListAPI(Resource):
                   type: integer
                 sku:
                   type: string
+                image:
+                  type: string
+                  description: Base64 data URI; processed in the background (see image_status)
         responses:
           201:
             description: Product created successfully
@@ -180,15 +299,182 @@ class ProductListAPI(Resource):
             if category:
                 product.categories.append(category)
         
+        image = data.get('image')
+        if image:
+            product.image_status = 'pending'
+        
         db.session.add(product)
         db.session.commit()
         
-        product_schema = ProductSchema()
+        if image:
+            queue_product_image(product.id, image)
+        
+        product_schema = compile_schema(ProductSchema)
         return {
             'message': 'Product created successfully',
             'product': product_schema.dump(product)
         }, 201
 
+class ProductBatchAPI(Resource):
+    """
+    Batch Product Lookup
+    ---
+    tags:
+      - Products
+    """
+    
+    @read_only
+    def get(self):
+        """
+        Get Several Products by ID or SKU
+        ---
+        parameters:
+          - in: query
+            name: ids
+            type: string
+            description: Comma-separated product IDs (up to 100)
+          - in: query
+            name: skus
+            type: string
+            description: Comma-separated SKUs (up to 100), instead of ids
+          - in: query
+            name: fields
+            type: string
+            description: Comma-separated fields to return, as on the product list
+          - in: query
+            name: include
+            type: string
+            description: Comma-separated related data to add, as on the product list
+        responses:
+          200:
+            description: Products in request order, plus the ids or SKUs not found
+          400:
+            description: Missing, invalid or too many ids/SKUs
+        """
+        
+        ids, skus = request.args.get('ids'), request.args.get('skus')
+        if (ids is None) == (skus is None):
+            return {'message': 'Provide either ids or skus'}, 400
+        
+        if ids is not None:
+            values = [value.strip() for value in ids.split(',') if value.strip()]
+            if not all(value.isdigit() for value in values):
+                return {'errors': {'ids': ['Not a comma-separated list of integers.']}}, 400
+            values = [int(value) for value in values]
+        else:
+            values = [value.strip() for value in skus.split(',') if value.strip()]
+        
+        # Keep the first occurrence of each, in request order
+        values = list(dict.fromkeys(values))
+        if not values:
+            return {'message': 'Provide either ids or skus'}, 400
+        if len(values) > BATCH_MAX:
+            return {'message': f'At most {BATCH_MAX} products per request'}, 400
+        
+        try:
+            selection = PRODUCT_FIELDS.parse(request.args)
+        except ValueError as err:
+            return {'errors': err.args[0]}, 400
+        
+        if ids is not None:
+            product_ids = {value: value for value in values}
+        else:
+            product_ids = dict(db.session.execute(
+                db.select(Product.sku, Product.id).filter(Product.sku.in_(values), Product.is_active == True)
+            ).all())
+        
+        products = dump_products(list(product_ids.values()))
+        found = {value: products[product_id] for value, product_id in product_ids.items() if product_id in products}
+        if not selection.full:
+            found = {value: {field: data[field] for field in data if field in selection.only} for value, data in found.items()}
+        
+        return {
+            'products': [found[value] for value in values if value in found],
+            'missing': [value for value in values if value not in found]
+        }, 200
+
+class ProductChangesAPI(Resource):
+    """
+    Product Change Feed
+    ---
+    tags:
+      - Products
+    """
+    
+    @load_priority('low')
+    @read_only
+    def get(self):
+        """
+        Get Products Changed Since a Cursor
+        ---
+        description: >
+          Products created, updated or soft-deleted after ``cursor``, oldest
+          change first. Start without a cursor (the whole catalog, paged),
+          then pass back the returned cursor; it stays the same while there
+          is nothing new. A product changed several times appears once, at
+          its latest change. Changes join the feed once the outbox has
+          delivered them, normally within a second of the commit.
+        parameters:
+          - in: query
+            name: cursor
+            type: string
+          - in: query
+            name: limit
+            type: integer
+            default: 100
+          - in: query
+            name: fields
+            type: string
+            description: Comma-separated fields to return, as on the product list
+          - in: query
+            name: include
+            type: string
+            description: Comma-separated related data to add, as on the product list
+        responses:
+          200:
+            description: Changed active products, ids of deactivated ones, the next cursor and has_more
+          400:
+            description: Invalid cursor, field or include
+        """
+        
+        cursor = request.args.get('cursor')
+        try:
+            seq, last_id = decode_cursor(cursor, 2) if cursor else (-1, 0)
+        except ValueError:
+            return {'errors': {'cursor': ['Invalid cursor.']}}, 400
+        
+        try:
+            selection = PRODUCT_FIELDS.parse(request.args)
+        except ValueError as err:
+            return {'errors': err.args[0]}, 400
+        
+        limit = max(1, min(request.args.get('limit', 100, type=int), CHANGES_MAX))
+        
+        # (change_seq, id) keyset: rows sharing a change_seq (one transaction) are split by id
+        query = Product.query.filter(or_(
+            Product.change_seq > seq,
+            and_(Product.change_seq == seq, Product.id > last_id)
+        )).order_by(Product.change_seq, Product.id).limit(limit + 1)
+        rows = PRODUCT_FIELDS.apply(query, selection, columns=['change_seq', 'is_active']).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            cursor = encode_cursor(rows[-1].change_seq, rows[-1].id)
+        else:
+            cursor = encode_cursor(seq, last_id)
+        
+        active = [product for product in rows if product.is_active]
+        PRODUCT_FIELDS.prefetch(active, selection)
+        
+        schema = compile_schema(ProductSchema, only=selection.only)
+        return {
+            'products': schema.dump(active, many=True),
+            'deleted': [product.id for product in rows if not product.is_active],
+            'cursor': cursor,
+            'has_more': has_more
+        }, 200
+
 class ProductDetailAPI(Resource):
     """
     Product Detail Operations
@@ -197,6 +483,7 @@ class ProductDetailAPI(Resource):
       - Products
     """
     
+    @read_only
     def get(self, product_id):
         """
         Get Product Details
@@ -213,12 +500,11 @@ class ProductDetailAPI(Resource):
             description: Product not found
         """
         
-        product = Product.query.filter_by(id=product_id, is_active=True).first()
-        if not product:
+        data = cache.get_or_set(f'product:{product_id}', lambda: dump_product(product_id), tags=[product_tag(product_id)])
+        if data is None:
             return {'message': 'Product not found'}, 404
         
-        schema = ProductSchema()
-        return {'product': schema.dump(product)}, 200
+        return {'product': data}, 200
     
     @jwt_required()
     @role_required(['seller', 'admin'])
@@ -259,6 +545,10 @@ class ProductDetailAPI(Resource):
         except ValidationError as err:
             return {'errors': err.messages}, 400
         
+        image = data.pop('image', None)
+        if image:
+            product.image_status = 'pending'
+        
         # Update fields
         for field, value in data.items():
             if field == 'category_ids':
@@ -272,7 +562,10 @@ class ProductDetailAPI(Resource):
         
         db.session.commit()
         
-        product_schema = ProductSchema()
+        if image:
+            queue_product_image(product.id, image)
+        
+        product_schema = compile_schema(ProductSchema)
         return {
             'message': 'Product updated successfully',
             'product': product_schema.dump(product)
@@ -315,4 +608,7 @@ class ProductDetailAPI(Resource):
         product.is_active = False
         db.session.commit()
         
+        # Images are only removed once no active product shares them
+        queue_image_deletion([product.image_hash] + [image.image_hash for image in product.images])
+        
         return {'message': 'Product deleted successfully'}, 200
\ No newline at end of file
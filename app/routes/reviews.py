@@ -2,11 +2,22 @@ from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy.orm import lazyload, load_only, selectinload
 from app import db
 from app.models.review import Review
 from app.models.product import Product
 from app.schemas.review_schema import ReviewSchema, ReviewCreateSchema
+from app.schemas.compiled import compile_schema
+from app.utils.fieldsets import FieldSpec, Include
 from app.utils.pagination import paginate_query
+from app.utils.replicas import read_only
+
+REVIEW_FIELDS = FieldSpec(Review, ReviewSchema, includes={
+    'author': Include(['author'], load=lambda: [selectinload(Review.author)], columns=['author_id']),
+    'product': Include(['product'], load=lambda: [
+        selectinload(Review.product).options(load_only(Product.id, Product.title), lazyload(Product.images))
+    ], columns=['product_id']),
+})
 
 class ReviewListAPI(Resource):
     """
@@ -16,6 +27,7 @@ class ReviewListAPI(Resource):
       - Reviews
     """
     
+    @read_only
     def get(self):
         """
         Get Reviews
@@ -32,11 +44,26 @@ class ReviewListAPI(Resource):
             name: per_page
             type: integer
             default: 10
+          - in: query
+            name: fields
+            type: string
+            description: Comma-separated fields to return, e.g. id,rating,title (id is always returned)
+          - in: query
+            name: include
+            type: string
+            description: Comma-separated related data to add (author, product); all by default
         responses:
           200:
             description: List of reviews
+          400:
+            description: Unknown field or include
         """
         
+        try:
+            selection = REVIEW_FIELDS.parse(request.args)
+        except ValueError as err:
+            return {'errors': err.args[0]}, 400
+        
         query = Review.query.filter_by(is_approved=True)
         
         product_id = request.args.get('product_id', type=int)
@@ -48,11 +75,12 @@ class ReviewListAPI(Resource):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 50)
         
+        query = REVIEW_FIELDS.apply(query, selection)
         pagination_result = paginate_query(query, page, per_page)
         
-        schema = ReviewSchema(many=True)
+        schema = compile_schema(ReviewSchema, only=selection.only)
         return {
-            'reviews': schema.dump(pagination_result['items']),
+            'reviews': schema.dump(pagination_result['items'], many=True),
             'pagination': {
                 'page': pagination_result['page'],
                 'pages': pagination_result['pages'],
@@ -1,13 +1,15 @@
-from .user_schema import UserSchema, UserRegistrationSchema, UserLoginSchema
-from .product_schema import ProductSchema, ProductCreateSchema
+from .user_schema import UserSchema, UserRegistrationSchema, UserImportSchema, UserLoginSchema
+from .product_schema import ProductSchema, ProductImageSchema, ProductListingSchema, ProductCreateSchema
 from .category_schema import CategorySchema
 from .order_schema import OrderSchema, OrderItemSchema
 from .review_schema import ReviewSchema
+from .batch_schema import BatchRequestSchema
 
 __all__ = [
-    'UserSchema', 'UserRegistrationSchema', 'UserLoginSchema',
-    'ProductSchema', 'ProductCreateSchema',
+    'UserSchema', 'UserRegistrationSchema', 'UserImportSchema', 'UserLoginSchema',
+    'ProductSchema', 'ProductImageSchema', 'ProductListingSchema', 'ProductCreateSchema',
     'CategorySchema',
     'OrderSchema', 'OrderItemSchema',
-    'ReviewSchema'
+    'ReviewSchema',
+    'BatchRequestSchema'
 ]
\ No newline at end of file
@@ -0,0 +1,35 @@
+import datetime
+import decimal
+from marshmallow import fields
+from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+
+class NativeDateTime(fields.DateTime):
+    """
+    DateTime that dumps the datetime itself. The API's JSON encoder writes it
+    as ISO 8601, the same string marshmallow would have produced, without a
+    Python-level strftime per value. Loading is unchanged.
+    """
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        return value
+
+class NativeDecimal(fields.Decimal):
+    """
+    Decimal that dumps the Decimal itself for the JSON encoder to write as a
+    string. Loading (validation, places, rounding) is unchanged.
+    """
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        return value
+
+class ModelSchema(SQLAlchemyAutoSchema):
+    """
+    Base for model schemas: Numeric and DateTime columns are left for
+    app.utils.json_encoding to encode
+    """
+
+    TYPE_MAPPING = {
+        **SQLAlchemyAutoSchema.TYPE_MAPPING,
+        decimal.Decimal: NativeDecimal,
+        datetime.datetime: NativeDateTime,
+    }
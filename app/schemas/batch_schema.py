@@ -0,0 +1,15 @@
+from marshmallow import Schema, fields, validate, validates, ValidationError
+
+class BatchItemSchema(Schema):
+    id = fields.Str(validate=validate.Length(max=100))
+    method = fields.Str(validate=validate.OneOf(['GET']), missing='GET')
+    path = fields.Str(required=True, validate=validate.Length(min=1, max=2000))
+    
+    @validates('path')
+    def validate_path(self, value):
+        if not value.startswith('/api/') or value.split('?', 1)[0].rstrip('/') == '/api/batch':
+            raise ValidationError('Must be an /api/ path other than /api/batch.')
+
+class BatchRequestSchema(Schema):
+    requests = fields.List(fields.Nested(BatchItemSchema), required=True, validate=validate.Length(min=1))
+    parallel = fields.Bool(missing=False)
@@ -1,16 +1,16 @@
 from marshmallow import Schema, fields, validate
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from app.models.category import Category
+from .base import ModelSchema, NativeDateTime
 
-class CategorySchema(SQLAlchemyAutoSchema):
+class CategorySchema(ModelSchema):
     class Meta:
         model = Category
         load_instance = True
     
     id = fields.Int(dump_only=True)
     product_count = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    updated_at = NativeDateTime(dump_only=True)
     children = fields.Nested('self', many=True, dump_only=True)
     parent = fields.Nested('self', only=['id', 'name'], dump_only=True)
 
@@ -1,17 +1,17 @@
 from marshmallow import Schema, fields, validate
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from app.models.order import Order, OrderItem
+from .base import ModelSchema, NativeDateTime
 
-class OrderItemSchema(SQLAlchemyAutoSchema):
+class OrderItemSchema(ModelSchema):
     class Meta:
         model = OrderItem
         load_instance = True
     
     id = fields.Int(dump_only=True)
     product = fields.Nested('ProductSchema', only=['id', 'title', 'image_url'], dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
 
-class OrderSchema(SQLAlchemyAutoSchema):
+class OrderSchema(ModelSchema):
     class Meta:
         model = Order
         load_instance = True
@@ -19,8 +19,8 @@ class OrderSchema(SQLAlchemyAutoSchema):
     id = fields.Int(dump_only=True)
     items = fields.Nested(OrderItemSchema, many=True, dump_only=True)
     customer = fields.Nested('UserSchema', only=['id', 'username', 'email'], dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    updated_at = NativeDateTime(dump_only=True)
 
 class OrderCreateSchema(Schema):
     items = fields.List(fields.Dict(), required=True)
@@ -1,21 +1,75 @@
 from marshmallow import Schema, fields, validate
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
-from app.models.product import Product
+from app.models.product import Product, ProductImage
+from app.models.product_listing import ProductListing
+from .base import ModelSchema, NativeDateTime
 from .category_schema import CategorySchema
 
-class ProductSchema(SQLAlchemyAutoSchema):
+def build_srcset(variants):
+    """
+    {'webp': 'url 200w, url 480w, url 1200w', 'jpeg': ...} from an image_variants map
+    """
+    if not variants:
+        return None
+    variants = sorted(variants.values(), key=lambda variant: variant['width'])
+    return {
+        fmt: ', '.join(f"{variant[fmt]} {variant['width']}w" for variant in variants)
+        for fmt in ('webp', 'jpeg')
+    }
+
+class ProductImageSchema(ModelSchema):
+    class Meta:
+        model = ProductImage
+        load_instance = True
+    
+    id = fields.Int(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    image_srcset = fields.Method('get_image_srcset', dump_only=True)
+    
+    def get_image_srcset(self, obj):
+        return build_srcset(obj.image_variants)
+
+class ProductSchema(ModelSchema):
     class Meta:
         model = Product
         load_instance = True
         include_fk = True
+        exclude = ('change_seq',)
     
     id = fields.Int(dump_only=True)
     categories = fields.Nested(CategorySchema, many=True, dump_only=True)
     average_rating = fields.Float(dump_only=True)
     review_count = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    updated_at = NativeDateTime(dump_only=True)
     seller = fields.Nested('UserSchema', only=['id', 'username'], dump_only=True)
+    images = fields.Nested(ProductImageSchema, many=True, exclude=['image_variants'], dump_only=True)
+    image_srcset = fields.Method('get_image_srcset', dump_only=True)
+    
+    def get_image_srcset(self, obj):
+        return build_srcset(obj.image_variants)
+
+class ProductListingSchema(ModelSchema):
+    """
+    The ProductSchema fields a product_listing row can serve, with the same
+    names and output
+    """
+    class Meta:
+        model = ProductListing
+        exclude = ('category_slugs', 'seller_name', 'rating_total', 'search_text')
+    
+    id = fields.Int(dump_only=True)
+    average_rating = fields.Float(dump_only=True)
+    review_count = fields.Int(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    updated_at = NativeDateTime(dump_only=True)
+    seller = fields.Method('get_seller', dump_only=True)
+    image_srcset = fields.Method('get_image_srcset', dump_only=True)
+    
+    def get_seller(self, obj):
+        return {'id': obj.seller_id, 'username': obj.seller_name}
+    
+    def get_image_srcset(self, obj):
+        return build_srcset(obj.image_variants)
 
 class ProductCreateSchema(Schema):
     title = fields.Str(required=True, validate=validate.Length(min=1, max=200))
@@ -29,6 +83,7 @@ class ProductCreateSchema(Schema):
     size = fields.Str(validate=validate.Length(max=50))
     category_ids = fields.List(fields.Int(), missing=[])
     is_featured = fields.Bool(missing=False)
+    image = fields.Str(load_only=True)  # base64 data URI, processed in the background
 
 class ProductUpdateSchema(Schema):
     title = fields.Str(validate=validate.Length(min=1, max=200))
@@ -41,4 +96,5 @@ class ProductUpdateSchema(Schema):
     size = fields.Str(validate=validate.Length(max=50))
     category_ids = fields.List(fields.Int())
     is_featured = fields.Bool()
-    is_active = fields.Bool()
\ No newline at end of file
+    is_active = fields.Bool()
+    image = fields.Str(load_only=True)  # base64 data URI, processed in the background
\ No newline at end of file
@@ -1,8 +1,8 @@
 from marshmallow import Schema, fields, validate
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from app.models.review import Review
+from .base import ModelSchema, NativeDateTime
 
-class ReviewSchema(SQLAlchemyAutoSchema):
+class ReviewSchema(ModelSchema):
     class Meta:
         model = Review
         load_instance = True
@@ -10,8 +10,8 @@ class ReviewSchema(SQLAlchemyAutoSchema):
     id = fields.Int(dump_only=True)
     author = fields.Nested('UserSchema', only=['id', 'username'], dump_only=True)
     product = fields.Nested('ProductSchema', only=['id', 'title'], dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    updated_at = NativeDateTime(dump_only=True)
 
 class ReviewCreateSchema(Schema):
     product_id = fields.Int(required=True)
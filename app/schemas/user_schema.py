@@ -1,17 +1,17 @@
-from marshmallow import Schema, fields, validate, validates, ValidationError
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from marshmallow import Schema, fields, validate
 from app.models.user import User
+from .base import ModelSchema, NativeDateTime
 
-class UserSchema(SQLAlchemyAutoSchema):
+class UserSchema(ModelSchema):
     class Meta:
         model = User
         load_instance = True
         exclude = ('password_hash',)
     
     id = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
-    last_login = fields.DateTime(dump_only=True)
+    created_at = NativeDateTime(dump_only=True)
+    updated_at = NativeDateTime(dump_only=True)
+    last_login = NativeDateTime(dump_only=True)
 
 class UserRegistrationSchema(Schema):
     username = fields.Str(required=True, validate=validate.Length(min=3, max=80))
@@ -21,16 +21,9 @@ class UserRegistrationSchema(Schema):
     last_name = fields.Str(validate=validate.Length(max=50))
     phone = fields.Str(validate=validate.Length(max=20))
     role = fields.Str(validate=validate.OneOf(['customer', 'seller']), missing='customer')
-    
-    @validates('username')
-    def validate_username(self, value):
-        if User.query.filter_by(username=value).first():
-            raise ValidationError('Username already exists')
-    
-    @validates('email')
-    def validate_email(self, value):
-        if User.query.filter_by(email=value).first():
-            raise ValidationError('Email already registered')
+
+class UserImportSchema(UserRegistrationSchema):
+    role = fields.Str(validate=validate.OneOf(['customer', 'seller', 'admin']), missing='customer')
 
 class UserLoginSchema(Schema):
     email = fields.Email(required=True)
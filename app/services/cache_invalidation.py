@@ -0,0 +1,48 @@
+from app import cache, db
+from app.models.product import Product
+from app.utils.outbox import PRODUCT_CHANGED, CATEGORY_CHANGED, USER_CHANGED
+
+# Tags cached entries are stored under
+CATEGORIES_TAG = 'categories'
+PRODUCT_LIST_TAG = 'product-list'
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+# Product changes that move a category's product_count
+CATEGORY_COUNT_FIELDS = ('is_active', 'categories')
+
+def invalidate_cached(events):
+    """
+    EventBus consumer: drop cache entries built from what the events changed
+    """
+    tags = set()
+    for event in events:
+        payload = event.payload
+        if event.event_type == PRODUCT_CHANGED:
+            tags.update((product_tag(payload['product_id']), PRODUCT_LIST_TAG))
+            if payload['created'] or any(field in payload['changed'] for field in CATEGORY_COUNT_FIELDS):
+                tags.add(CATEGORIES_TAG)
+        elif event.event_type == CATEGORY_CHANGED:
+            tags.update((CATEGORIES_TAG, PRODUCT_LIST_TAG))
+        elif event.event_type == USER_CHANGED:
+            tags.add(user_tag(payload['user_id']))
+            if 'username' in payload['changed']:
+                # Products show their seller's username
+                tags.add(PRODUCT_LIST_TAG)
+                tags.update(product_tag(product_id) for product_id in db.session.scalars(
+                    db.select(Product.id).filter(Product.seller_id == payload['user_id'])
+                ))
+    cache.invalidate_tags(*tags)
+
+def install_cache_invalidation(bus):
+    """
+    Invalidate cached products, product list pages, categories and user
+    lookups once the writes they depend on commit. Install after
+    install_product_listing so list pages are dropped once the listing
+    rows they are built from have been refreshed.
+    """
+    bus.subscribe('cache', [PRODUCT_CHANGED, CATEGORY_CHANGED, USER_CHANGED], invalidate_cached)
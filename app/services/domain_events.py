@@ -0,0 +1,135 @@
+import json
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from app.models.category import Category
+from app.models.order import Order
+from app.models.outbox_event import OutboxEvent
+from app.models.review import Review
+from app.models.user import User
+from app.services.product_changes import changed_products
+from app.utils.json_encoding import dumps
+from app.utils.outbox import PRODUCT_CHANGED, ORDER_PLACED, ORDER_STATUS_CHANGED, REVIEW_CREATED, CATEGORY_CHANGED, USER_CHANGED
+from app.utils.replicas import RoutingSession
+
+# Order columns whose changes raise OrderStatusChanged
+ORDER_TRACKED_FIELDS = ('status', 'tracking_number', 'shipped_at', 'delivered_at')
+
+# User columns whose changes raise UserChanged (logins only touch last_login)
+USER_TRACKED_FIELDS = ('username', 'email', 'role', 'is_active')
+
+def order_payload(order, previous_status=None):
+    return {
+        'order_id': order.id,
+        'order_number': order.order_number,
+        'customer_id': order.customer_id,
+        'status': order.status,
+        'previous_status': previous_status,
+        'total_amount': order.total_amount,
+        'tracking_number': order.tracking_number,
+        'shipped_at': order.shipped_at,
+        'delivered_at': order.delivered_at,
+        'updated_at': order.updated_at
+    }
+
+def _product_event(session, product):
+    changed = []
+    if product not in session.new:
+        state = inspect(product)
+        changed = [attr.key for attr in state.mapper.column_attrs
+                   if attr.key != 'change_seq' and state.attrs[attr.key].history.has_changes()]
+        if 'categories' in state.dict and state.attrs.categories.history.has_changes():
+            changed.append('categories')
+    return (PRODUCT_CHANGED, 'product', product.id, {
+        'product_id': product.id,
+        'created': product in session.new,
+        'is_active': product.is_active,
+        'changed': changed
+    })
+
+def _changed_columns(session, obj):
+    """
+    Column names this flush changes on ``obj``, or None when it is new
+    """
+    if obj in session.new:
+        return None
+    state = inspect(obj)
+    return [attr.key for attr in state.mapper.column_attrs if state.attrs[attr.key].history.has_changes()]
+
+def _collect_domain_events(session, flush_context):
+    """
+    Describe what this flush changed while attribute history is still
+    available; the rows are added in after_flush_postexec
+    """
+    pending = session.info.setdefault('domain_events', [])
+    with session.no_autoflush:
+        for product in changed_products(session):
+            if product not in session.deleted:
+                pending.append(_product_event(session, product))
+    for obj in session.new:
+        if isinstance(obj, Order):
+            pending.append((ORDER_PLACED, 'order', obj.id, order_payload(obj)))
+        elif isinstance(obj, Review):
+            pending.append((REVIEW_CREATED, 'review', obj.id, {
+                'review_id': obj.id,
+                'product_id': obj.product_id,
+                'author_id': obj.author_id,
+                'rating': obj.rating
+            }))
+    for order in session.dirty:
+        if not isinstance(order, Order):
+            continue
+        state = inspect(order)
+        if not any(state.attrs[field].history.has_changes() for field in ORDER_TRACKED_FIELDS):
+            continue
+        previous = state.attrs.status.history.deleted
+        pending.append((ORDER_STATUS_CHANGED, 'order', order.id,
+                        order_payload(order, previous[0] if previous else order.status)))
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Category):
+            changed = _changed_columns(session, obj)
+            if changed is None or changed:
+                pending.append((CATEGORY_CHANGED, 'category', obj.id, {
+                    'category_id': obj.id, 'created': changed is None, 'changed': changed or []
+                }))
+        elif isinstance(obj, User) and obj not in session.new:
+            changed = [field for field in _changed_columns(session, obj) if field in USER_TRACKED_FIELDS]
+            if changed:
+                pending.append((USER_CHANGED, 'user', obj.id, {'user_id': obj.id, 'changed': changed}))
+
+def _write_outbox(session, flush_context):
+    pending = session.info.pop('domain_events', None)
+    if not pending:
+        return
+    session.add_all(
+        # Round-trip through the JSON encoder so Decimal and datetime values fit a JSON column
+        OutboxEvent(event_type=event_type, aggregate_type=aggregate_type, aggregate_id=aggregate_id,
+                    payload=json.loads(dumps(payload)))
+        for event_type, aggregate_type, aggregate_id, payload in pending
+    )
+    session.info['outbox_written'] = True
+
+def _notify_bus(session):
+    if not session.info.pop('outbox_written', False) or not has_app_context():
+        return
+    bus = current_app.extensions.get('event_bus')
+    if bus:
+        bus.notify()
+
+def _discard(session, *args):
+    session.info.pop('domain_events', None)
+    session.info.pop('outbox_written', None)
+
+def install_domain_events():
+    """
+    Write ProductChanged, OrderPlaced, OrderStatusChanged, ReviewCreated,
+    CategoryChanged and UserChanged events to the outbox in the transaction
+    that makes the change, and wake the EventBus once it commits
+    """
+    for name, listener in (
+        ('after_flush', _collect_domain_events),
+        ('after_flush_postexec', _write_outbox),
+        ('after_commit', _notify_bus),
+        ('after_rollback', _discard),
+    ):
+        if not event.contains(RoutingSession, name, listener):
+            event.listen(RoutingSession, name, listener)
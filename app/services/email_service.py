@@ -1,8 +1,13 @@
 from flask import current_app
-from flask_mail import Message
-from app import mail
-import sendgrid
-from sendgrid.helpers.mail import Mail
+
+def get_mail():
+    """
+    Return the app's Flask-Mail state, setting Flask-Mail up on first use
+    """
+    if 'mail' not in current_app.extensions:
+        from flask_mail import Mail
+        Mail(current_app._get_current_object())
+    return current_app.extensions['mail']
 
 def send_verification_email(email, username):
     """
@@ -11,6 +16,9 @@ def send_verification_email(email, username):
     try:
         if current_app.config.get('SENDGRID_API_KEY'):
             # Use SendGrid
+            import sendgrid
+            from sendgrid.helpers.mail import Mail
+            
             sg = sendgrid.SendGridAPIClient(api_key=current_app.config['SENDGRID_API_KEY'])
             
             message = Mail(
@@ -39,6 +47,8 @@ def send_verification_email(email, username):
             return response.status_code == 202
         else:
             # Fallback to Flask-Mail
+            from flask_mail import Message
+            
             msg = Message(
                 'Welcome to GemCart - Verify Your Account',
                 sender=current_app.config['MAIL_USERNAME'],
@@ -51,7 +61,7 @@ def send_verification_email(email, username):
                 <p>Thank you for joining GemCart!</p>
             </div>
             '''
-            mail.send(msg)
+            get_mail().send(msg)
             return True
     except Exception as e:
         current_app.logger.error(f'Failed to send email: {str(e)}')
@@ -63,6 +73,9 @@ def send_order_confirmation(email, order):
     """
     try:
         if current_app.config.get('SENDGRID_API_KEY'):
+            import sendgrid
+            from sendgrid.helpers.mail import Mail
+            
             sg = sendgrid.SendGridAPIClient(api_key=current_app.config['SENDGRID_API_KEY'])
             
             message = Mail(
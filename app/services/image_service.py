@@ -1,68 +1,495 @@
+import click
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 from flask import current_app
-import cloudinary
-import cloudinary.uploader
-from PIL import Image
+from flask.cli import with_appcontext
+from sqlalchemy import String, cast, func, union
+from sqlalchemy.exc import IntegrityError
+from app import db, tasks
+from app.models.image_asset import ImageAsset
+from app.models.product import Product, ProductImage
+from app.services.storage_service import get_storage
 import io
+import multiprocessing
+import os
 import base64
+import hashlib
+import tempfile
+import threading
+import time
 
-def upload_image(image_data, folder='products'):
+JPEG_QUALITY = 85
+
+# Largest first: each variant is downscaled from the previous one
+IMAGE_VARIANTS = {
+    'zoom': (1200, 1200),
+    'card': (480, 480),
+    'thumbnail': (200, 200)
+}
+# JPEG first: storages that derive formats at delivery (Cloudinary) upload only it
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': JPEG_QUALITY}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4})
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# PIL is imported inside the functions that decode images, so importing
+# this module (every product route does) stays cheap at worker boot
+
+class ImageTooLargeError(ValueError):
+    pass
+
+class InvalidImageError(ValueError):
+    pass
+
+def inspect_image(path, max_pixels=50_000_000):
     """
-    Upload image to Cloudinary with optimization
+    Read only the image header to confirm the file is a supported image
+    within the pixel limit. Returns (format, (width, height)).
     """
+    from PIL import Image, UnidentifiedImageError
     try:
-        if not current_app.config.get('CLOUDINARY_CLOUD_NAME'):
-            return None, 'Cloudinary not configured'
-        
-        # If image_data is base64, decode it
-        if isinstance(image_data, str) and image_data.startswith('data:image'):
-            # Remove data:image/jpeg;base64, prefix
-            image_data = image_data.split(',')[1]
-            image_data = base64.b64decode(image_data)
-        
-        # Optimize image using PIL
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Resize if too large
-        max_size = (1200, 1200)
-        if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # Convert to RGB if necessary
-        if image.mode in ('RGBA', 'P'):
-            image = image.convert('RGB')
-        
-        # Save optimized image to bytes
-        output = io.BytesIO()
-        image.save(output, format='JPEG', quality=85, optimize=True)
-        output.seek(0)
-        
-        # Upload to Cloudinary
-        result = cloudinary.uploader.upload(
-            output.getvalue(),
-            folder=folder,
-            transformation=[
-                {'width': 800, 'height': 800, 'crop': 'fill', 'quality': 'auto'},
-                {'fetch_format': 'auto'}
-            ]
+        image = Image.open(path)
+    except (UnidentifiedImageError, OSError):
+        raise InvalidImageError('Not a valid image file')
+    with image:
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageTooLargeError(f'Image is {width}x{height}, over the {max_pixels} pixel limit')
+        return image.format, image.size
+
+def render_variants(source, max_pixels=50_000_000):
+    """
+    Render every IMAGE_VARIANTS size in every VARIANT_FORMATS format from a
+    single decode, and fingerprint the smallest one. Returns
+    ({name: {'width', 'height', <format>: bytes}}, perceptual_hash).
+    Runs in a worker process, so it must stay a plain module-level function.
+    """
+    from PIL import Image
+    image = _open_for_size(source, max(IMAGE_VARIANTS.values()), max_pixels)
+
+    rendered = {}
+    for name, size in IMAGE_VARIANTS.items():
+        if image.size[0] > size[0] or image.size[1] > size[1]:
+            image = image.copy()
+            image.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        entry = {'width': image.size[0], 'height': image.size[1]}
+        for fmt, (pil_format, _, options) in VARIANT_FORMATS.items():
+            output = io.BytesIO()
+            image.save(output, format=pil_format, **options)
+            entry[fmt] = output.getvalue()
+        rendered[name] = entry
+    return rendered, perceptual_hash(image)
+
+def perceptual_hash(image):
+    """
+    64-bit difference hash: compares horizontally adjacent pixels of a 9x8
+    grayscale thumbnail. Robust to resizing and recompression, so stock
+    photos re-saved by different sellers land within a few bits.
+    """
+    from PIL import Image
+    pixels = list(image.convert('L').resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+def hash_bands(value):
+    """
+    Split a 64-bit hash into four 16-bit bands, most significant first
+    """
+    return [(value >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+
+def to_signed64(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+def hamming_distance_sql(column, value):
+    """
+    PostgreSQL expression for the Hamming distance between a signed 64-bit
+    hash column and ``value``: the set bits of their XOR
+    """
+    from sqlalchemy.dialects.postgresql import BIT
+    bits = cast(cast(column.op('#')(value), BIT(64)), String)
+    return func.length(func.replace(bits, '0', ''))
+
+def find_near_duplicate(phash, max_distance=3, max_candidates=500):
+    """
+    Return the closest canonical ImageAsset within max_distance bits, or None.
+
+    Multi-index lookup: with four bands, any hash within distance 3 matches
+    at least one band exactly, so candidates come from indexed equality
+    lookups, at most ``max_candidates`` per band. On PostgreSQL the
+    candidates are compared bit by bit in SQL and only the best is loaded;
+    elsewhere their ids and hashes are compared here. Distances above 3,
+    and matches past the cap in a crowded band (near-blank images), may be
+    missed.
+    """
+    bands = [
+        db.select(ImageAsset.id, ImageAsset.phash).filter(
+            column == band,
+            ImageAsset.duplicate_of_id.is_(None)
+        ).limit(max_candidates).subquery()
+        for column, band in zip(
+            (ImageAsset.phash_band0, ImageAsset.phash_band1, ImageAsset.phash_band2, ImageAsset.phash_band3),
+            hash_bands(phash)
         )
-        
-        return result['secure_url'], result['public_id']
-    
-    except Exception as e:
-        current_app.logger.error(f'Image upload failed: {str(e)}')
-        return None, str(e)
+    ]
+    candidates = union(*[db.select(band.c.id, band.c.phash) for band in bands]).subquery()
 
-def delete_image(public_id):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        distance = hamming_distance_sql(candidates.c.phash, to_signed64(phash))
+        best = db.session.scalar(
+            db.select(candidates.c.id).filter(distance <= max_distance).order_by(distance, candidates.c.id).limit(1)
+        )
+    else:
+        best = None
+        best_distance = max_distance + 1
+        for asset_id, candidate in db.session.execute(db.select(candidates.c.id, candidates.c.phash)):
+            distance = hamming_distance(candidate, phash)
+            if distance < best_distance:
+                best, best_distance = asset_id, distance
+    return db.session.get(ImageAsset, best) if best is not None else None
+
+def _save_asset(digest, phash, variants, duplicate_of=None):
     """
-    Delete image from Cloudinary
+    Record an ImageAsset; if a concurrent upload of the same bytes won the
+    race, return that one instead
     """
+    bands = hash_bands(phash)
+    asset = ImageAsset(
+        content_hash=digest,
+        phash=to_signed64(phash),
+        phash_band0=bands[0],
+        phash_band1=bands[1],
+        phash_band2=bands[2],
+        phash_band3=bands[3],
+        variants=variants,
+        duplicate_of=duplicate_of
+    )
     try:
-        if not current_app.config.get('CLOUDINARY_CLOUD_NAME'):
-            return False
-        
-        result = cloudinary.uploader.destroy(public_id)
-        return result.get('result') == 'ok'
-    
-    except Exception as e:
-        current_app.logger.error(f'Image deletion failed: {str(e)}')
-        return False
\ No newline at end of file
+        with db.session.begin_nested():
+            db.session.add(asset)
+    except IntegrityError:
+        asset = ImageAsset.query.filter_by(content_hash=digest).first()
+    db.session.commit()
+    return asset
+
+def _open_for_size(source, max_size, max_pixels):
+    from PIL import Image
+    image = Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageTooLargeError(f'Image is {width}x{height}, over the {max_pixels} pixel limit')
+
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if image.format == 'JPEG' and scale < 1:
+        # The decoder picks the smallest 1/2, 1/4 or 1/8 scale that still
+        # covers the final thumbnail size
+        image.draft('RGB', (int(width * scale) + 1, int(height * scale) + 1))
+
+    # Convert to RGB if necessary
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    return image
+
+def get_pool():
+    """
+    Lazily create the process pool used for image decoding and encoding.
+
+    It is first needed from a request or task thread, so its processes are
+    started by a forkserver rather than forked from this worker: a fork
+    here would copy locks other threads hold, and the worker's database
+    connections.
+    """
+    global _pool
+    workers = current_app.config.get('IMAGE_PROCESS_WORKERS', 0)
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+def shutdown_pool():
+    """
+    Stop the process pool, dropping queued work; called as the worker exits
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def run_in_pool(fn, *args, **kwargs):
+    """
+    Run fn on the image process pool, or inline if no pool is configured
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args, **kwargs)
+    return pool.submit(fn, *args, **kwargs).result(
+        timeout=current_app.config.get('IMAGE_PROCESS_TIMEOUT', 30)
+    )
+
+def content_hash(source):
+    """
+    SHA-256 of raw image bytes or of a file's contents
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    else:
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def store_image_variants(image_data, folder='products'):
+    """
+    Generate and store all image variants, deduplicating uploads.
+
+    Byte-identical uploads are found by content hash without decoding.
+    Otherwise the image is rendered and its perceptual hash looked up;
+    a near-duplicate of an existing asset reuses that asset's stored
+    variants instead of storing new ones.
+    Returns (variants, content_hash) where content_hash is that of the
+    canonical asset and variants is
+    {name: {'width', 'height', 'jpeg': url, 'webp': url}}.
+    """
+    source = decode_data_uri(image_data)
+    digest = content_hash(source)
+
+    asset = ImageAsset.query.filter_by(content_hash=digest).first()
+    if asset:
+        return asset.variants, asset.canonical.content_hash
+
+    rendered, phash = run_in_pool(
+        render_variants,
+        source,
+        max_pixels=current_app.config.get('IMAGE_MAX_PIXELS', 50_000_000)
+    )
+
+    match = find_near_duplicate(
+        phash,
+        current_app.config.get('IMAGE_DUPLICATE_MAX_DISTANCE', 3),
+        current_app.config.get('IMAGE_DUPLICATE_MAX_CANDIDATES', 500)
+    )
+    if match:
+        _save_asset(digest, phash, match.variants, duplicate_of=match)
+        return match.variants, match.content_hash
+
+    storage = get_storage()
+    prefix = variant_prefix(digest, folder)
+    variants = {}
+    for name, entry in rendered.items():
+        variant = {'width': entry['width'], 'height': entry['height']}
+        urls = storage.save_formats(
+            f'{prefix}/{name}',
+            {extension: entry[fmt] for fmt, (_, extension, _) in VARIANT_FORMATS.items()}
+        )
+        for fmt, (_, extension, _) in VARIANT_FORMATS.items():
+            variant[fmt] = urls[extension]
+        variants[name] = variant
+
+    asset = _save_asset(digest, phash, variants)
+    return asset.variants, asset.canonical.content_hash
+
+def decode_data_uri(image_data):
+    """
+    Decode a base64 data URI (data:image/jpeg;base64,...) to bytes
+    """
+    if isinstance(image_data, str) and image_data.startswith('data:image'):
+        return base64.b64decode(image_data.partition(',')[2])
+    return image_data
+
+def variant_prefix(digest, folder='products'):
+    return f'{folder}/{digest[:2]}/{digest}'
+
+def variant_keys(digest, folder='products'):
+    """
+    Every storage key written by store_image_variants for a content hash
+    """
+    prefix = variant_prefix(digest, folder)
+    return [
+        f'{prefix}/{name}.{extension}'
+        for name in IMAGE_VARIANTS
+        for _, extension, _ in VARIANT_FORMATS.values()
+    ]
+
+def queue_product_image(product_id, image_data, folder='products'):
+    """
+    Spool an upload to disk and process it in the background.
+
+    The caller should set ``product.image_status = 'pending'`` and commit
+    first; the task updates the row once every variant is stored.
+    """
+    fd, path = tempfile.mkstemp(prefix='gemcart-upload-', dir=current_app.config.get('UPLOAD_TMP_DIR'))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(decode_data_uri(image_data))
+
+    tasks.enqueue(process_product_image, product_id, path, folder, on_failure=_product_image_failed)
+
+def queue_gallery_image(image_id, path, folder='products'):
+    """
+    Process an already spooled upload for a ProductImage row in the background.
+    The task owns ``path`` and removes it when done.
+    """
+    tasks.enqueue(process_gallery_image, image_id, path, folder, on_failure=_gallery_image_failed)
+
+def process_product_image(product_id, path, folder='products'):
+    """
+    Background task: store variants for a spooled upload and point the product at them
+    """
+    variants, digest = store_image_variants(path, folder)
+
+    product = db.session.get(Product, product_id)
+    if product is None:
+        os.unlink(path)
+        return
+
+    previous_hash = product.image_hash
+    product.image_hash = digest
+    product.image_variants = variants
+    product.image_url = variants['zoom']['jpeg']
+    product.image_status = 'ready'
+    db.session.commit()
+    os.unlink(path)
+
+    if previous_hash and previous_hash != digest:
+        queue_image_deletion([previous_hash], folder)
+
+def process_gallery_image(image_id, path, folder='products'):
+    """
+    Background task: store variants for a gallery image and refresh the
+    product's primary image
+    """
+    variants, digest = store_image_variants(path, folder)
+
+    image = db.session.get(ProductImage, image_id)
+    if image is None:
+        os.unlink(path)
+        return
+
+    image.image_hash = digest
+    image.image_variants = variants
+    image.image_url = variants['zoom']['jpeg']
+    image.status = 'ready'
+    sync_primary_image(image.product)
+    db.session.commit()
+    os.unlink(path)
+
+def sync_primary_image(product):
+    """
+    Point the product's image fields at its first ready gallery image
+    """
+    primary = next((image for image in product.images if image.status == 'ready'), None)
+    if primary is None:
+        return
+    product.image_hash = primary.image_hash
+    product.image_variants = primary.image_variants
+    product.image_url = primary.image_url
+    product.image_status = 'ready'
+
+def _gallery_image_failed(error, image_id, path, folder='products'):
+    image = db.session.get(ProductImage, image_id)
+    if image is not None:
+        image.status = 'failed'
+        db.session.commit()
+    if os.path.exists(path):
+        os.unlink(path)
+
+def _product_image_failed(error, product_id, path, folder='products'):
+    product = db.session.get(Product, product_id)
+    if product is not None:
+        product.image_status = 'failed'
+        db.session.commit()
+    if os.path.exists(path):
+        os.unlink(path)
+
+def queue_image_deletion(hashes, folder='products'):
+    """
+    Delete the stored variants for the given content hashes in the background
+    """
+    hashes = [digest for digest in set(hashes) if digest]
+    if hashes:
+        tasks.enqueue(delete_unused_images, hashes, folder)
+
+def delete_unused_images(hashes, folder='products'):
+    """
+    Background task: batch-delete variants no active product still references
+    """
+    in_use = {
+        row.image_hash for row in db.session.query(Product.image_hash).filter(
+            Product.image_hash.in_(hashes),
+            Product.is_active == True
+        ).union(
+            db.session.query(ProductImage.image_hash).join(Product).filter(
+                ProductImage.image_hash.in_(hashes),
+                Product.is_active == True
+            )
+        )
+    }
+    unused = [digest for digest in hashes if digest not in in_use]
+    if not unused:
+        return
+
+    get_storage().delete_many([key for digest in unused for key in variant_keys(digest, folder)])
+
+    # Drop the assets and every near-duplicate alias pointing at them
+    asset_ids = [row.id for row in db.session.query(ImageAsset.id).filter(ImageAsset.content_hash.in_(unused))]
+    if asset_ids:
+        ImageAsset.query.filter(ImageAsset.duplicate_of_id.in_(asset_ids)).delete(synchronize_session=False)
+        ImageAsset.query.filter(ImageAsset.id.in_(asset_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+def sweep_stale_uploads(max_age):
+    """
+    Fail uploads still pending after ``max_age`` seconds and remove spooled
+    temp files that old. Background tasks live in worker memory, so a worker
+    killed before its queue drained leaves both behind.
+    Returns (products, images, files) swept.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    products = Product.query.filter(Product.image_status == 'pending', Product.updated_at < cutoff).all()
+    for product in products:
+        product.image_status = 'failed'
+    images = ProductImage.query.filter(ProductImage.status == 'pending', ProductImage.created_at < cutoff).all()
+    for image in images:
+        image.status = 'failed'
+    db.session.commit()
+
+    directory = current_app.config.get('UPLOAD_TMP_DIR') or tempfile.gettempdir()
+    oldest = time.time() - max_age
+    files = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith('gemcart-upload-') or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < oldest:
+                    os.unlink(entry.path)
+                    files += 1
+            except FileNotFoundError:
+                pass
+    return len(products), len(images), files
+
+@click.group('images')
+def images_cli():
+    """Maintain product image uploads."""
+
+@images_cli.command('sweep')
+@click.option('--max-age', type=int, default=None, help='Seconds; defaults to IMAGE_PENDING_TIMEOUT.')
+@with_appcontext
+def sweep_command(max_age):
+    """Fail stale pending uploads and delete their temp files."""
+    products, images, files = sweep_stale_uploads(max_age or current_app.config['IMAGE_PENDING_TIMEOUT'])
+    click.echo(f'Failed {products} product and {images} gallery uploads, removed {files} temp files')
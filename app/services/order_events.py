@@ -0,0 +1,38 @@
+from flask import current_app
+from app.utils.json_encoding import dumps
+from app.utils.outbox import ORDER_PLACED, ORDER_STATUS_CHANGED
+
+ADMIN_CHANNEL = 'orders:all'
+
+# Outbox event type -> SSE event name
+STREAM_EVENTS = {
+    ORDER_PLACED: 'order.created',
+    ORDER_STATUS_CHANGED: 'order.status',
+}
+
+# Payload fields sent to streams
+STREAM_FIELDS = (
+    'order_id', 'order_number', 'status', 'previous_status',
+    'tracking_number', 'shipped_at', 'delivered_at', 'updated_at'
+)
+
+def user_channel(user_id):
+    return f'orders:user:{user_id}'
+
+def publish_order_streams(events):
+    """
+    EventBus consumer: push order events to the customer's stream and the admin stream
+    """
+    pubsub = current_app.extensions['pubsub']
+    for event in events:
+        name = STREAM_EVENTS[event.event_type]
+        data = dumps({field: event.payload.get(field) for field in STREAM_FIELDS}).decode()
+        pubsub.publish(user_channel(event.payload['customer_id']), name, data)
+        pubsub.publish(ADMIN_CHANNEL, name, data)
+
+def install_order_events(bus):
+    """
+    Feed the order status streams from committed OrderPlaced and
+    OrderStatusChanged events
+    """
+    bus.subscribe('order-streams', STREAM_EVENTS, publish_order_streams)
@@ -0,0 +1,57 @@
+from sqlalchemy import inspect
+from app import db
+from app.models.change_sequence import ChangeSequence
+from app.models.product import Product, ProductImage
+from app.models.review import Review
+from app.utils.outbox import PRODUCT_CHANGED
+
+SEQUENCE = 'products'
+
+def changed_products(session):
+    """
+    Products whose feed representation changes in this flush: the product
+    row or its categories, its images, or its reviews (rating aggregates)
+    """
+    products = {}
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            if obj in session.new or session.is_modified(obj):
+                products[id(obj)] = obj
+        elif isinstance(obj, ProductImage):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            product = obj.__dict__.get('product') or (obj.product_id and session.get(Product, obj.product_id))
+            if product is not None:
+                products[id(product)] = product
+        elif isinstance(obj, Review):
+            if obj in session.dirty and not inspect(obj).attrs.rating.history.has_changes():
+                continue
+            product = obj.product_id and session.get(Product, obj.product_id)
+            if product is not None:
+                products[id(product)] = product
+    return products.values()
+
+def stamp_change_seq(events):
+    """
+    EventBus consumer: move the changed products to the next change
+    sequence value. One value per batch; the feed breaks ties by id.
+    """
+    product_ids = sorted({event.payload['product_id'] for event in events})
+    connection = db.session.connection()
+    seq = ChangeSequence.allocate(connection, SEQUENCE)
+    table = Product.__table__
+    connection.execute(
+        table.update().where(table.c.id.in_(product_ids))
+        # Not a product edit: keep updated_at as the write left it
+        .values(change_seq=seq, updated_at=table.c.updated_at)
+    )
+
+def install_product_change_tracking(bus):
+    """
+    Stamp products with a change sequence value, which the
+    /api/products/changes feed pages through, once their writes commit.
+    The stamp runs in the outbox consumer's own short transaction, so the
+    counter's row lock is never held by checkout or any other request
+    write; stamps still commit in sequence order.
+    """
+    bus.subscribe('product-changes', [PRODUCT_CHANGED], stamp_change_seq)
@@ -0,0 +1,151 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import lazyload, selectinload
+from app import db
+from app.models.product import Product, product_categories
+from app.models.product_listing import ProductListing
+from app.models.review import Review
+from app.models.user import User
+from app.utils.outbox import PRODUCT_CHANGED, CATEGORY_CHANGED, USER_CHANGED
+
+# Products recomputed per statement
+CHUNK_SIZE = 500
+
+def listing_row(product, rating):
+    total, count = rating
+    return {
+        'id': product.id,
+        'title': product.title,
+        'sku': product.sku,
+        'price': product.price,
+        'inventory_count': product.inventory_count,
+        'material': product.material,
+        'gemstone': product.gemstone,
+        'is_featured': product.is_featured,
+        'image_url': product.image_url,
+        'image_variants': product.image_variants,
+        'category_slugs': '|' + ''.join(f'{category.slug}|' for category in product.categories),
+        'seller_id': product.seller_id,
+        'seller_name': product.seller.username if product.seller else None,
+        'rating_total': total,
+        'review_count': count,
+        'search_text': '\n'.join(filter(None, (product.title, product.description))),
+        'created_at': product.created_at,
+        'updated_at': product.updated_at
+    }
+
+def refresh_listings(product_ids):
+    """
+    Recompute the listing rows of ``product_ids`` from the source tables:
+    active products get a fresh row, inactive or missing ones lose theirs.
+    Idempotent, so duplicate and out-of-order events are harmless. Runs in
+    the caller's transaction; returns the number of rows written.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+
+    products = Product.query.options(
+        selectinload(Product.categories), selectinload(Product.seller), lazyload(Product.images)
+    ).filter(Product.id.in_(product_ids), Product.is_active == True).all()
+    rows = db.session.query(Review.product_id, db.func.sum(Review.rating), db.func.count(Review.id)).filter(
+        Review.product_id.in_(product_ids)
+    ).group_by(Review.product_id).all()
+    ratings = {product_id: (total, count) for product_id, total, count in rows}
+
+    table = ProductListing.__table__
+    db.session.execute(table.delete().where(table.c.id.in_(product_ids)))
+    if products:
+        db.session.execute(table.insert(), [listing_row(product, ratings.get(product.id, (0, 0))) for product in products])
+    return len(products)
+
+def rebuild_listings():
+    """
+    Replace the whole listing from the source tables, in one transaction
+    """
+    db.session.execute(ProductListing.__table__.delete())
+    written, last_id = 0, 0
+    while True:
+        ids = db.session.scalars(
+            db.select(Product.id).filter(Product.is_active == True, Product.id > last_id)
+            .order_by(Product.id).limit(CHUNK_SIZE)
+        ).all()
+        if not ids:
+            break
+        written += refresh_listings(ids)
+        last_id = ids[-1]
+        # Only core statements are pending; keep the identity map small
+        db.session.expunge_all()
+    db.session.commit()
+    return written
+
+def backfill_listings():
+    """
+    Build the listing if it is empty while active products exist, as on a
+    database that predates it. Returns the rows written, or None if the
+    listing was already filled or there is nothing to list.
+    """
+    if db.session.scalar(db.select(ProductListing.id).limit(1)) is not None:
+        return None
+    if db.session.scalar(db.select(Product.id).filter(Product.is_active == True).limit(1)) is None:
+        return None
+    return rebuild_listings()
+
+def rename_sellers(user_ids):
+    """
+    Copy the current username of ``user_ids`` into their listing rows
+    """
+    table = ProductListing.__table__
+    db.session.execute(table.update().where(table.c.seller_id.in_(user_ids)).values(
+        seller_name=db.select(User.username).where(User.id == table.c.seller_id).scalar_subquery()
+    ))
+
+def project_product_listing(events):
+    """
+    EventBus consumer: refresh the listing rows the events touch. Category
+    slug changes refresh every product in the category; a username change
+    renames the seller on all of theirs.
+    """
+    seller_ids = {
+        event.payload['user_id'] for event in events
+        if event.event_type == USER_CHANGED and 'username' in event.payload['changed']
+    }
+    if seller_ids:
+        rename_sellers(seller_ids)
+
+    product_ids = {event.payload['product_id'] for event in events if event.event_type == PRODUCT_CHANGED}
+    category_ids = {
+        event.payload['category_id'] for event in events
+        if event.event_type == CATEGORY_CHANGED and 'slug' in event.payload['changed']
+    }
+    if category_ids:
+        product_ids.update(db.session.scalars(
+            db.select(product_categories.c.product_id).where(product_categories.c.category_id.in_(category_ids))
+        ))
+    product_ids = sorted(product_ids)
+    for start in range(0, len(product_ids), CHUNK_SIZE):
+        refresh_listings(product_ids[start:start + CHUNK_SIZE])
+
+def install_product_listing(bus):
+    """
+    Keep product_listing in step with committed product, category, review
+    and seller writes
+    """
+    bus.subscribe('product-listing', [PRODUCT_CHANGED, CATEGORY_CHANGED, USER_CHANGED], project_product_listing)
+
+@click.group('listing')
+def listing_cli():
+    """Maintain the product_listing read model."""
+
+@listing_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute every product_listing row from the product tables."""
+    click.echo(f'Wrote {rebuild_listings()} listing rows')
+
+@listing_cli.command('backfill')
+@with_appcontext
+def backfill_command():
+    """Build product_listing only if it is empty (run after upgrading)."""
+    written = backfill_listings()
+    click.echo('Listing already filled' if written is None else f'Wrote {written} listing rows')
@@ -0,0 +1,133 @@
+import os
+import tempfile
+from flask import current_app
+
+class LocalStorage:
+    """
+    Stores files under a local directory and serves them from ``base_url``
+    """
+
+    def __init__(self, root, base_url='/media'):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f'Invalid storage key: {key}')
+        return path
+
+    def url(self, key):
+        return f'{self.base_url}/{key}'
+
+    def save(self, key, data):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return self.url(key)
+
+    def save_formats(self, stem, files):
+        """
+        Save one image in several formats, ``files`` being {extension: data},
+        as ``stem.<extension>`` each. Returns {extension: url}.
+        """
+        return {extension: self.save(f'{stem}.{extension}', data) for extension, data in files.items()}
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete_many(self, keys):
+        return sum(1 for key in keys if self.delete(key))
+
+class CloudinaryStorage:
+    """
+    Stores files on Cloudinary, using the key (minus extension) as public ID,
+    so the formats of one image share a single upload.
+    The SDK is imported and configured on first use, not at app startup.
+    """
+
+    # Cloudinary's Admin API deletes at most 100 public IDs per call
+    DELETE_BATCH_SIZE = 100
+
+    def __init__(self, cloud_name=None, api_key=None, api_secret=None):
+        import cloudinary
+        if cloud_name:
+            cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret)
+
+    @staticmethod
+    def public_id(key):
+        return os.path.splitext(key)[0]
+
+    def url(self, key):
+        import cloudinary
+        public_id, extension = os.path.splitext(key)
+        return cloudinary.CloudinaryImage(public_id).build_url(format=extension.lstrip('.'), secure=True)
+
+    def save(self, key, data):
+        import cloudinary.uploader
+        public_id, extension = os.path.splitext(key)
+        result = cloudinary.uploader.upload(
+            data,
+            public_id=public_id,
+            format=extension.lstrip('.') or None,
+            overwrite=True,
+            resource_type='image'
+        )
+        return result['secure_url']
+
+    def save_formats(self, stem, files):
+        """
+        Upload the first of ``files`` ({extension: data}) once, as public ID
+        ``stem``; Cloudinary derives the other formats at delivery. Returns
+        {extension: url}.
+        """
+        extension, data = next(iter(files.items()))
+        self.save(f'{stem}.{extension}', data)
+        return {extension: self.url(f'{stem}.{extension}') for extension in files}
+
+    def delete_many(self, keys):
+        import cloudinary.api
+        # Variant keys list every format of a public ID
+        public_ids = list(dict.fromkeys(self.public_id(key) for key in keys))
+        deleted = 0
+        for start in range(0, len(public_ids), self.DELETE_BATCH_SIZE):
+            result = cloudinary.api.delete_resources(public_ids[start:start + self.DELETE_BATCH_SIZE])
+            deleted += sum(1 for status in result.get('deleted', {}).values() if status == 'deleted')
+        return deleted
+
+STORAGE_BACKENDS = {
+    'local': lambda config: LocalStorage(config['IMAGE_STORAGE_ROOT'], config.get('IMAGE_STORAGE_URL', '/media')),
+    'cloudinary': lambda config: CloudinaryStorage(
+        config.get('CLOUDINARY_CLOUD_NAME'), config.get('CLOUDINARY_API_KEY'), config.get('CLOUDINARY_API_SECRET')
+    )
+}
+
+def get_storage():
+    """
+    Return the app's image storage backend, creating it on first use
+    """
+    storage = current_app.extensions.get('image_storage')
+    if storage is None:
+        backend = current_app.config.get('IMAGE_STORAGE_BACKEND') or (
+            'cloudinary' if current_app.config.get('CLOUDINARY_CLOUD_NAME') else 'local'
+        )
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f'Unknown IMAGE_STORAGE_BACKEND: {backend}')
+        storage = STORAGE_BACKENDS[backend](current_app.config)
+        current_app.extensions['image_storage'] = storage
+    return storage
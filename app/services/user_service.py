@@ -0,0 +1,153 @@
+from marshmallow import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app import cache, db
+from app.models.user import User
+from app.services.cache_invalidation import user_tag
+
+USERNAME_TAKEN = 'Username already exists'
+EMAIL_TAKEN = 'Email already registered'
+
+def user_access(user_id):
+    """
+    The user's role and active flag; None if there is no such user. Cached
+    for CACHE_LOCAL_TTL seconds at most, in every tier: invalidation goes
+    through the outbox and can lag, and a demoted or deactivated user must
+    lose access within that bound regardless.
+    """
+    def load():
+        user = db.session.get(User, user_id)
+        return {'role': user.role, 'is_active': user.is_active} if user else None
+    return cache.get_or_set(f'user-access:{user_id}', load, ttl=cache.local_ttl, tags=[user_tag(user_id)])
+
+def find_conflicts(usernames, emails):
+    """
+    Return the subsets of usernames and emails that are already taken,
+    using a single query for both columns
+    """
+    usernames = set(usernames)
+    emails = set(emails)
+    if not usernames and not emails:
+        return set(), set()
+
+    rows = db.session.query(User.username, User.email).filter(
+        or_(User.username.in_(usernames), User.email.in_(emails))
+    ).all()
+
+    taken_usernames = {row.username for row in rows if row.username in usernames}
+    taken_emails = {row.email for row in rows if row.email in emails}
+    return taken_usernames, taken_emails
+
+def conflict_errors(data, taken_usernames, taken_emails):
+    """
+    Map taken usernames/emails to marshmallow-style field errors
+    """
+    errors = {}
+    if data['username'] in taken_usernames:
+        errors['username'] = [USERNAME_TAKEN]
+    if data['email'] in taken_emails:
+        errors['email'] = [EMAIL_TAKEN]
+    return errors
+
+def build_user(data):
+    """
+    Build an unsaved User from validated registration data
+    """
+    user = User(
+        username=data['username'],
+        email=data['email'],
+        first_name=data.get('first_name'),
+        last_name=data.get('last_name'),
+        phone=data.get('phone'),
+        role=data.get('role', 'customer')
+    )
+    user.set_password(data['password'])
+    return user
+
+def register_user(data):
+    """
+    Create a user from validated registration data.
+
+    The pre-check gives friendly errors in the common case, but the unique
+    constraints are authoritative: a concurrent sign-up that slips past it
+    surfaces as an IntegrityError, which is mapped back to field errors.
+    Raises ValidationError on conflicts.
+    """
+    errors = conflict_errors(data, *find_conflicts([data['username']], [data['email']]))
+    if errors:
+        raise ValidationError(errors)
+
+    user = build_user(data)
+    db.session.add(user)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        errors = conflict_errors(data, *find_conflicts([data['username']], [data['email']]))
+        raise ValidationError(errors or {'_schema': ['User could not be created']})
+
+    return user
+
+def register_users(rows, batch_size=500):
+    """
+    Bulk-create users from an iterable of validated registration dicts.
+
+    Each batch is checked with one conflict query and inserted in one
+    transaction. If a batch still hits a unique constraint (a concurrent
+    writer), it is retried row by row in savepoints so only the offending
+    rows are rejected. Returns (created_count, errors) where errors maps
+    the row's position in ``rows`` to its field errors.
+    """
+    created = 0
+    errors = {}
+    batch = []
+
+    for index, data in enumerate(rows):
+        batch.append((index, data))
+        if len(batch) >= batch_size:
+            created += _insert_batch(batch, errors)
+            batch = []
+
+    if batch:
+        created += _insert_batch(batch, errors)
+
+    return created, errors
+
+def _insert_batch(batch, errors):
+    taken_usernames, taken_emails = find_conflicts(
+        [data['username'] for _, data in batch],
+        [data['email'] for _, data in batch]
+    )
+
+    # Rows later in the batch also conflict with earlier ones
+    users = []
+    for index, data in batch:
+        row_errors = conflict_errors(data, taken_usernames, taken_emails)
+        if row_errors:
+            errors[index] = row_errors
+            continue
+        taken_usernames.add(data['username'])
+        taken_emails.add(data['email'])
+        users.append((index, data, build_user(data)))
+
+    if not users:
+        return 0
+
+    db.session.add_all([user for _, _, user in users])
+    try:
+        db.session.commit()
+        return len(users)
+    except IntegrityError:
+        db.session.rollback()
+
+    created = 0
+    for index, data, user in users:
+        try:
+            with db.session.begin_nested():
+                db.session.add(user)
+            created += 1
+        except IntegrityError:
+            row_errors = conflict_errors(data, *find_conflicts([data['username']], [data['email']]))
+            errors[index] = row_errors or {'_schema': ['User could not be created']}
+    db.session.commit()
+    return created
@@ -0,0 +1,646 @@
+import math
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+class LocalTier:
+    """
+    Per-worker LRU of serialized values, bounded by entry count and bytes
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (data, expires_at, tags)
+        self._tags = {}  # tag -> keys
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, data, expires_at, tags=()):
+        if len(data) > self.max_bytes // 16:
+            return  # a few huge values would flush everything else
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (data, expires_at, tuple(tags))
+            self._bytes += len(data)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry[0])
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self._bytes, 'evictions': self._evictions}
+
+class SQLiteStore:
+    """
+    Shared tier for the workers of one host: a SQLite file, meant for a
+    tmpfs such as /dev/shm, read through mmap. WAL lets every worker read
+    while one writes. When the stored values pass ``max_bytes`` the oldest
+    writes are evicted first.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        stored_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_entries_expires_at ON entries (expires_at);
+    CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at);
+    CREATE TABLE IF NOT EXISTS tags (
+        tag TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (tag, key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS ix_tags_key ON tags (key);
+    CREATE TABLE IF NOT EXISTS locks (
+        key TEXT PRIMARY KEY,
+        token TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, evict_every=100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._writes = 0
+        self._local = threading.local()
+        self._connection()
+
+    def _connection(self):
+        # One connection per thread, and never one inherited across fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')  # a cache survives losing its last writes
+            connection.execute(f'PRAGMA mmap_size={self.max_bytes * 2}')
+            connection.executescript(self.SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key, now):
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get_many(self, keys, now):
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value, expires_at FROM entries WHERE key IN ({placeholders}) AND expires_at > ?', (*keys, now)
+        ).fetchall()
+        return {key: (value, expires_at) for key, value, expires_at in rows}
+
+    def set(self, key, data, expires_at, tags=()):
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)',
+                (key, data, len(data), expires_at, time.time())
+            )
+            connection.execute('DELETE FROM tags WHERE key = ?', (key,))
+            connection.executemany('INSERT OR IGNORE INTO tags (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def delete(self, keys):
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in keys])
+            connection.executemany('DELETE FROM tags WHERE key = ?', [(key,) for key in keys])
+
+    def invalidate_tags(self, tags):
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            for tag in tags:
+                connection.execute('DELETE FROM entries WHERE key IN (SELECT key FROM tags WHERE tag = ?)', (tag,))
+                connection.execute('DELETE FROM tags WHERE tag = ?', (tag,))
+
+    def acquire_lock(self, key, ttl):
+        """
+        Token if this caller now holds ``key``'s recompute lock, else False
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM locks WHERE key = ? AND expires_at <= ?', (key, now))
+            inserted = connection.execute(
+                'INSERT OR IGNORE INTO locks (key, token, expires_at) VALUES (?, ?, ?)', (key, token, now + ttl)
+            ).rowcount
+        return token if inserted else False
+
+    def release_lock(self, key, token):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM locks WHERE key = ? AND token = ?', (key, token))
+
+    def evict(self):
+        """
+        Drop expired entries, then the oldest writes until under max_bytes
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM entries WHERE expires_at <= ?', (time.time(),))
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total > self.max_bytes:
+                # Oldest writes first, down to 90% so this doesn't run on every write
+                excess = total - int(self.max_bytes * 0.9)
+                cutoff = connection.execute(
+                    'SELECT stored_at FROM (SELECT stored_at, SUM(size) OVER (ORDER BY stored_at) AS running '
+                    'FROM entries) WHERE running >= ? ORDER BY stored_at LIMIT 1', (excess,)
+                ).fetchone()
+                if cutoff:
+                    connection.execute('DELETE FROM entries WHERE stored_at <= ?', cutoff)
+            connection.execute('DELETE FROM tags WHERE key NOT IN (SELECT key FROM entries)')
+            connection.execute('DELETE FROM locks WHERE expires_at <= ?', (time.time(),))
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM entries')
+            connection.execute('DELETE FROM tags')
+
+    def stats(self):
+        entries, size = self._connection().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'backend': 'sqlite', 'entries': entries, 'bytes': size}
+
+class RedisStore:
+    """
+    Shared tier through any Redis-protocol server. Every key carries a TTL;
+    size is bounded by the server's maxmemory policy (use allkeys-lru).
+    Tags are sets of keys, expiring with the longest-lived member.
+    """
+
+    SET_SCRIPT = """
+    local ttl = tonumber(ARGV[2])
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ttl)
+    for i = 2, #KEYS do
+        redis.call('SADD', KEYS[i], KEYS[1])
+        if redis.call('PTTL', KEYS[i]) < ttl then
+            redis.call('PEXPIRE', KEYS[i], ttl)
+        end
+    end
+    """
+
+    INVALIDATE_SCRIPT = """
+    for i = 1, #KEYS do
+        local keys = redis.call('SMEMBERS', KEYS[i])
+        for j = 1, #keys, 500 do
+            redis.call('DEL', unpack(keys, j, math.min(j + 499, #keys)))
+        end
+        redis.call('DEL', KEYS[i])
+    end
+    """
+
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+    end
+    """
+
+    def __init__(self, url, prefix='cache:'):
+        import redis
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._set = self._client.register_script(self.SET_SCRIPT)
+        self._invalidate = self._client.register_script(self.INVALIDATE_SCRIPT)
+        self._release = self._client.register_script(self.RELEASE_SCRIPT)
+
+    def _tag_key(self, tag):
+        return f'{self.prefix}tag:{tag}'
+
+    def get(self, key, now):
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.get(self.prefix + key)
+        pipeline.pttl(self.prefix + key)
+        data, ttl = pipeline.execute()
+        if data is None or ttl < 0:
+            return None
+        return data, now + ttl / 1000
+
+    def get_many(self, keys, now):
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.get(self.prefix + key)
+            pipeline.pttl(self.prefix + key)
+        replies = pipeline.execute()
+        return {
+            key: (data, now + ttl / 1000)
+            for key, data, ttl in zip(keys, replies[::2], replies[1::2])
+            if data is not None and ttl >= 0
+        }
+
+    def set(self, key, data, expires_at, tags=()):
+        ttl = max(1, int((expires_at - time.time()) * 1000))
+        self._set(keys=[self.prefix + key] + [self._tag_key(tag) for tag in tags], args=[data, ttl])
+
+    def delete(self, keys):
+        self._client.delete(*[self.prefix + key for key in keys])
+
+    def invalidate_tags(self, tags):
+        self._invalidate(keys=[self._tag_key(tag) for tag in tags])
+
+    def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        acquired = self._client.set(f'{self.prefix}lock:{key}', token, nx=True, px=max(1, int(ttl * 1000)))
+        return token if acquired else False
+
+    def release_lock(self, key, token):
+        self._release(keys=[f'{self.prefix}lock:{key}'], args=[token])
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+    def stats(self):
+        return {'backend': 'redis'}
+
+class Flight:
+    """
+    One in-progress load that other threads of the worker wait on
+    """
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+_MISSING = object()
+
+class Cache:
+    """
+    Two-tier cache for serialized responses and lookups. Each worker keeps
+    an LRU in front of an optional tier shared by every worker
+    (CACHE_URL):
+
+    - local:// — the per-worker LRU alone
+    - sqlite:////dev/shm/gemcart-cache.db — a file shared by the workers of one host
+    - redis://host:6379/1 — a Redis-protocol server shared across hosts
+    - null:// — caching off
+
+    Values are pickled once on set. Entries expire after their TTL and can
+    be dropped by tag. Invalidation reaches this worker's LRU and the shared
+    tier at once, but not other workers' LRUs, so every LRU copy expires
+    after CACHE_LOCAL_TTL seconds, which bounds how stale it can be. With
+    local:// that makes CACHE_LOCAL_TTL the effective TTL. A failing shared
+    tier counts as a miss, never as a request error.
+
+    With read replicas, the first fill after an invalidation may read a
+    replica still behind the write that caused it. Invalidated tags are
+    remembered, in the shared tier too, for CACHE_INVALIDATED_FILL_TTL
+    seconds, and values stored under them meanwhile only live that long.
+
+    get_or_set() guards against stampedes: concurrent misses on a key run
+    the loader once (see its docstring), and hot entries are refreshed
+    shortly before they expire rather than by every request after.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.local = None
+        self.shared = None
+        self.default_ttl = 300
+        self.local_ttl = 5
+        self.lock_timeout = 5
+        self.early_refresh_beta = 1.0
+        self.prefix = ''
+        self.invalidated_fill_ttl = 0
+        self._invalidated = {}  # prefixed tag -> until when its fills are cached briefly
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._stats = {
+            'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0, 'errors': 0,
+            'loads': 0, 'coalesced': 0, 'lock_waits': 0, 'early_refreshes': 0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        self.local_ttl = app.config.get('CACHE_LOCAL_TTL', 5)
+        self.lock_timeout = app.config.get('CACHE_LOCK_TIMEOUT', 5)
+        self.early_refresh_beta = app.config.get('CACHE_EARLY_REFRESH_BETA', 1.0)
+        self.prefix = app.config.get('CACHE_KEY_PREFIX', '')
+        # Only replica reads can lag behind an invalidation
+        self.invalidated_fill_ttl = (app.config.get('CACHE_INVALIDATED_FILL_TTL', 5)
+                                     if app.config.get('SQLALCHEMY_REPLICA_URIS') else 0)
+        self._invalidated = {}
+        self.local = LocalTier(app.config.get('CACHE_LOCAL_MAX_ENTRIES', 10000),
+                               app.config.get('CACHE_LOCAL_MAX_BYTES', 64 * 1024 * 1024))
+
+        url = app.config.get('CACHE_URL') or 'local://'
+        self.enabled = not url.startswith('null://')
+        if url.startswith(('local://', 'null://')):
+            self.shared = None
+        elif url.startswith('sqlite:///'):
+            self.shared = SQLiteStore(url[len('sqlite:///'):], app.config.get('CACHE_SHARED_MAX_BYTES', 256 * 1024 * 1024))
+        elif url.startswith(('redis://', 'rediss://', 'unix://')):
+            self.shared = RedisStore(url)
+        else:
+            raise ValueError(f'Unsupported CACHE_URL: {url}')
+        app.extensions['cache'] = self
+
+    def _shared(self, operation, *args):
+        try:
+            return getattr(self.shared, operation)(*args)
+        except Exception as e:
+            self._stats['errors'] += 1
+            self.app.logger.warning(f'Shared cache {operation} failed: {str(e)}')
+            return None
+
+    def _lookup(self, key):
+        """
+        (value, load_seconds, expires_at) for a prefixed key, or None
+        """
+        now = time.time()
+        entry = self.local.get(key, now)
+        if entry is not None:
+            self._stats['local_hits'] += 1
+            return pickle.loads(entry[0])
+        if self.shared is not None:
+            entry = self._shared('get', key, now)
+            if entry is not None:
+                self._stats['shared_hits'] += 1
+                data, expires_at = entry
+                self.local.set(key, data, min(expires_at, now + self.local_ttl))
+                return pickle.loads(data)
+        self._stats['misses'] += 1
+        return None
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        entry = self._lookup(self.prefix + key)
+        return default if entry is None else entry[0]
+
+    def get_many(self, keys):
+        """
+        {key: value} for those of ``keys`` that are cached: the LRU first,
+        then the shared tier for the rest in one round trip
+        """
+        if not self.enabled or not keys:
+            return {}
+        now = time.time()
+        found = {}
+        remaining = []
+        for key in keys:
+            entry = self.local.get(self.prefix + key, now)
+            if entry is None:
+                remaining.append(key)
+            else:
+                found[key] = pickle.loads(entry[0])[0]
+        self._stats['local_hits'] += len(found)
+
+        if remaining and self.shared is not None:
+            entries = self._shared('get_many', [self.prefix + key for key in remaining], now) or {}
+            for key in remaining:
+                entry = entries.get(self.prefix + key)
+                if entry is not None:
+                    data, expires_at = entry
+                    self.local.set(self.prefix + key, data, min(expires_at, now + self.local_ttl))
+                    found[key] = pickle.loads(data)[0]
+                    self._stats['shared_hits'] += 1
+        self._stats['misses'] += len(keys) - len(found)
+        return found
+
+    def set(self, key, value, ttl=None, tags=(), load_seconds=0):
+        """
+        Store ``value`` for ``ttl`` seconds (CACHE_DEFAULT_TTL by default).
+        ``tags`` name what it depends on, for invalidate_tags().
+        """
+        if not self.enabled:
+            return
+        key = self.prefix + key
+        tags = [self.prefix + tag for tag in tags]
+        ttl = ttl or self.default_ttl
+        if self.invalidated_fill_ttl and tags and self._recently_invalidated(tags):
+            ttl = min(ttl, self.invalidated_fill_ttl)
+        now = time.time()
+        expires_at = now + ttl
+        # The true expiry travels with the value: LRU copies expire sooner
+        data = pickle.dumps((value, load_seconds, expires_at), pickle.HIGHEST_PROTOCOL)
+        if self.shared is not None:
+            self._shared('set', key, data, expires_at, tags)
+        self.local.set(key, data, min(expires_at, now + self.local_ttl), tags)
+        self._stats['sets'] += 1
+
+    def get_or_set(self, key, loader, ttl=None, tags=()):
+        """
+        Cached value for ``key``, or ``loader()`` stored under it. A None
+        result is returned but not cached.
+
+        On a miss, one thread per worker runs ``loader`` and the others
+        wait for its result. With a shared tier, that thread also takes a
+        recompute lock for the key; other workers then poll the shared tier
+        for the value instead of loading it too, falling back to loading
+        after CACHE_LOCK_TIMEOUT.
+
+        A hit may also trigger an early refresh: the closer the entry is to
+        expiry, and the slower it was to load, the likelier the caller
+        reloads it now (XFetch, scaled by CACHE_EARLY_REFRESH_BETA). Only
+        one caller refreshes a key at a time; everyone else keeps the
+        current value.
+        """
+        if not self.enabled:
+            return loader()
+        full_key = self.prefix + key
+        entry = self._lookup(full_key)
+        if entry is not None:
+            value, load_seconds, expires_at = entry
+            if not self._refresh_early(load_seconds, expires_at):
+                return value
+            flight, leader = self._join(full_key)
+            if not leader:
+                return value
+            self._stats['early_refreshes'] += 1
+            return self._load(full_key, flight, key, loader, ttl, tags, current=value)
+
+        flight, leader = self._join(full_key)
+        if not leader:
+            # Another thread of this worker is loading it
+            self._stats['coalesced'] += 1
+            if flight.done.wait(self.lock_timeout) and flight.error is None:
+                return flight.value
+            return loader()
+        return self._load(full_key, flight, key, loader, ttl, tags)
+
+    def _refresh_early(self, load_seconds, expires_at):
+        if not load_seconds or not self.early_refresh_beta:
+            return False
+        return time.time() - load_seconds * self.early_refresh_beta * math.log(1 - random.random()) >= expires_at
+
+    def _join(self, full_key):
+        """
+        (flight, leader): the load of ``full_key`` in progress, and whether
+        this thread just started it
+        """
+        with self._flights_lock:
+            flight = self._flights.get(full_key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[full_key] = Flight()
+            return flight, True
+
+    def _load(self, full_key, flight, key, loader, ttl, tags, current=_MISSING):
+        try:
+            flight.value = self._load_shared(full_key, key, loader, ttl, tags, current)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(full_key, None)
+            flight.done.set()
+
+    def _load_shared(self, full_key, key, loader, ttl, tags, current):
+        token = None
+        if self.shared is not None:
+            token = self._shared('acquire_lock', full_key, self.lock_timeout)
+            if token is False:
+                # Another worker is loading it
+                if current is not _MISSING:
+                    return current
+                self._stats['lock_waits'] += 1
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.02)
+                    entry = self._shared('get', full_key, time.time())
+                    if entry is not None:
+                        data, expires_at = entry
+                        self.local.set(full_key, data, min(expires_at, time.time() + self.local_ttl))
+                        return pickle.loads(data)[0]
+                token = None
+        try:
+            started = time.perf_counter()
+            value = loader()
+            self._stats['loads'] += 1
+            if value is not None:
+                self.set(key, value, ttl, tags, load_seconds=time.perf_counter() - started)
+            return value
+        finally:
+            if token:
+                self._shared('release_lock', full_key, token)
+
+    def delete(self, *keys):
+        keys = [self.prefix + key for key in keys]
+        self.local.delete(keys)
+        if self.shared is not None:
+            self._shared('delete', keys)
+
+    def invalidate_tags(self, *tags):
+        """
+        Drop every entry stored with any of ``tags``
+        """
+        tags = [self.prefix + tag for tag in tags]
+        if not tags:
+            return
+        if self.invalidated_fill_ttl:
+            # Before dropping, so a fill racing with it is cached briefly too
+            self._mark_invalidated(tags)
+        self.local.invalidate_tags(tags)
+        if self.shared is not None:
+            self._shared('invalidate_tags', tags)
+        self._stats['invalidations'] += len(tags)
+
+    def _mark_invalidated(self, tags):
+        until = time.time() + self.invalidated_fill_ttl
+        with self._flights_lock:
+            if len(self._invalidated) >= 10000:
+                now = time.time()
+                self._invalidated = {tag: at for tag, at in self._invalidated.items() if at > now}
+            self._invalidated.update(dict.fromkeys(tags, until))
+        if self.shared is not None:
+            for tag in tags:
+                self._shared('set', 'invalidated:' + tag, b'', until)
+
+    def _recently_invalidated(self, tags):
+        """
+        Whether any of the prefixed ``tags`` was invalidated, by this worker
+        or another, within the last CACHE_INVALIDATED_FILL_TTL seconds
+        """
+        now = time.time()
+        if any(self._invalidated.get(tag, 0) > now for tag in tags):
+            return True
+        if self.shared is None:
+            return False
+        return bool(self._shared('get_many', ['invalidated:' + tag for tag in tags], now))
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self._shared('clear')
+
+    def stats(self):
+        lookups = self._stats['local_hits'] + self._stats['shared_hits'] + self._stats['misses']
+        hits = self._stats['local_hits'] + self._stats['shared_hits']
+        return dict(
+            self._stats,
+            enabled=self.enabled,
+            hit_rate=round(hits / lookups, 3) if lookups else 0,
+            local=self.local.stats(),
+            shared=self._shared('stats') if self.shared is not None else None
+        )
@@ -0,0 +1,131 @@
+import weakref
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.utils.query_stats import instrument_engine
+
+def is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def postgresql_profile(config):
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        # Recycle before server/proxy idle timeouts drop the connection
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+def sqlite_profile(config):
+    # Sizing needs the QueuePool SQLAlchemy 2.0 gives file databases;
+    # 1.4 gave them a NullPool, which rejects these keys
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        # pysqlite's own lock wait, in seconds; the busy_timeout pragma mirrors it
+        'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000},
+    }
+
+ENGINE_PROFILES = {
+    'postgresql': postgresql_profile,
+    'sqlite': sqlite_profile,
+}
+
+def engine_options(uri, config):
+    """
+    Engine options for ``uri`` from the profile for its backend. In-memory
+    SQLite uses a StaticPool, which takes no pool sizing.
+    """
+    url = make_url(uri)
+    profile = ENGINE_PROFILES.get(url.get_backend_name())
+    if profile is None or is_memory_sqlite(url):
+        return {}
+    return profile(config)
+
+def configure_engine_options(app):
+    """
+    Fill SQLALCHEMY_ENGINE_OPTIONS from the engine profile. Anything set
+    explicitly in SQLALCHEMY_ENGINE_OPTIONS wins. Call before db.init_app.
+    """
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def sqlite_pragmas(config, url):
+    pragmas = [f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}"]
+    if not is_memory_sqlite(url):
+        # WAL lets readers run alongside the single writer instead of
+        # failing with "database is locked"
+        pragmas += [
+            f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+            f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+            f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        ]
+    return pragmas
+
+def postgresql_settings(config, url):
+    statements = []
+    if config.get('DB_STATEMENT_TIMEOUT_MS'):
+        statements.append(f"SET statement_timeout = {int(config['DB_STATEMENT_TIMEOUT_MS'])}")
+    if config.get('DB_WORK_MEM'):
+        statements.append("SET work_mem = '%s'" % config['DB_WORK_MEM'].replace("'", ''))
+    return statements
+
+CONNECT_STATEMENTS = {
+    'postgresql': postgresql_settings,
+    'sqlite': sqlite_pragmas,
+}
+
+# Pool event counters per engine; the pool itself only reports current state
+_pool_counters = weakref.WeakKeyDictionary()
+
+def install_engine_hooks(engine, config):
+    """
+    Run the backend's session settings on every new DBAPI connection,
+    count pool events for pool_stats() and time statements for QueryStats
+    """
+    url = engine.url
+    settings = CONNECT_STATEMENTS.get(url.get_backend_name())
+    statements = settings(config, url) if settings else []
+
+    counters = _pool_counters.setdefault(engine, {'connects': 0, 'checkouts': 0, 'invalidated': 0})
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        counters['connects'] += 1
+        if not statements:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for sql in statements:
+                cursor.execute(sql)
+        finally:
+            cursor.close()
+        if url.get_backend_name() == 'postgresql':
+            # SET runs inside psycopg2's implicit transaction; keep it
+            dbapi_connection.commit()
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters['checkouts'] += 1
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        counters['invalidated'] += 1
+
+    instrument_engine(engine)
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    # QueuePool exposes sizing; StaticPool/NullPool do not
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    if 'size' in stats:
+        stats['max_overflow'] = getattr(pool, '_max_overflow', None)
+        stats['timeout'] = pool.timeout() if callable(getattr(pool, 'timeout', None)) else None
+    stats.update(_pool_counters.get(engine, {}))
+    return stats
@@ -1,6 +1,6 @@
 from functools import wraps
 from flask_jwt_extended import get_jwt_identity
-from app.models.user import User
+from app.services.user_service import user_access
 
 def role_required(allowed_roles):
     """
@@ -10,12 +10,12 @@ def role_required(allowed_roles):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = user_access(user_id)
             
-            if not user or not user.is_active:
+            if not user or not user['is_active']:
                 return {'message': 'User not found or inactive'}, 401
             
-            if user.role not in allowed_roles:
+            if user['role'] not in allowed_roles:
                 return {'message': 'Insufficient permissions'}, 403
             
             return f(*args, **kwargs)
@@ -0,0 +1,133 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+class Include:
+    """
+    An optional part of a resource: the schema fields it adds, the loader
+    options that fetch it efficiently, and what to run when it is left out.
+
+    ``load`` and ``skip`` are callables returning loader options (called per
+    request, after mappers are configured). ``prefetch(items)`` runs on the
+    page before dumping, for aggregates that cannot be eager-loaded.
+    """
+
+    def __init__(self, fields, load=None, skip=None, columns=(), prefetch=None):
+        self.fields = tuple(fields)
+        self.load = load
+        self.skip = skip
+        self.columns = tuple(columns)
+        self.prefetch = prefetch
+
+class FieldSelection:
+    def __init__(self, only, includes, full=False):
+        self.only = only
+        self.includes = includes
+        self.full = full
+
+class FieldSpec:
+    """
+    Sparse fieldsets for a list endpoint:
+
+    - ``fields=id,title,price`` returns only those fields (``id`` is always
+      returned); naming an include's field, e.g. ``categories``, includes it
+    - ``include=categories,rating`` adds includes; without ``fields`` every
+      plain field is returned alongside them
+
+    Without either parameter the full schema is returned, as before. Plain
+    fields are column fields unless listed in ``requires`` with the columns
+    they are computed from.
+    """
+
+    def __init__(self, model, schema_cls, includes, requires=None):
+        self.model = model
+        self.schema_cls = schema_cls
+        self.includes = includes
+        self.requires = requires or {}
+        self._fields = None
+
+    @property
+    def fields(self):
+        # Resolved lazily: the schema can only be instantiated once mappers are configured
+        if self._fields is None:
+            self._fields = list(self.schema_cls().dump_fields)
+        return self._fields
+
+    @property
+    def plain_fields(self):
+        included = {field for include in self.includes.values() for field in include.fields}
+        return [field for field in self.fields if field not in included]
+
+    def parse(self, args):
+        """
+        FieldSelection from request args. Raises ValueError listing unknown names.
+        """
+        fields_arg, include_arg = args.get('fields'), args.get('include')
+        if fields_arg is None and include_arg is None:
+            return self.everything()
+
+        requested = _split(fields_arg)
+        includes = _split(include_arg)
+
+        errors = {}
+        unknown_fields = [field for field in requested if field not in self.fields]
+        if unknown_fields:
+            errors['fields'] = [f"Unknown field(s): {', '.join(unknown_fields)}"]
+        unknown_includes = [name for name in includes if name not in self.includes]
+        if unknown_includes:
+            errors['include'] = [f"Unknown include(s): {', '.join(unknown_includes)}"]
+        if errors:
+            raise ValueError(errors)
+
+        includes = set(includes)
+        includes.update(name for name, include in self.includes.items()
+                        if any(field in requested for field in include.fields))
+
+        plain = [field for field in self.plain_fields if fields_arg is None or field in requested or field == 'id']
+        only = set(plain)
+        for name in includes:
+            only.update(self.includes[name].fields)
+        return FieldSelection(only, includes)
+
+    def everything(self):
+        """
+        Selection for the full schema with every include
+        """
+        return FieldSelection(None, set(self.includes), full=True)
+
+    def apply(self, query, selection, columns=()):
+        """
+        Add eager loads for the selected includes, skip the rest, and limit
+        the SELECT to the columns the selected fields need (plus ``columns``)
+        """
+        options = []
+        for name, include in self.includes.items():
+            if name in selection.includes:
+                if include.load:
+                    options.extend(include.load())
+            elif include.skip:
+                options.extend(include.skip())
+
+        if not selection.full:
+            mapper = inspect(self.model)
+            column_names = {attr.key for attr in mapper.column_attrs}
+            needed = {mapper.primary_key[0].key, *columns}
+            for field in selection.only:
+                if field in column_names:
+                    needed.add(field)
+                needed.update(self.requires.get(field, ()))
+            for name in selection.includes:
+                needed.update(self.includes[name].columns)
+            options.append(load_only(*[getattr(self.model, column) for column in sorted(needed)]))
+
+        return query.options(*options) if options else query
+
+    def prefetch(self, items, selection):
+        for name in selection.includes:
+            include = self.includes[name]
+            if include.prefetch and items:
+                include.prefetch(items)
+
+def _split(value):
+    if not value:
+        return []
+    return [part.strip() for part in value.split(',') if part.strip()]
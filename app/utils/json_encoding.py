@@ -0,0 +1,42 @@
+import datetime
+import decimal
+import json
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+def default(obj):
+    """
+    Types the encoder does not handle natively. Decimals (prices, totals) are
+    written as strings so no precision is lost.
+    """
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        # orjson encodes these itself; this is for the stdlib fallback
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def dumps(data, indent=False):
+    """
+    Encode data to JSON bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=option)
+    return json.dumps(data, default=default, indent=2 if indent else None).encode()
+
+def output_json(data, code, headers=None):
+    """
+    Flask-RESTful representation for application/json. Pretty-printed in
+    debug mode like Flask-RESTful's own.
+    """
+    response = make_response(dumps(data, indent=current_app.debug), code)
+    response.headers.extend(headers or {})
+    response.headers['Content-Type'] = 'application/json'
+    return response
@@ -0,0 +1,178 @@
+import threading
+import time
+from flask import current_app, g, request
+
+# Shed order: low goes first, critical never
+PRIORITIES = ('critical', 'normal', 'low')
+
+def load_priority(level, when=None):
+    """
+    Decorator to mark a resource method ``critical`` (never shed) or
+    ``low`` (shed first under load); unmarked methods are ``normal``.
+    ``when`` is an optional predicate; the mark only applies if it returns True.
+    """
+    if level not in PRIORITIES:
+        raise ValueError(f'Unknown load priority: {level}')
+    def decorator(f):
+        f.load_priority = (level, when)
+        return f
+    return decorator
+
+def parse_request_start(value):
+    """
+    Epoch seconds from an X-Request-Start style header: ``t=`` prefixed or
+    bare, in seconds, milliseconds or microseconds. None if unparseable.
+    """
+    try:
+        started = float(value.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e14:
+        return started / 1e6
+    if started > 1e11:
+        return started / 1e3
+    return started
+
+class LoadShedder:
+    """
+    Admission control for overload: answers 503 at once, before any work,
+    for requests that would likely time out anyway.
+
+    Two signals are checked per worker, with a budget per priority:
+
+    - queue time: how long the request waited before a thread picked it up,
+      from LOAD_SHEDDING_QUEUE_HEADER (set by the proxy, or stamped at
+      accept by gunicorn.conf.py under gthread)
+    - in-flight: requests this worker is serving, this one included
+
+    ``low`` budgets are tighter than ``normal`` ones, so search, sync and
+    admin analytics are shed before the catalog; ``critical`` (checkout and
+    login) is always admitted.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.queue_header = 'X-Request-Start'
+        self.max_queue_ms = {}
+        self.max_in_flight = {}
+        self.retry_after = 2
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._queue = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('LOAD_SHEDDING_ENABLED', True)
+        self.queue_header = app.config.get('LOAD_SHEDDING_QUEUE_HEADER', 'X-Request-Start')
+        self.max_queue_ms = app.config.get('LOAD_SHEDDING_MAX_QUEUE_MS') or {}
+        self.max_in_flight = app.config.get('LOAD_SHEDDING_MAX_IN_FLIGHT') or {}
+        self.retry_after = app.config.get('LOAD_SHEDDING_RETRY_AFTER', 2)
+        self._stats = {level: self._empty_stats() for level in PRIORITIES}
+        self._queue = {'measured': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        # First, so a shed request costs no other before_request work
+        app.before_request_funcs.setdefault(None, []).insert(0, self.admit)
+        app.teardown_request(self.release)
+        app.extensions['load_shedder'] = self
+
+    @staticmethod
+    def _empty_stats():
+        return {'admitted': 0, 'shed_queue': 0, 'shed_in_flight': 0}
+
+    def priority(self):
+        """
+        Priority of the current request, from its resource method's mark
+        """
+        view = current_app.view_functions.get(request.endpoint)
+        view_class = getattr(view, 'view_class', None)
+        if view_class is not None:
+            method = request.method.lower()
+            view = getattr(view_class, method, None) or (getattr(view_class, 'get', None) if method == 'head' else None)
+        level, when = getattr(view, 'load_priority', ('normal', None))
+        return level if when is None or when() else 'normal'
+
+    def queue_ms(self):
+        """
+        Milliseconds the current request queued before reaching the app, or
+        None without a usable header
+        """
+        value = request.headers.get(self.queue_header)
+        started = parse_request_start(value) if value else None
+        if started is None:
+            return None
+        # Proxy and app clocks can disagree slightly
+        return max(0.0, (time.time() - started) * 1000)
+
+    def admit(self):
+        if not self.enabled:
+            return None
+        level = self.priority()
+        queue_ms = self.queue_ms()
+        stats = self._stats[level]
+
+        # Counters are per worker and updated without a lock; they are metrics, not limits
+        if queue_ms is not None:
+            self._queue['measured'] += 1
+            self._queue['total_ms'] += queue_ms
+            self._queue['max_ms'] = max(self._queue['max_ms'], queue_ms)
+            max_queue_ms = self.max_queue_ms.get(level)
+            if level != 'critical' and max_queue_ms is not None and queue_ms > max_queue_ms:
+                stats['shed_queue'] += 1
+                return self._shed()
+
+        with self._lock:
+            max_in_flight = self.max_in_flight.get(level)
+            if level != 'critical' and max_in_flight is not None and self.in_flight >= max_in_flight:
+                stats['shed_in_flight'] += 1
+                return self._shed()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        g.load_admitted = True
+        stats['admitted'] += 1
+        return None
+
+    def _shed(self):
+        return {'message': 'Server busy, retry shortly'}, 503, {'Retry-After': str(self.retry_after)}
+
+    def release(self, exc=None):
+        if g.pop('load_admitted', False):
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        measured = self._queue.get('measured', 0)
+        return {
+            'enabled': self.enabled,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'queue_ms': {
+                'measured': measured,
+                'avg': round(self._queue['total_ms'] / measured, 1) if measured else 0,
+                'max': round(self._queue.get('max_ms', 0), 1)
+            },
+            'priorities': {level: dict(stats) for level, stats in self._stats.items()}
+        }
+
+def stamp_request_start(worker, header='X-Request-Start'):
+    """
+    Make a gunicorn gthread worker add ``header`` (as ``t=<epoch seconds>``)
+    to each request it queues for a thread, unless the proxy already set
+    it, so queue time is measured without one.
+    """
+    name = header.upper()
+    enqueue_req, handle_request = worker.enqueue_req, worker.handle_request
+
+    def stamped_enqueue_req(conn):
+        conn.enqueued_at = time.time()
+        enqueue_req(conn)
+
+    def stamped_handle_request(req, conn):
+        enqueued_at = getattr(conn, 'enqueued_at', None)
+        if enqueued_at is not None and not any(key == name for key, _ in req.headers):
+            req.headers.append((name, f't={enqueued_at:.6f}'))
+        return handle_request(req, conn)
+
+    worker.enqueue_req = stamped_enqueue_req
+    worker.handle_request = stamped_handle_request
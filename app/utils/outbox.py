@@ -0,0 +1,303 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+# Domain event types
+PRODUCT_CHANGED = 'ProductChanged'
+ORDER_PLACED = 'OrderPlaced'
+ORDER_STATUS_CHANGED = 'OrderStatusChanged'
+REVIEW_CREATED = 'ReviewCreated'
+CATEGORY_CHANGED = 'CategoryChanged'
+USER_CHANGED = 'UserChanged'
+
+class Consumer:
+    def __init__(self, name, event_types, handler):
+        self.name = name
+        self.event_types = frozenset(event_types)
+        self.handler = handler
+        self.stats = {'delivered': 0, 'batches': 0, 'failed': 0}
+
+class EventBus:
+    """
+    Delivers outbox events to registered consumers, at least once.
+
+    Events are rows written in the same transaction as the change
+    (app/services/domain_events.py). The dispatcher claims a batch of due
+    rows, hands each consumer the events it subscribes to as one list, and
+    marks rows dispatched once every consumer has succeeded. A failed
+    consumer is retried with exponential backoff up to OUTBOX_MAX_ATTEMPTS
+    (consumers that already succeeded are not called again); an event whose
+    attempts run out stays undispatched and is counted as dead. Consumers
+    must tolerate duplicates and events arriving out of order.
+
+    Where dispatching runs (OUTBOX_DISPATCH):
+
+    - thread: a daemon thread per worker, woken after each commit that
+      wrote events and polling every OUTBOX_POLL_INTERVAL otherwise
+    - eager: synchronously after the commit, in the committing thread
+    - external: not in web workers; run ``flask outbox run`` instead
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mode = 'thread'
+        self.batch_size = 100
+        self.poll_interval = 1.0
+        self.max_attempts = 10
+        self.retry_backoff = 2.0
+        self.lease = 60
+        self.consumers = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'dispatched': 0, 'retried': 0, 'batches': 0, 'last_lag_seconds': None}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from sqlalchemy.engine import make_url
+        from app.utils.database import is_memory_sqlite
+
+        self.app = app
+        self.mode = app.config.get('OUTBOX_DISPATCH', 'thread')
+        if self.mode == 'thread' and is_memory_sqlite(make_url(app.config['SQLALCHEMY_DATABASE_URI'])):
+            # Other threads would each see their own empty in-memory database
+            self.mode = 'eager'
+        self.batch_size = app.config.get('OUTBOX_BATCH_SIZE', 100)
+        self.poll_interval = app.config.get('OUTBOX_POLL_INTERVAL', 1.0)
+        self.max_attempts = app.config.get('OUTBOX_MAX_ATTEMPTS', 10)
+        self.retry_backoff = app.config.get('OUTBOX_RETRY_BACKOFF', 2.0)
+        self.lease = app.config.get('OUTBOX_LEASE_SECONDS', 60)
+        if self.mode == 'thread':
+            app.before_request(self._ensure_thread)
+        app.extensions['event_bus'] = self
+
+    def subscribe(self, name, event_types, handler):
+        """
+        Call ``handler(events)`` with batches of the given event types.
+        ``name`` identifies the consumer in delivery state and metrics.
+        """
+        self.consumers[name] = Consumer(name, event_types, handler)
+
+    def consumer(self, name, *event_types):
+        """
+        Decorator form of subscribe()
+        """
+        def decorator(handler):
+            self.subscribe(name, event_types, handler)
+            return handler
+        return decorator
+
+    def notify(self):
+        """
+        Events were committed: dispatch now (eager) or wake the dispatcher thread
+        """
+        if self.mode == 'eager':
+            if getattr(self._local, 'dispatching', False):
+                return  # the running dispatch loop picks them up
+            try:
+                self.dispatch_pending()
+            except Exception as e:
+                self.app.logger.error(f'Outbox dispatch failed: {str(e)}')
+        elif self.mode == 'thread':
+            self._ensure_thread()
+            self._wake.set()
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # Threads do not survive fork (gunicorn preload_app)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.run, name='outbox-dispatcher', daemon=True)
+            self._thread.start()
+
+    def run(self):
+        """
+        Dispatch until the process exits: the worker thread, or `flask outbox run`
+        """
+        while True:
+            try:
+                dispatched = self.dispatch_once()
+            except Exception as e:
+                self.app.logger.error(f'Outbox dispatch failed: {str(e)}')
+                dispatched = 0
+            if not dispatched:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def dispatch_pending(self):
+        """
+        Dispatch batches until nothing is due. Returns the number of events handled.
+        """
+        total = 0
+        self._local.dispatching = True
+        try:
+            while True:
+                handled = self.dispatch_once()
+                if not handled:
+                    return total
+                total += handled
+        finally:
+            self._local.dispatching = False
+
+    def dispatch_once(self):
+        """
+        Claim and deliver one batch. Returns the number of events claimed.
+        """
+        from app import db
+
+        # A fresh app context means a fresh db.session, separate from any
+        # request session this runs inside
+        with self.app.app_context():
+            # Claimed events are reused across the per-consumer commits
+            db.session.expire_on_commit = False
+            events = self._claim(db.session)
+            if events:
+                self._deliver(db.session, events)
+            return len(events)
+
+    def _claim(self, session):
+        from app.models.outbox_event import OutboxEvent
+
+        now = datetime.utcnow()
+        token = str(uuid.uuid4())
+        due = session.query(OutboxEvent.id).filter(
+            OutboxEvent.dispatched_at.is_(None),
+            OutboxEvent.available_at <= now,
+            OutboxEvent.attempts < self.max_attempts
+        ).order_by(OutboxEvent.id).limit(self.batch_size).subquery()
+        # Re-checking available_at in the UPDATE makes the claim exclusive
+        # when several dispatchers select the same rows
+        session.query(OutboxEvent).filter(
+            OutboxEvent.id.in_(select(due.c.id)),
+            OutboxEvent.available_at <= now
+        ).update({
+            OutboxEvent.claimed_by: token,
+            OutboxEvent.available_at: now + timedelta(seconds=self.lease),
+            OutboxEvent.attempts: OutboxEvent.attempts + 1
+        }, synchronize_session=False)
+        session.commit()
+        return session.query(OutboxEvent).filter_by(claimed_by=token).order_by(OutboxEvent.id).all()
+
+    def _deliver(self, session, events):
+        # Tracked outside the events: a failing consumer's rollback discards pending attribute changes
+        delivered = {event.id: list(event.delivered_to or ()) for event in events}
+        errors = {}
+        for consumer in self.consumers.values():
+            batch = [
+                event for event in events
+                if event.event_type in consumer.event_types and consumer.name not in delivered[event.id]
+            ]
+            if not batch:
+                continue
+            try:
+                consumer.handler(batch)
+                # Commits whatever the consumer wrote through db.session
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                consumer.stats['failed'] += 1
+                errors[consumer.name] = e
+                self.app.logger.error(f'Outbox consumer {consumer.name} failed on {len(batch)} events: {str(e)}')
+                continue
+            consumer.stats['batches'] += 1
+            consumer.stats['delivered'] += len(batch)
+            for event in batch:
+                delivered[event.id].append(consumer.name)
+
+        now = datetime.utcnow()
+        for event in events:
+            failed = [name for name, consumer in self.consumers.items()
+                      if name in errors and event.event_type in consumer.event_types]
+            if failed:
+                event.last_error = '; '.join(f'{name}: {errors[name]}' for name in failed)[:2000]
+                delay = min(self.retry_backoff * 2 ** (event.attempts - 1), 300)
+                event.available_at = now + timedelta(seconds=delay)
+                self._stats['retried'] += 1
+            else:
+                event.dispatched_at = now
+                self._stats['dispatched'] += 1
+            event.delivered_to = delivered[event.id]
+            event.claimed_by = None
+        session.commit()
+
+        self._stats['batches'] += 1
+        self._stats['last_lag_seconds'] = round((now - min(event.created_at for event in events)).total_seconds(), 3)
+
+    def stats(self):
+        """
+        Delivery counters for this worker plus the shared backlog: pending
+        events, how old the oldest one is, and dead events
+        """
+        from app import db
+        from app.models.outbox_event import OutboxEvent
+
+        undispatched = db.session.query(OutboxEvent).filter(OutboxEvent.dispatched_at.is_(None))
+        pending, oldest = undispatched.filter(OutboxEvent.attempts < self.max_attempts).with_entities(
+            func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)
+        ).one()
+        dead = undispatched.filter(OutboxEvent.attempts >= self.max_attempts).count()
+        return dict(
+            self._stats,
+            mode=self.mode,
+            pending=pending,
+            dead=dead,
+            oldest_pending_seconds=round((datetime.utcnow() - oldest).total_seconds(), 3) if oldest else 0,
+            consumers={name: dict(consumer.stats) for name, consumer in self.consumers.items()}
+        )
+
+@click.group('outbox')
+def outbox_cli():
+    """Run and inspect the domain event outbox."""
+
+@outbox_cli.command('run')
+@with_appcontext
+def run_command():
+    """Dispatch outbox events until stopped (for OUTBOX_DISPATCH=external)."""
+    bus = current_app.extensions['event_bus']
+    click.echo(f'Dispatching to {", ".join(bus.consumers) or "no consumers"}')
+    bus.run()
+
+@outbox_cli.command('status')
+@with_appcontext
+def status_command():
+    """Print backlog and delivery metrics."""
+    click.echo(json.dumps(current_app.extensions['event_bus'].stats(), indent=2))
+
+@outbox_cli.command('requeue')
+@with_appcontext
+def requeue_command():
+    """Give dead events (attempts exhausted) a fresh set of attempts."""
+    from app import db
+    from app.models.outbox_event import OutboxEvent
+
+    bus = current_app.extensions['event_bus']
+    count = OutboxEvent.query.filter(
+        OutboxEvent.dispatched_at.is_(None), OutboxEvent.attempts >= bus.max_attempts
+    ).update({OutboxEvent.attempts: 0, OutboxEvent.available_at: datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Requeued {count} events')
+
+@outbox_cli.command('purge')
+@click.option('--days', default=7, show_default=True, help='Keep dispatched events this many days.')
+@with_appcontext
+def purge_command(days):
+    """Delete dispatched events older than --days."""
+    from app import db
+    from app.models.outbox_event import OutboxEvent
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    count = OutboxEvent.query.filter(OutboxEvent.dispatched_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Deleted {count} events')
@@ -1,3 +1,4 @@
+import base64
 import math
 
 def paginate_query(query, page=1, per_page=20):
@@ -15,4 +16,23 @@ def paginate_query(query, page=1, per_page=20):
         'pages': math.ceil(total / per_page) if total > 0 else 1,
         'has_prev': page > 1,
         'has_next': page < math.ceil(total / per_page) if total > 0 else False
-    }
\ No newline at end of file
+    }
+def encode_cursor(*values):
+    """
+    Opaque, URL-safe cursor for a tuple of integers
+    """
+    raw = '.'.join(str(value) for value in values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    """
+    Integers from a cursor made by encode_cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        values = tuple(int(value) for value in raw.split('.'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
@@ -0,0 +1,337 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import Response, current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+def event_id_key(event_id):
+    """
+    Sort key for event ids ('<ms>-<seq>', the Redis stream id format)
+    """
+    try:
+        return tuple(int(part) for part in event_id.split('-', 1))
+    except (AttributeError, ValueError):
+        return (0, 0)
+
+class Message:
+    __slots__ = ('id', 'event', 'data')
+
+    def __init__(self, id, event, data):
+        self.id = id
+        self.event = event
+        self.data = data
+
+    def encode(self):
+        return f'id: {self.id}\nevent: {self.event}\ndata: {self.data}\n\n'
+
+class Subscription:
+    """
+    One stream's mailbox. A stream that falls more than ``max_pending``
+    messages behind is closed; the client reconnects with Last-Event-ID.
+    """
+
+    def __init__(self, channel, max_pending):
+        self.channel = channel
+        self.max_pending = max_pending
+        self.overflowed = False
+        self.closed = False
+        self._messages = deque()
+        self._ready = threading.Condition()
+
+    def put(self, message):
+        with self._ready:
+            if len(self._messages) >= self.max_pending:
+                self.overflowed = True
+            else:
+                self._messages.append(message)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """
+        Next message, or None after ``timeout`` seconds (or once overflowed)
+        """
+        with self._ready:
+            if not self._messages and not self.overflowed:
+                self._ready.wait(timeout)
+            return self._messages.popleft() if self._messages and not self.overflowed else None
+
+class MemoryBackend:
+    """
+    Publishes to subscribers in this worker only, keeping the last
+    ``replay_size`` messages per channel for Last-Event-ID resume
+    """
+
+    def __init__(self, replay_size, max_channels=10000):
+        self.replay_size = replay_size
+        self.max_channels = max_channels
+        self.deliver = None
+        self._history = OrderedDict()
+        self._sequence = itertools.count()
+        self._last_ms = 0
+        self._lock = threading.Lock()
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def listen(self):
+        pass
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            # Never behind the previous id, even if the clock steps back
+            self._last_ms = max(self._last_ms, int(time.time() * 1000))
+            message = Message(f'{self._last_ms}-{next(self._sequence)}', event, data)
+            history = self._history.pop(channel, None) or deque(maxlen=self.replay_size)
+            history.append(message)
+            self._history[channel] = history
+            if len(self._history) > self.max_channels:
+                self._history.popitem(last=False)
+        self.deliver(channel, message)
+        return message.id
+
+    def replay(self, channel, after):
+        after = event_id_key(after)
+        with self._lock:
+            return [message for message in self._history.get(channel, ()) if event_id_key(message.id) > after]
+
+class RedisBackend:
+    """
+    Publishes through Redis so every worker and host sees each message.
+    Messages are appended to a capped stream per channel (the replay
+    history) and announced with PUBLISH in the same script; each worker
+    runs one listener thread that fans announcements out to its streams.
+    """
+
+    SCRIPT = """
+    local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'event', ARGV[2], 'data', ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    redis.call('PUBLISH', KEYS[1], id .. '\\n' .. ARGV[2] .. '\\n' .. ARGV[3])
+    return id
+    """
+
+    def __init__(self, url, replay_size, prefix='pubsub:', history_ttl=86400):
+        import redis
+        self.replay_size = replay_size
+        self.prefix = prefix
+        self.history_ttl = history_ttl
+        self.deliver = None
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def listen(self):
+        # Started on first subscribe, and again in each forked worker
+        with self._lock:
+            if self._pid == os.getpid() and self._listener.is_alive():
+                return
+            self._pid = os.getpid()
+            self._listener = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                listener = self._client.pubsub(ignore_subscribe_messages=True)
+                listener.psubscribe(self.prefix + '*')
+                for item in listener.listen():
+                    channel = item['channel'].decode()[len(self.prefix):]
+                    event_id, event, data = item['data'].decode().split('\n', 2)
+                    self.deliver(channel, Message(event_id, event, data))
+            except Exception:
+                time.sleep(1)
+
+    def publish(self, channel, event, data):
+        event_id = self._script(keys=[self.prefix + channel], args=[self.replay_size, event, data, self.history_ttl])
+        return event_id.decode()
+
+    def replay(self, channel, after):
+        entries = self._client.xrange(self.prefix + channel, min=f'({after}', max='+')
+        return [
+            Message(entry_id.decode(), fields[b'event'].decode(), fields[b'data'].decode())
+            for entry_id, fields in entries
+        ]
+
+class EventStream:
+    """
+    Response body for one subscription. close() (called by the WSGI server
+    when the client goes away) unsubscribes, even if iteration never began.
+    """
+
+    def __init__(self, pubsub, subscription, last_event_id):
+        self.pubsub = pubsub
+        self.subscription = subscription
+        self._frames = pubsub._frames(subscription, last_event_id)
+
+    def __iter__(self):
+        return self._frames
+
+    def close(self):
+        self._frames.close()
+        self.pubsub.unsubscribe(self.subscription)
+
+class PubSub:
+    """
+    Channel pub/sub for server-sent event streams. Publishing goes through
+    the backend (memory:// within a worker, redis:// across workers); the
+    backend hands each message back to ``_deliver``, which fans it out to the
+    streams subscribed in this worker.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.max_streams = 100
+        self.max_pending = 100
+        self.heartbeat = 15
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'delivered': 0, 'dropped_streams': 0, 'rejected_streams': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_streams = app.config.get('SSE_MAX_STREAMS', 100)
+        self.max_pending = app.config.get('SSE_MAX_PENDING', 100)
+        self.heartbeat = app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+        replay_size = app.config.get('PUBSUB_REPLAY_SIZE', 200)
+
+        url = app.config.get('PUBSUB_URL') or 'memory://'
+        if url.startswith('memory://'):
+            self.backend = MemoryBackend(replay_size)
+        elif url.startswith(('redis://', 'rediss://', 'unix://')):
+            self.backend = RedisBackend(url, replay_size)
+        else:
+            raise ValueError(f'Unsupported PUBSUB_URL: {url}')
+        self.backend.start(self._deliver)
+        app.extensions['pubsub'] = self
+
+    def publish(self, channel, event, data):
+        """
+        Publish ``data`` (a JSON string) to ``channel``; returns the event id
+        """
+        self._stats['published'] += 1
+        return self.backend.publish(channel, event, data)
+
+    def _deliver(self, channel, message):
+        subscriptions = self._subscriptions.get(channel)
+        if not subscriptions:
+            return
+        for subscription in list(subscriptions):
+            subscription.put(message)
+            self._stats['delivered'] += 1
+
+    def subscribe(self, channel):
+        """
+        New Subscription to ``channel``, or None when this worker already
+        serves SSE_MAX_STREAMS streams
+        """
+        with self._lock:
+            if self.active_streams() >= self.max_streams:
+                self._stats['rejected_streams'] += 1
+                return None
+            subscription = Subscription(channel, self.max_pending)
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        self.backend.listen()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+            if subscription.overflowed:
+                self._stats['dropped_streams'] += 1
+
+    def active_streams(self):
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def stream(self, subscription, last_event_id=None):
+        return EventStream(self, subscription, last_event_id)
+
+    def _frames(self, subscription, last_event_id):
+        """
+        SSE frames for a subscription: first anything published
+        after ``last_event_id``, then live messages, with a comment line every
+        ``heartbeat`` seconds so proxies keep the connection open and a gone
+        client is noticed. Runs outside the app context; an idle stream is a
+        thread (or greenlet) waiting on a condition, holding no database
+        connection.
+        """
+        try:
+            yield 'retry: 3000\n\n'
+            last = event_id_key(last_event_id) if last_event_id else (0, 0)
+            if last_event_id:
+                for message in self.backend.replay(subscription.channel, last_event_id):
+                    last = event_id_key(message.id)
+                    yield message.encode()
+            while not subscription.overflowed:
+                message = subscription.get(self.heartbeat)
+                if message is None:
+                    yield ': keepalive\n\n'
+                elif event_id_key(message.id) > last:
+                    # Skips live messages the replay already sent
+                    last = event_id_key(message.id)
+                    yield message.encode()
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        return dict(self._stats, active_streams=self.active_streams())
+
+def event_stream_response(channel):
+    """
+    text/event-stream response for ``channel``, resuming after the
+    Last-Event-ID header (or ``last_event_id`` query parameter) if sent.
+    503 when this worker has no stream slots left.
+    """
+    pubsub = current_app.extensions['pubsub']
+    subscription = pubsub.subscribe(channel)
+    if subscription is None:
+        return {'message': 'Too many open streams, retry shortly'}, 503, {'Retry-After': '5'}
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return Response(pubsub.stream(subscription, last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # stop nginx buffering the stream
+    })
+
+def _ticket_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='event-stream-ticket')
+
+def issue_stream_ticket(user_id, stream):
+    """
+    Ticket that lets ``user_id`` open the stream endpoint named ``stream``
+    for STREAM_TICKET_SECONDS. EventSource cannot send headers, so the
+    ticket goes in the URL instead of the access token, which never expires.
+    """
+    return _ticket_serializer().dumps({'user_id': user_id, 'stream': stream})
+
+def stream_identity(stream):
+    """
+    The caller of stream endpoint ``stream``: the identity of an access
+    token in the Authorization header, else the user of a ``ticket`` query
+    parameter issued for that stream and not yet expired. None if neither.
+    """
+    verify_jwt_in_request(optional=True, locations=['headers'])
+    identity = get_jwt_identity()
+    if identity is not None:
+        return identity
+    ticket = request.args.get('ticket')
+    if not ticket:
+        return None
+    try:
+        claims = _ticket_serializer().loads(ticket, max_age=current_app.config['STREAM_TICKET_SECONDS'])
+    except BadData:
+        return None
+    return claims.get('user_id') if claims.get('stream') == stream else None
@@ -0,0 +1,220 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, request
+from sqlalchemy import event
+
+# Bound parameter markers of the DBAPIs in use (qmark, format, pyformat, named)
+PLACEHOLDER = r'(?:\?|%s|%\(\w+\)s|:\w+)'
+IN_LIST = re.compile(rf'\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})+\s*\)')
+WHITESPACE = re.compile(r'\s+')
+SELECT_LIST = re.compile(r'SELECT (?:(?!SELECT ).)*? FROM ')
+
+# Longest statement preview quoted in logs and headers
+PREVIEW_LENGTH = 200
+
+_current = threading.local()
+_shapes = {}
+
+def statement_shape(statement):
+    """
+    ``statement`` with whitespace collapsed and expanded IN lists folded to
+    ``(...)``, so executions differing only in bound values compare equal
+    """
+    shape = _shapes.get(statement)
+    if shape is None:
+        if len(_shapes) >= 2000:
+            _shapes.clear()
+        shape = _shapes[statement] = IN_LIST.sub('(...)', WHITESPACE.sub(' ', statement).strip())
+    return shape
+
+def preview(shape):
+    """
+    ``shape`` shortened for logs and headers: column lists elided, so the
+    FROM and WHERE clauses that tell statements apart stay visible
+    """
+    return SELECT_LIST.sub('SELECT ... FROM ', shape)[:PREVIEW_LENGTH]
+
+class QueryRecorder:
+    """
+    Statements executed while the recorder is current on this thread, and
+    the time spent in them. Counts also reach the recorder it was pushed
+    over, so a budget around a test client call sees the request's queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self.parent = None
+
+    def record(self, statement, seconds):
+        shape = statement_shape(statement)
+        recorder = self
+        while recorder is not None:
+            recorder.count += 1
+            recorder.seconds += seconds
+            recorder.shapes[shape] += 1
+            recorder = recorder.parent
+
+    def repeated(self, threshold):
+        """
+        (shape, count) of statements run at least ``threshold`` times, most
+        repeated first: the likely N+1 patterns
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+def push_recorder(recorder):
+    recorder.parent = getattr(_current, 'recorder', None)
+    _current.recorder = recorder
+
+def pop_recorder(recorder):
+    if getattr(_current, 'recorder', None) is recorder:
+        _current.recorder = recorder.parent
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_current, 'recorder', None) is not None:
+        conn.info.setdefault('query_stats_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_stats_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    recorder = getattr(_current, 'recorder', None)
+    if recorder is not None:
+        recorder.record(statement, elapsed)
+
+def _handle_error(context):
+    started = context.connection.info.get('query_stats_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+def instrument_engine(engine):
+    """
+    Time every statement ``engine`` runs into the thread's current recorder.
+    Costs one attribute lookup per statement while nothing records.
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+class QueryStats:
+    """
+    Per-request SQL instrumentation: counts the statements each request
+    runs and the time spent in them, across the primary and replicas.
+
+    A statement shape run QUERY_STATS_N_PLUS_ONE_THRESHOLD or more times in
+    one request is logged as a likely N+1 (typically a lazy relationship
+    loaded per row). With QUERY_STATS_HEADERS, responses carry
+    X-Query-Count, X-Query-Time-Ms, X-Query-N-Plus-One and a Server-Timing
+    ``db`` entry. Per-endpoint totals are kept for stats().
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.headers = False
+        self.n_plus_one_threshold = 5
+        self._endpoints = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('QUERY_STATS_ENABLED', True)
+        self.headers = app.config.get('QUERY_STATS_HEADERS', False)
+        self.n_plus_one_threshold = app.config.get('QUERY_STATS_N_PLUS_ONE_THRESHOLD', 5)
+        self._endpoints = {}
+        app.before_request(self.start)
+        app.after_request(self.finish)
+        app.teardown_request(self.stop)
+        app.extensions['query_stats'] = self
+
+    @staticmethod
+    def _empty_stats():
+        return {'requests': 0, 'queries': 0, 'seconds': 0.0, 'max_queries': 0, 'n_plus_one': 0}
+
+    def start(self):
+        if self.enabled:
+            g.query_recorder = QueryRecorder()
+            push_recorder(g.query_recorder)
+
+    def finish(self, response):
+        recorder = g.get('query_recorder')
+        if recorder is None:
+            return response
+        repeated = recorder.repeated(self.n_plus_one_threshold)
+        for shape, count in repeated:
+            current_app.logger.warning(
+                f'Likely N+1 in {request.method} {request.path}: {count} x {preview(shape)}'
+            )
+
+        # Counters are per worker and updated without a lock; they are metrics, not limits
+        stats = self._endpoints.setdefault(request.endpoint or '<unmatched>', self._empty_stats())
+        stats['requests'] += 1
+        stats['queries'] += recorder.count
+        stats['seconds'] += recorder.seconds
+        stats['max_queries'] = max(stats['max_queries'], recorder.count)
+        stats['n_plus_one'] += bool(repeated)
+
+        if self.headers:
+            db_ms = round(recorder.seconds * 1000, 2)
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers['X-Query-Time-Ms'] = str(db_ms)
+            response.headers.add('Server-Timing', f'db;dur={db_ms};desc="{recorder.count} queries"')
+            if repeated:
+                response.headers['X-Query-N-Plus-One'] = ' | '.join(
+                    f'{count}x {preview(shape)}' for shape, count in repeated
+                )
+        return response
+
+    def stop(self, exc=None):
+        recorder = g.pop('query_recorder', None)
+        if recorder is not None:
+            pop_recorder(recorder)
+
+    def stats(self):
+        result = {}
+        for endpoint, stats in sorted(self._endpoints.items()):
+            requests = stats['requests']
+            result[endpoint] = {
+                'requests': requests,
+                'avg_queries': round(stats['queries'] / requests, 1),
+                'max_queries': stats['max_queries'],
+                'avg_db_ms': round(stats['seconds'] / requests * 1000, 2),
+                'n_plus_one': stats['n_plus_one']
+            }
+        return {'enabled': self.enabled, 'n_plus_one_threshold': self.n_plus_one_threshold, 'endpoints': result}
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@contextmanager
+def query_budget(max_queries, max_repeats=None):
+    """
+    Fail with QueryBudgetExceeded if the block runs more than
+    ``max_queries`` statements, or (with ``max_repeats``) any one statement
+    shape more than ``max_repeats`` times. Requests made through the test
+    client inside the block count towards it.
+
+        with query_budget(3, max_repeats=1):
+            client.get('/api/products')
+    """
+    recorder = QueryRecorder()
+    push_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        pop_recorder(recorder)
+
+    problems = []
+    if recorder.count > max_queries:
+        problems.append(f'{recorder.count} queries, budget {max_queries}')
+    if max_repeats is not None:
+        problems += [
+            f'{count} x {preview(shape)}' for shape, count in recorder.repeated(max_repeats + 1)
+        ]
+    if problems:
+        summary = '\n'.join(f'  {count} x {preview(shape)}' for shape, count in recorder.shapes.most_common(10))
+        raise QueryBudgetExceeded('Query budget exceeded: ' + '; '.join(problems) + '\nMost run:\n' + summary)
@@ -0,0 +1,179 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+DEFAULT_POLICIES = {
+    # capacity is the burst size, refill_rate is tokens per second
+    'login': {'capacity': 10, 'refill_rate': 10 / 60, 'key': 'ip'},
+    'search': {'capacity': 30, 'refill_rate': 2, 'key': 'identity'},
+    'checkout': {'capacity': 5, 'refill_rate': 5 / 60, 'key': 'identity'},
+}
+
+class MemoryBucketStore:
+    """
+    Per-worker token buckets kept in an LRU dict guarded by a lock. When
+    full, the least recently used bucket goes: the one likeliest to have
+    refilled, and the only client whose limit resets.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                while len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+                self._buckets.move_to_end(key)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = [tokens, now, capacity, refill_rate]
+            return allowed, tokens
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class RedisBucketStore:
+    """
+    Token buckets shared by every worker through Redis, updated atomically
+    with a Lua script so limits hold across gunicorn workers and hosts
+    """
+
+    SCRIPT = """
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, refill_rate, now):
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[capacity, refill_rate, now])
+        return bool(allowed), float(tokens)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with named per-route policies
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        self.policies = {}
+        self.enabled = True
+        self._stats = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        self.policies = dict(DEFAULT_POLICIES)
+        self.policies.update(app.config.get('RATELIMIT_POLICIES') or {})
+
+        storage_url = app.config.get('RATELIMIT_STORAGE_URL') or 'memory://'
+        if storage_url.startswith('memory://'):
+            self.store = MemoryBucketStore(app.config.get('RATELIMIT_MAX_KEYS', 100000))
+        elif storage_url.startswith(('redis://', 'rediss://', 'unix://')):
+            self.store = RedisBucketStore(storage_url)
+        else:
+            raise ValueError(f'Unsupported RATELIMIT_STORAGE_URL: {storage_url}')
+
+        self._stats = {name: self._empty_stats() for name in self.policies}
+        app.extensions['rate_limiter'] = self
+
+    @staticmethod
+    def _empty_stats():
+        return {'allowed': 0, 'limited': 0, 'overhead_ns': 0}
+
+    def client_key(self, policy):
+        if policy.get('key') == 'identity':
+            try:
+                verify_jwt_in_request(optional=True)
+                identity = get_jwt_identity()
+            except Exception:
+                identity = None
+            if identity is not None:
+                return f'user:{identity}'
+        return f'ip:{request.remote_addr}'
+
+    def hit(self, name):
+        """
+        Consume one token from the caller's bucket for policy ``name``.
+        Returns (allowed, retry_after_seconds).
+        """
+        started = time.perf_counter_ns()
+        policy = self.policies[name]
+        key = f'{name}:{self.client_key(policy)}'
+        allowed, tokens = self.store.take(key, policy['capacity'], policy['refill_rate'], time.time())
+
+        retry_after = 0 if allowed else math.ceil((1 - tokens) / policy['refill_rate'])
+
+        # Counters are per worker and updated without a lock; they are metrics, not limits
+        stats = self._stats.setdefault(name, self._empty_stats())
+        stats['allowed' if allowed else 'limited'] += 1
+        stats['overhead_ns'] += time.perf_counter_ns() - started
+        return allowed, retry_after
+
+    def stats(self):
+        result = {}
+        for name, stats in self._stats.items():
+            checks = stats['allowed'] + stats['limited']
+            result[name] = {
+                'allowed': stats['allowed'],
+                'limited': stats['limited'],
+                'avg_overhead_us': round(stats['overhead_ns'] / checks / 1000, 2) if checks else 0
+            }
+        return result
+
+    def reset(self):
+        self.store.clear()
+        self._stats = {name: self._empty_stats() for name in self.policies}
+
+def rate_limit(policy_name, when=None):
+    """
+    Decorator to apply a named token-bucket policy to a resource method.
+    ``when`` is an optional predicate; the policy only applies if it returns True.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter and limiter.enabled and (when is None or when()):
+                allowed, retry_after = limiter.hit(policy_name)
+                if not allowed:
+                    return {'message': 'Too many requests'}, 429, {'Retry-After': str(retry_after)}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
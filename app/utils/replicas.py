@@ -0,0 +1,204 @@
+import itertools
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from app.utils.database import engine_options, install_engine_hooks
+
+def request_client_key():
+    """
+    Identify the caller: the JWT identity when a token is present, else the IP
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if identity is not None:
+        return f'user:{identity}'
+    return f'ip:{request.remote_addr}'
+
+class Replica:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.retry_at = 0
+        self.failures = 0
+        self.reads = 0
+
+class MemoryWriteTracker:
+    """
+    When each client last wrote, per worker. A client whose next read lands
+    on another worker within the window may see replica lag.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._writes = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key, now):
+        with self._lock:
+            if len(self._writes) >= self.max_keys:
+                self._writes.clear()
+            self._writes[key] = now
+
+    def last_write(self, key):
+        return self._writes.get(key, 0)
+
+class ReplicaRouter:
+    """
+    Routes reads in ``read_only`` handlers to replica engines, round-robin
+    over the healthy ones. Everything else, including any request that has
+    flushed a write and any client inside its read-your-writes window, uses
+    the primary.
+    """
+
+    def __init__(self, app=None):
+        self.replicas = []
+        self.window = 5
+        self.retry_interval = 10
+        self.tracker = MemoryWriteTracker()
+        self._cycle = None
+        self._lock = threading.Lock()
+        self._stats = {'replica_reads': 0, 'primary_reads': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.window = app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5)
+        self.retry_interval = app.config.get('REPLICA_RETRY_INTERVAL', 10)
+        self.tracker = MemoryWriteTracker()
+        self._stats = {'replica_reads': 0, 'primary_reads': 0}
+        self.replicas = []
+        for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+            engine = create_engine(uri, **engine_options(uri, app.config))
+            install_engine_hooks(engine, app.config)
+            replica = Replica(f'replica{index}', engine)
+            self._watch(replica)
+            self.replicas.append(replica)
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        app.extensions['replica_router'] = self
+
+    def _watch(self, replica):
+        @event.listens_for(replica.engine, 'handle_error')
+        def on_error(context):
+            # Disconnects and failed connects; query errors say nothing about health
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica, context.original_exception)
+
+    def mark_down(self, replica, error=None):
+        with self._lock:
+            replica.healthy = False
+            replica.failures += 1
+            replica.retry_at = time.monotonic() + self.retry_interval
+        current_app.logger.warning(f'Replica {replica.name} marked down: {str(error)}')
+
+    def _probe(self, replica):
+        try:
+            with replica.engine.connect() as connection:
+                connection.exec_driver_sql('SELECT 1')
+        except Exception as e:
+            self.mark_down(replica, e)
+            return False
+        replica.healthy = True
+        return True
+
+    def choose(self):
+        """
+        Next healthy replica, re-probing one whose retry time has passed.
+        Returns None when none is available.
+        """
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = next(self._cycle)
+            if replica.healthy:
+                return replica
+            if time.monotonic() >= replica.retry_at and self._probe(replica):
+                return replica
+        return None
+
+    def mark_write(self):
+        if has_request_context():
+            g.db_wrote = True
+            if self.replicas:
+                self.tracker.mark(request_client_key(), time.monotonic())
+
+    def replica_engine(self):
+        """
+        Engine for reads in the current request, or None for the primary.
+        A request sticks to the replica it picked first.
+        """
+        if not self.replicas or not has_request_context():
+            return None
+        if not g.get('db_read_only') or g.get('db_wrote'):
+            return None
+
+        if 'db_replica' not in g:
+            replica = None
+            if time.monotonic() - self.tracker.last_write(request_client_key()) > self.window:
+                replica = self.choose()
+            g.db_replica = replica
+            self._stats['replica_reads' if replica else 'primary_reads'] += 1
+            if replica:
+                replica.reads += 1
+
+        return g.db_replica.engine if g.db_replica else None
+
+    def dispose(self, close=True):
+        for replica in self.replicas:
+            replica.engine.dispose(close=close)
+
+    def stats(self):
+        return dict(self._stats, replicas=[{
+            'name': replica.name,
+            'healthy': replica.healthy,
+            'failures': replica.failures,
+            'reads': replica.reads
+        } for replica in self.replicas])
+
+class RoutingSession(Session):
+    """
+    db.session class that sends reads to a replica when the ReplicaRouter
+    allows it. Flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            router = current_app.extensions.get('replica_router')
+            engine = router.replica_engine() if router else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session, flush_context):
+    router = current_app.extensions.get('replica_router')
+    if router:
+        router.mark_write()
+
+def read_only(f):
+    """
+    Decorator for handlers that only read; their queries may be served by a
+    replica. Put it outermost so auth lookups are routed too. If the
+    request's replica goes down under it, the handler is run again on the
+    primary.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        try:
+            return f(*args, **kwargs)
+        except DBAPIError:
+            replica = g.get('db_replica')
+            if replica is None or replica.healthy:
+                raise
+            current_app.extensions['sqlalchemy'].session.rollback()
+            g.db_replica = None
+            return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,145 @@
+import os
+import queue
+import threading
+import time
+
+class Task:
+    def __init__(self, fn, args, kwargs, max_retries, on_failure):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.max_retries = max_retries
+        self.on_failure = on_failure
+        self.attempts = 0
+
+    @property
+    def name(self):
+        return getattr(self.fn, '__name__', repr(self.fn))
+
+class TaskQueue:
+    """
+    In-process background queue with retries and exponential backoff.
+
+    Tasks run on daemon threads inside an app context, so they can use
+    ``db.session`` like a request would. Threads start on first use and are
+    restarted after fork, which keeps it safe with gunicorn's preload_app.
+    With TASK_QUEUE_EAGER set, tasks run synchronously in the caller.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.eager = False
+        self.workers = 2
+        self.max_retries = 3
+        self.retry_backoff = 1.0
+        self._queue = queue.Queue()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._stats = {'enqueued': 0, 'completed': 0, 'retried': 0, 'failed': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.eager = app.config.get('TASK_QUEUE_EAGER', False)
+        self.workers = app.config.get('TASK_QUEUE_WORKERS', 2)
+        self.max_retries = app.config.get('TASK_QUEUE_MAX_RETRIES', 3)
+        self.retry_backoff = app.config.get('TASK_QUEUE_RETRY_BACKOFF', 1.0)
+        app.extensions['task_queue'] = self
+
+    def enqueue(self, fn, *args, max_retries=None, on_failure=None, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the background. ``on_failure(exc, *args, **kwargs)``
+        is called once retries are exhausted.
+        """
+        task = Task(fn, args, kwargs, self.max_retries if max_retries is None else max_retries, on_failure)
+        with self._lock:
+            self._stats['enqueued'] += 1
+            self._pending += 1
+
+        if self.eager:
+            while self._run(task):
+                pass
+            return
+
+        self._ensure_workers()
+        self._queue.put(task)
+
+    def wait(self, timeout=None):
+        """
+        Block until every enqueued task (including pending retries) has finished
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=self._pending)
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads and queued tasks do not survive fork
+                self._queue = queue.Queue()
+                self._threads = []
+                self._pid = os.getpid()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name='task-queue', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            retry = self._run(task)
+            if retry:
+                delay = self.retry_backoff * 2 ** (task.attempts - 1)
+                timer = threading.Timer(delay, self._queue.put, [task])
+                timer.daemon = True
+                timer.start()
+
+    def _run(self, task):
+        """
+        Run one attempt of a task. Returns True if it should be retried.
+        """
+        task.attempts += 1
+        try:
+            with self.app.app_context():
+                task.fn(*task.args, **task.kwargs)
+        except Exception as e:
+            if task.attempts <= task.max_retries:
+                self.app.logger.warning(f'Task {task.name} failed (attempt {task.attempts}), retrying: {str(e)}')
+                with self._lock:
+                    self._stats['retried'] += 1
+                return True
+
+            self.app.logger.error(f'Task {task.name} failed after {task.attempts} attempts: {str(e)}')
+            if task.on_failure:
+                try:
+                    with self.app.app_context():
+                        task.on_failure(e, *task.args, **task.kwargs)
+                except Exception as callback_error:
+                    self.app.logger.error(f'Failure callback for {task.name} raised: {str(callback_error)}')
+            self._finish('failed')
+            return False
+
+        self._finish('completed')
+        return False
+
+    def _finish(self, outcome):
+        with self._idle:
+            self._stats[outcome] += 1
+            self._pending -= 1
+            self._idle.notify_all()
@@ -0,0 +1,137 @@
+"""
+Load test for cache stampedes: many clients hit one key whose value takes
+a while to compute, right as it expires.
+
+    python benchmarks/cache_stampede.py [workers] [threads] [load_ms]
+
+Each scenario starts ``workers`` processes sharing a SQLite cache tier, with
+``threads`` threads each, all missing the same key at once. It reports how
+many times the loader ran and the slowest request:
+
+- naive    : get(), then load and set() on a miss, as callers did before
+- coalesced: get_or_set(), one load per key across every worker
+
+The last two scenarios keep up steady traffic for a few TTLs on a key
+that expires every second, without and with early refresh, and report the
+requests that had to wait for another request's load.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.utils.cache import Cache
+
+def make_cache(path, beta=1.0):
+    app = Flask(__name__)
+    app.config.update(CACHE_URL=f'sqlite:///{path}', CACHE_LOCK_TIMEOUT=5, CACHE_EARLY_REFRESH_BETA=beta)
+    return Cache(app)
+
+def make_loader(loads, load_ms, ran=None):
+    def loader():
+        if ran is not None:
+            ran.loaded = True
+        with loads.get_lock():
+            loads.value += 1
+        time.sleep(load_ms / 1000)
+        return {'products': list(range(50))}
+    return loader
+
+def request(cache, mode, loader, ttl):
+    if mode == 'naive':
+        value = cache.get('products:page=1')
+        if value is None:
+            value = loader()
+            cache.set('products:page=1', value, ttl)
+        return value
+    return cache.get_or_set('products:page=1', loader, ttl)
+
+def burst(path, mode, threads, load_ms, loads, start, latencies):
+    cache = make_cache(path)
+    loader = make_loader(loads, load_ms)
+    slowest = []
+
+    def client():
+        start.wait()
+        started = time.perf_counter()
+        request(cache, mode, loader, 60)
+        slowest.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=client) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    latencies.put(max(slowest))
+
+def steady(path, beta, threads, load_ms, loads, seconds, waits):
+    cache = make_cache(path, beta)
+    ran = threading.local()
+    loader = make_loader(loads, load_ms, ran)
+    waited = [0]
+    deadline = time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < deadline:
+            ran.loaded = False
+            started = time.perf_counter()
+            request(cache, 'coalesced', loader, 1)
+            if not ran.loaded and time.perf_counter() - started >= load_ms / 2000:
+                waited[0] += 1
+            time.sleep(0.005)
+
+    pool = [threading.Thread(target=client) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    waits.put(waited[0])
+
+def run(target, args, workers):
+    processes = [multiprocessing.Process(target=target, args=args) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def bench_burst(mode, workers, threads, load_ms):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.db')
+        make_cache(path)  # create the schema before the workers race for it
+        loads, start, latencies = multiprocessing.Value('i', 0), multiprocessing.Event(), multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=burst, args=(path, mode, threads, load_ms, loads, start, latencies))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        time.sleep(0.5)
+        start.set()
+        slowest = max(latencies.get() for _ in processes)
+        for process in processes:
+            process.join()
+        print(f'{mode:<10}: {loads.value:>4} loads for {workers * threads} requests, slowest {slowest * 1000:.0f} ms')
+
+def bench_steady(beta, workers, threads, load_ms, seconds=5):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.db')
+        make_cache(path)
+        loads, waits = multiprocessing.Value('i', 0), multiprocessing.Queue()
+        run(steady, (path, beta, threads, load_ms, loads, seconds, waits), workers)
+        waited = sum(waits.get() for _ in range(workers))
+        label = f'beta={beta}'
+        print(f'{label:<10}: {loads.value:>4} loads over {seconds}s, {waited} requests waited on a load')
+
+if __name__ == '__main__':
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    load_ms = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    bench_burst('naive', workers, threads, load_ms)
+    bench_burst('coalesced', workers, threads, load_ms)
+    bench_steady(0, workers, threads // 4 or 1, load_ms)
+    bench_steady(1.0, workers, threads // 4 or 1, load_ms)
@@ -0,0 +1,82 @@
+"""
+Time the compiled serializers against marshmallow.
+
+    python benchmarks/compiled_serializers.py [--repeat 30]
+
+Speed on a 100-product page and a 50-order page (3 items each):
+serializer only, on plain objects, so relationship queries are excluded;
+then end to end on ORM objects from a seeded in-memory database.
+tests/test_compiled_schemas.py checks the output matches on random objects.
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from marshmallow import fields
+from app import create_app, db
+from app.models import Product, Order
+from app.schemas import ProductSchema, OrderSchema
+from app.schemas.compiled import compile_schema
+from app.utils.json_encoding import dumps
+from json_encoding import seed  # benchmarks/json_encoding.py
+
+def snapshot(obj, schema):
+    """
+    Plain copy of the attributes schema dumps, recursively
+    """
+    copy = SimpleNamespace(image_variants=getattr(obj, 'image_variants', None))
+    for name, field in schema.dump_fields.items():
+        if isinstance(field, fields.Method):
+            continue
+        attribute = field.attribute or name
+        value = getattr(obj, attribute)
+        if isinstance(field, fields.Nested) and value is not None:
+            if field.many or field.schema.many:
+                value = [snapshot(item, field.schema) for item in value]
+            else:
+                value = snapshot(value, field.schema)
+        setattr(copy, attribute, value)
+    return copy
+
+def best(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def compare(name, schema_cls, objects, repeat):
+    schema, compiled = schema_cls(many=True), compile_schema(schema_cls)
+    assert dumps(schema.dump(objects)) == dumps(compiled.dump(objects, many=True))
+    marshmallow_ms = best(lambda: schema.dump(objects), repeat)
+    compiled_ms = best(lambda: compiled.dump(objects, many=True), repeat)
+    print(f'{name:<34}{marshmallow_ms:>12.2f}{compiled_ms:>12.2f}{marshmallow_ms / compiled_ms:>9.1f}x')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed()
+        products = Product.query.order_by(Product.id).all()
+        orders = Order.query.order_by(Order.id).all()
+
+        print(f"{'page':<34}{'marshmallow':>12}{'compiled':>12}{'speedup':>10}")
+        compare('100 products (serializer only)', ProductSchema,
+                [snapshot(product, ProductSchema()) for product in products], args.repeat)
+        compare('50 orders (serializer only)', OrderSchema,
+                [snapshot(order, OrderSchema()) for order in orders], args.repeat)
+        compare('100 products (ORM, with queries)', ProductSchema, products, max(3, args.repeat // 5))
+        compare('50 orders (ORM, with queries)', OrderSchema, orders, max(3, args.repeat // 5))
+
+if __name__ == '__main__':
+    main()
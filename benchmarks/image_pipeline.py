@@ -0,0 +1,138 @@
+"""
+Benchmark the product image pipeline over a corpus of large JPEGs.
+
+    python benchmarks/image_pipeline.py [--images 8] [--megapixels 20] [--corpus DIR]
+
+Each variant runs in a fresh subprocess so peak RSS is measured in
+isolation:
+
+  baseline   full decode, LANCZOS thumbnail, one optimized JPEG (the original code)
+  draft      app.services.image_service.render_variants inline: draft-mode
+             decode, every IMAGE_VARIANTS size in every VARIANT_FORMATS format
+  pool       render_variants on a 2-process ProcessPoolExecutor
+
+Without --corpus, synthetic photo-sized JPEGs are generated first.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def make_corpus(directory, count, megapixels):
+    from PIL import Image, ImageDraw
+    width = int((megapixels * 1_000_000 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    paths = []
+    for i in range(count):
+        image = Image.effect_noise((width, height), 40 + i).convert('RGB')
+        draw = ImageDraw.Draw(image)
+        for x in range(0, width, 97):
+            draw.line([(x, 0), (width - x, height)], fill=(x % 255, (x * 3) % 255, 120), width=9)
+        path = os.path.join(directory, f'photo_{i}.jpg')
+        image.save(path, format='JPEG', quality=92)
+        paths.append(path)
+    return paths
+
+def baseline(data):
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    max_size = (1200, 1200)
+    if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    if image.mode in ('RGBA', 'P'):
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+def peak_rss_kb():
+    # VmHWM is per address space, unlike ru_maxrss which survives fork/exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def peak_rss_kb_probe(_):
+    time.sleep(0.05)
+    return peak_rss_kb()
+
+def run_variant(variant, paths):
+    from app.services.image_service import render_variants
+    pool = None
+    if variant == 'pool':
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=2)
+        pool.submit(int).result()  # start workers outside the timed region
+
+    latencies = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        started = time.perf_counter()
+        if variant == 'baseline':
+            baseline(data)
+        elif variant == 'draft':
+            render_variants(data)
+        else:
+            pool.submit(render_variants, data).result()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    child_rss = 0
+    if pool:
+        child_rss = max(pool.map(peak_rss_kb_probe, range(8)))
+        pool.shutdown()
+    rss = peak_rss_kb()
+    return {
+        'variant': variant,
+        'p50_ms': round(statistics.median(latencies), 1),
+        'max_ms': round(max(latencies), 1),
+        'peak_rss_mb': round(rss / 1024, 1),
+        'peak_child_rss_mb': round(child_rss / 1024, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=8)
+    parser.add_argument('--megapixels', type=float, default=20)
+    parser.add_argument('--corpus')
+    parser.add_argument('--variant', help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.paths)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                           if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')))
+        else:
+            paths = make_corpus(tmp, args.images, args.megapixels)
+
+        print(f'{len(paths)} images')
+        print(f'{"variant":<10} {"p50 ms":>8} {"max ms":>8} {"peak RSS MB":>12} {"child RSS MB":>13}')
+        for variant in ('baseline', 'draft', 'pool'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--variant', variant, *paths],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f'{result["variant"]:<10} {result["p50_ms"]:>8} {result["max_ms"]:>8} '
+                  f'{result["peak_rss_mb"]:>12} {result["peak_child_rss_mb"]:>13}')
+
+if __name__ == '__main__':
+    main()
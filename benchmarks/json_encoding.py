@@ -0,0 +1,123 @@
+"""
+Serialization time for a 100-item product page and a 50-order history page.
+
+    python benchmarks/json_encoding.py [--repeat 50]
+
+before  marshmallow converts Decimal/DateTime in Python, then stdlib
+        json.dumps with default=str (Flask-RESTful's encoder cannot encode
+        Decimal at all, so this is the cheapest working baseline)
+after   the schemas pass Decimal/datetime through and orjson encodes them
+
+Each stage (schema dump, JSON encode) is timed separately; the best of
+--repeat runs is reported. Both modes must produce the same JSON document.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from marshmallow import fields
+from app import create_app, db
+from app.models import User, Product, Category, Order
+from app.models.order import OrderItem
+from app.schemas import ProductSchema, OrderSchema
+from app.schemas.base import NativeDateTime, NativeDecimal
+from app.utils.json_encoding import dumps
+
+@contextlib.contextmanager
+def python_conversions():
+    """
+    Temporarily restore marshmallow's own Decimal/DateTime dumping
+    """
+    native = NativeDateTime._serialize, NativeDecimal._serialize
+    NativeDateTime._serialize, NativeDecimal._serialize = fields.DateTime._serialize, fields.Decimal._serialize
+    try:
+        yield
+    finally:
+        NativeDateTime._serialize, NativeDecimal._serialize = native
+
+def seed():
+    seller = User(username='seller', email='seller@example.com', role='seller')
+    customer = User(username='customer', email='customer@example.com')
+    seller.set_password('password')
+    customer.set_password('password')
+    categories = [Category(name=name.title(), slug=name) for name in ('rings', 'necklaces', 'earrings')]
+    db.session.add_all([seller, customer] + categories)
+    db.session.commit()
+
+    products = []
+    for i in range(100):
+        product = Product(title=f'Product {i}', description='Solid gold', price=Decimal('100.00') + i,
+                          weight=Decimal('3.25'), sku=f'SKU-{i}', inventory_count=10, seller_id=seller.id)
+        product.categories.append(categories[i % len(categories)])
+        products.append(product)
+    db.session.add_all(products)
+    db.session.commit()
+
+    for i in range(50):
+        items = [OrderItem(product_id=products[(i + j) % 100].id, product_title='Product', product_sku='SKU',
+                           quantity=1, unit_price=Decimal('100.00'), total_price=Decimal('100.00'))
+                 for j in range(3)]
+        order = Order(order_number=f'GC{i:06d}', customer_id=customer.id, subtotal=Decimal('300.00'),
+                      tax_amount=Decimal('24.00'), shipping_amount=Decimal('0.00'), total_amount=Decimal('324.00'),
+                      shipping_first_name='A', shipping_last_name='B', shipping_address_line1='1 Main St',
+                      shipping_city='Nairobi', shipping_state='Nairobi', shipping_postal_code='00100',
+                      shipping_country='KE', shipped_at=datetime.datetime.utcnow(), items=items)
+        db.session.add(order)
+    db.session.commit()
+
+def best(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+def measure(name, schema, objects, key, repeat):
+    def page():
+        return {key: schema.dump(objects), 'pagination': {'page': 1, 'per_page': len(objects), 'total': len(objects)}}
+
+    with python_conversions():
+        before_dump_ms, data = best(page, repeat)
+        before_encode_ms, before = best(lambda: json.dumps(data, default=str).encode(), repeat)
+    after_dump_ms, data = best(page, repeat)
+    after_encode_ms, after = best(lambda: dumps(data), repeat)
+    assert json.loads(before) == json.loads(after), f'{name}: output differs'
+
+    before_ms, after_ms = before_dump_ms + before_encode_ms, after_dump_ms + after_encode_ms
+    print(f'{name:<24}{before_dump_ms:>9.2f}{before_encode_ms:>9.2f}{before_ms:>9.2f}'
+          f'{after_dump_ms:>9.2f}{after_encode_ms:>9.2f}{after_ms:>9.2f}{before_ms / after_ms:>8.2f}x'
+          f'{len(after) / 1024:>8.1f}')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed()
+        products = Product.query.order_by(Product.id).all()
+        orders = Order.query.order_by(Order.id).all()
+        # Warm up; dynamic relationships and rating aggregates still query
+        # during every dump, in both modes, as they do in the API
+        ProductSchema(many=True).dump(products)
+        OrderSchema(many=True).dump(orders)
+
+        print(f"{'':<24}{'before (ms)':^27}{'after (ms)':^27}")
+        print(f"{'page':<24}{'dump':>9}{'encode':>9}{'total':>9}{'dump':>9}{'encode':>9}{'total':>9}"
+              f"{'speedup':>9}{'KiB':>8}")
+        measure('100 products', ProductSchema(many=True), products, 'products', args.repeat)
+        measure('50 orders', OrderSchema(many=True), orders, 'orders', args.repeat)
+
+if __name__ == '__main__':
+    main()
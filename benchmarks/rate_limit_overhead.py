@@ -0,0 +1,38 @@
+"""
+Measure the per-request overhead of the token-bucket rate limiter.
+
+    python benchmarks/rate_limit_overhead.py [iterations]
+
+Reports the cost of a bare bucket update and of a full ``limiter.hit``
+(key derivation included) in microseconds.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app, limiter
+from app.utils.rate_limit import MemoryBucketStore
+
+def bench_store(iterations):
+    store = MemoryBucketStore()
+    started = time.perf_counter()
+    for i in range(iterations):
+        store.take(f'search:ip:10.0.{i % 256}.{i % 97}', 30, 2, time.time())
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def bench_hit(app, iterations):
+    limiter.policies['bench'] = {'capacity': iterations, 'refill_rate': 1, 'key': 'ip'}
+    with app.test_request_context('/api/products?search=ring', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            limiter.hit('bench')
+        return (time.perf_counter() - started) / iterations * 1e6
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = create_app()
+    print(f'bucket update : {bench_store(iterations):.2f} us/op')
+    print(f'limiter.hit   : {bench_hit(app, iterations):.2f} us/op')
@@ -0,0 +1,159 @@
+"""
+Load test the catalog endpoints under gunicorn with each worker class.
+
+    python benchmarks/server_workers.py [--classes sync gthread gevent]
+                                        [--clients 32] [--duration 15]
+
+Each class runs gunicorn.conf.py unchanged apart from GUNICORN_WORKER_CLASS,
+against a seeded SQLite database in a temp dir, so worker and thread counts
+follow this machine's CPU count. Clients are threads with keep-alive
+connections cycling through product list, filtered list, detail and
+categories. Classes whose module is not installed (gevent) are skipped.
+The load generator shares the machine, so compare classes, not absolutes.
+"""
+import argparse
+import http.client
+import importlib.util
+import itertools
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED = """
+from app import create_app, db
+from app.models import User, Product, Category
+app = create_app('production')
+with app.app_context():
+    db.create_all()
+    seller = User(username='seller', email='seller@example.com', role='seller')
+    seller.set_password('password')
+    categories = [Category(name=name.title(), slug=name) for name in ('rings', 'necklaces', 'earrings')]
+    db.session.add_all([seller] + categories)
+    db.session.commit()
+    for i in range({products}):
+        product = Product(title=f'Product {{i}}', description='Solid gold', price=100 + i, sku=f'SKU-{{i}}',
+                          inventory_count=10, seller_id=seller.id)
+        product.categories.append(categories[i % len(categories)])
+        db.session.add(product)
+    db.session.commit()
+"""
+
+def catalog_paths(products):
+    return [
+        '/api/products?page=1&per_page=20',
+        '/api/products?category=rings&per_page=20',
+        *[f'/api/products/{product_id}' for product_id in (1, products // 2, products)],
+        '/api/categories',
+    ]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/categories')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not start on port {port}')
+
+def client(port, paths, stop, results):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    for path in itertools.cycle(paths):
+        if stop.is_set():
+            break
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.append((latencies, errors))
+
+def run_class(worker_class, env, paths, clients, duration):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=dict(env, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_BIND=f'127.0.0.1:{port}'),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(port)
+        stop, results = threading.Event(), []
+        threads = [threading.Thread(target=client, args=(port, paths, stop, results)) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    latencies = sorted(latency for latencies, _ in results for latency in latencies)
+    errors = sum(errors for _, errors in results)
+    if not latencies:
+        return {'rps': 0, 'p50_ms': 0, 'p99_ms': 0, 'errors': errors}
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'errors': errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', nargs='+', default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--products', type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='gemcart-load-')
+    env = dict(
+        os.environ,
+        FLASK_CONFIG='production',
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'load.db'),
+        RATELIMIT_ENABLED='false',
+        GUNICORN_ACCESS_LOG='/dev/null',
+        GUNICORN_LOG_LEVEL='warning',
+    )
+    subprocess.run([sys.executable, '-c', SEED.format(products=args.products)], cwd=ROOT, env=env, check=True)
+
+    paths = catalog_paths(args.products)
+    print(f'{os.cpu_count()} CPUs, {args.clients} clients, {args.duration:.0f}s per class')
+    print(f"{'class':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>10}")
+    for worker_class in args.classes:
+        if worker_class in ('gevent', 'eventlet') and importlib.util.find_spec(worker_class) is None:
+            print(f'{worker_class:<10}  skipped ({worker_class} not installed)')
+            continue
+        result = run_class(worker_class, env, paths, args.clients, args.duration)
+        print(f"{worker_class:<10}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['errors']:>10}")
+
+if __name__ == '__main__':
+    main()
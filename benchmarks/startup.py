@@ -0,0 +1,94 @@
+"""
+Track app startup cost against the budget in benchmarks/startup_budget.json.
+
+    python benchmarks/startup.py [--runs 5] [--top 15] [--no-check]
+
+Each run is a fresh interpreter (what a gunicorn worker recycle pays):
+
+  import_ms         ``from app import create_app; create_app()``
+  first_request_ms  the above plus the first GET /api/categories
+
+The slowest modules from ``python -X importtime`` are listed so regressions
+can be traced to the import that caused them. Exits non-zero when the best run
+exceeds its budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+PROBE = """
+import time
+started = time.perf_counter()
+from app import create_app, db
+app = create_app()
+created = time.perf_counter()
+with app.app_context():
+    db.create_all()
+response = app.test_client().get('/api/categories')
+assert response.status_code == 200, response.status_code
+finished = time.perf_counter()
+print((created - started) * 1000, (finished - started) * 1000)
+"""
+
+def probe_env():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    return env
+
+def measure(runs):
+    import_ms, first_request_ms = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=ROOT, env=probe_env(),
+            check=True, capture_output=True, text=True
+        ).stdout
+        created, finished = map(float, output.split())
+        import_ms.append(created)
+        first_request_ms.append(finished)
+    return min(import_ms), min(first_request_ms)
+
+def slowest_imports(top):
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+        cwd=ROOT, env=probe_env(), check=True, capture_output=True, text=True
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level imports and their direct children (indented two spaces)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--no-check', action='store_true', help='report without enforcing the budget')
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE) as f:
+        budget = json.load(f)
+
+    import_ms, first_request_ms = measure(args.runs)
+    print(f'import + create_app : {import_ms:8.1f} ms (budget {budget["import_ms"]} ms)')
+    print(f'first request       : {first_request_ms:8.1f} ms (budget {budget["first_request_ms"]} ms)')
+    print('\nslowest top-level imports (cumulative ms):')
+    for cumulative, name in slowest_imports(args.top):
+        print(f'  {cumulative:8.1f}  {name}')
+
+    over = import_ms > budget['import_ms'] or first_request_ms > budget['first_request_ms']
+    if over and not args.no_check:
+        print('\nstartup budget exceeded')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -3,18 +3,147 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///gemcart.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Database engine profile (app/utils/database.py); SQLALCHEMY_ENGINE_OPTIONS overrides it
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = 10
+    DB_POOL_RECYCLE = 1800
+    DB_POOL_PRE_PING = True
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))  # Postgres; 0 disables
+    DB_WORK_MEM = os.environ.get('DB_WORK_MEM')  # Postgres, e.g. '16MB'
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS = 5000
+    
+    # Read replicas for read_only handlers (comma-separated URIs; empty keeps all reads on the primary)
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri]
+    REPLICA_READ_YOUR_WRITES_SECONDS = 5  # a client's reads stay on the primary this long after it writes
+    REPLICA_RETRY_INTERVAL = 10  # seconds before a failed replica is probed again
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = False
     
+    # Startup: Swagger UI/spec can be turned off; Flask-Migrate is only set up
+    # under the flask CLI unless MIGRATE_ENABLED is forced on
+    SWAGGER_ENABLED = os.environ.get('SWAGGER_ENABLED', 'true').lower() == 'true'
+    # dynamic parses docstrings with flasgger; static serves OPENAPI_SPEC_PATH,
+    # written by `flask openapi generate` and verified by `flask openapi check`
+    SWAGGER_MODE = os.environ.get('SWAGGER_MODE', 'dynamic')
+    OPENAPI_SPEC_PATH = os.environ.get('OPENAPI_SPEC_PATH') or os.path.join(basedir, 'openapi.json')
+    MIGRATE_ENABLED = None
+    
+    # Proxies in front of the app whose X-Forwarded-For/-Proto/-Host are
+    # trusted. 0 uses the socket address; set it to the number of proxies
+    # (1 for nginx alone), never more, or clients can spoof their address
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+    
+    # Rate limiting (memory:// is per worker; use redis:// to share limits across workers)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL') or 'memory://'
+    RATELIMIT_POLICIES = {}
+    
+    # Load shedding (app/utils/load_shedding.py), per worker. Requests over a
+    # budget get an immediate 503: low priority (search, sync, admin
+    # analytics) first, normal next, critical (checkout, login) never.
+    # Queue time comes from LOAD_SHEDDING_QUEUE_HEADER, e.g. nginx
+    # `proxy_set_header X-Request-Start "t=${msec}";`; gunicorn.conf.py stamps
+    # it at accept under gthread when the proxy does not. Keep the low
+    # in-flight budget below GUNICORN_THREADS.
+    LOAD_SHEDDING_ENABLED = os.environ.get('LOAD_SHEDDING_ENABLED', 'true').lower() == 'true'
+    LOAD_SHEDDING_QUEUE_HEADER = 'X-Request-Start'
+    LOAD_SHEDDING_MAX_QUEUE_MS = {'low': 500, 'normal': 5000}
+    LOAD_SHEDDING_MAX_IN_FLIGHT = {'low': 4, 'normal': 32}
+    LOAD_SHEDDING_RETRY_AFTER = 2
+    
+    # Per-request SQL counts (app/utils/query_stats.py). A statement shape run
+    # this many times in one request is logged as a likely N+1; the headers
+    # (X-Query-Count, X-Query-Time-Ms, X-Query-N-Plus-One, Server-Timing)
+    # are for development
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS', 'false').lower() == 'true'
+    QUERY_STATS_N_PLUS_ONE_THRESHOLD = 5
+    
+    # Order status streams (SSE). memory:// only reaches streams in the same
+    # worker, so production needs redis:// (gunicorn.conf.py refuses to start
+    # several workers on memory:// outside debug). Each open
+    # stream holds a worker thread under gthread (a greenlet under gevent),
+    # so gunicorn.conf.py caps gthread workers at SSE_THREAD_SHARE of their
+    # threads. Serve streams from gevent workers to hold many (see README).
+    PUBSUB_URL = os.environ.get('PUBSUB_URL') or 'memory://'
+    PUBSUB_REPLAY_SIZE = 200  # events kept per channel for Last-Event-ID resume
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 100))  # per worker
+    SSE_THREAD_SHARE = float(os.environ.get('SSE_THREAD_SHARE', 0.25))
+    SSE_MAX_PENDING = 100  # a stream this far behind is closed and resumes on reconnect
+    SSE_HEARTBEAT_SECONDS = 15
+    STREAM_TICKET_SECONDS = 60  # lifetime of the ?ticket= a stream is opened with
+    
+    # Domain event outbox (app/utils/outbox.py). OUTBOX_DISPATCH: thread (one
+    # dispatcher per worker), eager (after each commit, in the committing
+    # thread) or external (`flask outbox run` as its own process)
+    OUTBOX_DISPATCH = os.environ.get('OUTBOX_DISPATCH', 'thread')
+    OUTBOX_BATCH_SIZE = 100
+    OUTBOX_POLL_INTERVAL = 1.0
+    OUTBOX_MAX_ATTEMPTS = 10
+    OUTBOX_RETRY_BACKOFF = 2.0  # seconds, doubled per attempt up to 5 minutes
+    OUTBOX_LEASE_SECONDS = 60  # a claimed batch is retried if not finished in this time
+    
+    # Two-tier cache (app/utils/cache.py): a per-worker LRU in front of a
+    # shared tier. CACHE_URL: local:// (LRU only), sqlite:////dev/shm/... (one
+    # host), redis://... (across hosts) or null:// (off)
+    CACHE_URL = os.environ.get('CACHE_URL') or 'local://'
+    CACHE_KEY_PREFIX = 'gemcart:'
+    CACHE_DEFAULT_TTL = 300
+    CACHE_LOCAL_TTL = 5  # how long another worker's invalidation can go unseen; the whole TTL with local://
+    CACHE_LOCAL_MAX_ENTRIES = 10000
+    CACHE_LOCAL_MAX_BYTES = 64 * 1024 * 1024
+    CACHE_SHARED_MAX_BYTES = 256 * 1024 * 1024  # sqlite tier; size Redis with maxmemory
+    CACHE_LOCK_TIMEOUT = 5  # seconds a miss waits for another thread or worker to load the value
+    CACHE_EARLY_REFRESH_BETA = 1.0  # higher refreshes hot entries earlier; 0 disables early refresh
+    # With replicas, a fill right after an invalidation may read a replica that
+    # hasn't caught up yet; such fills are only cached this many seconds
+    CACHE_INVALIDATED_FILL_TTL = 5
+    CACHE_PRODUCT_LIST_TTL = 60
+    CACHE_DASHBOARD_TTL = 30
+    
+    # /api/batch: sub-requests per call, and threads used when a batch asks for parallel
+    BATCH_MAX_REQUESTS = 20
+    BATCH_MAX_WORKERS = 4
+    
     # Cloudinary
     CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
     
+    # Image processing (IMAGE_PROCESS_WORKERS=0 processes inline in the request worker)
+    IMAGE_PROCESS_WORKERS = int(os.environ.get('IMAGE_PROCESS_WORKERS', 2))
+    IMAGE_PROCESS_TIMEOUT = 30
+    IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 50_000_000))
+    IMAGE_DUPLICATE_MAX_DISTANCE = 3  # Hamming bits; lookups are exhaustive up to 3
+    IMAGE_DUPLICATE_MAX_CANDIDATES = 500  # per 16-bit band, bounding lookups in crowded bands
+    IMAGE_STORAGE_ROOT = os.environ.get('IMAGE_STORAGE_ROOT') or os.path.join(basedir, 'instance', 'media')
+    IMAGE_STORAGE_URL = os.environ.get('IMAGE_STORAGE_URL') or '/media'
+    IMAGE_STORAGE_BACKEND = os.environ.get('IMAGE_STORAGE_BACKEND')  # local or cloudinary; defaults to cloudinary when configured
+    UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR')
+    IMAGE_UPLOAD_MAX_BYTES = int(os.environ.get('IMAGE_UPLOAD_MAX_BYTES', 20 * 1024 * 1024))  # per file, enforced while spooling
+    IMAGE_UPLOAD_MAX_FILES = 10
+    IMAGE_PENDING_TIMEOUT = 3600  # `flask images sweep` fails uploads pending this long
+    
+    # Background tasks (image uploads and deletions), in worker memory.
+    # gunicorn.conf.py drains a worker's queue for up to
+    # TASK_QUEUE_DRAIN_SECONDS as it exits; keep it under graceful_timeout
+    TASK_QUEUE_WORKERS = int(os.environ.get('TASK_QUEUE_WORKERS', 2))
+    TASK_QUEUE_MAX_RETRIES = 3
+    TASK_QUEUE_RETRY_BACKOFF = 1.0
+    TASK_QUEUE_EAGER = False
+    TASK_QUEUE_DRAIN_SECONDS = 20
+    
     # SendGrid
     SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
     SENDGRID_FROM_EMAIL = os.environ.get('SENDGRID_FROM_EMAIL')
@@ -28,12 +157,33 @@ class Config:
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS', 'true').lower() == 'true'
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_REPLICA_URIS = []
+    SWAGGER_ENABLED = False
+    MIGRATE_ENABLED = False
+    RATELIMIT_ENABLED = False
+    LOAD_SHEDDING_ENABLED = False
+    OUTBOX_DISPATCH = 'eager'
+    CACHE_URL = 'null://'
+    TASK_QUEUE_EAGER = True
+    IMAGE_PROCESS_WORKERS = 0
 
 class ProductionConfig(Config):
     DEBUG = False
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+    DB_WORK_MEM = os.environ.get('DB_WORK_MEM', '16MB')
+    SWAGGER_MODE = os.environ.get('SWAGGER_MODE', 'static')
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1))  # nginx in front
 
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Gunicorn settings for GemCart:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every value can be overridden from the environment (GUNICORN_WORKERS,
+GUNICORN_THREADS, GUNICORN_WORKER_CLASS, ...) or on the command line.
+benchmarks/server_workers.py compares the worker classes on the catalog.
+"""
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# gthread suits this app: requests mostly wait on the database, and threads
+# share one worker's connection pool and caches. gevent also needs psycogreen
+# to make psycopg2 cooperative; sync is the baseline.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'sync':
+    workers = int(os.environ.get('GUNICORN_WORKERS', cpu_count * 2 + 1))
+    threads = 1
+else:
+    workers = int(os.environ.get('GUNICORN_WORKERS', cpu_count + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', min(8, cpu_count * 2 + 2)))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))  # gevent only
+
+# Import the app once in the master so workers share its modules copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers to cap slow leaks; jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def on_starting(server):
+    """
+    Refuse to start several workers on the in-process pub/sub backend:
+    outbox dispatch publishes order events in whichever worker committed
+    them, so streams held by the other workers would never see them.
+    Debug apps only get the error logged.
+    """
+    app = server.app.wsgi()
+    if server.cfg.workers > 1 and app.config['PUBSUB_URL'].startswith('memory://'):
+        message = (f'PUBSUB_URL=memory:// only reaches streams in the publishing worker, '
+                   f'but {server.cfg.workers} workers are configured; set PUBSUB_URL=redis://...')
+        if not app.debug:
+            raise RuntimeError(message)
+        server.log.error(message)
+
+def when_ready(server):
+    """
+    Fill product_listing once, in the master, on a database that predates
+    it; the product list reads nothing else. Later runs find it filled.
+    """
+    from app import db
+    from app.services.product_listing import backfill_listings
+
+    app = server.app.wsgi()
+    with app.app_context():
+        try:
+            written = backfill_listings()
+        except Exception as e:
+            db.session.rollback()
+            server.log.error(f'product_listing backfill failed, run `flask listing rebuild`: {str(e)}')
+        else:
+            if written is not None:
+                server.log.info(f'Backfilled product_listing with {written} rows')
+        finally:
+            db.session.remove()
+            # Workers fork from here; leave them no connections to share
+            for engine in db.engines.values():
+                engine.dispose()
+
+def post_fork(server, worker):
+    """
+    Drop database connections inherited from the master. Sharing a socket
+    between processes corrupts the protocol stream, so each worker opens its
+    own. close=False leaves the master's connections to the master.
+
+    Under gthread, also stamp each request with the time it was queued for
+    a thread, so load shedding can see queue time without a proxy header.
+
+    Outside gevent every open stream pins a thread, so only SSE_THREAD_SHARE
+    of them may hold streams; the rest stay free for normal requests.
+    """
+    from app import db, pubsub, replicas
+    from app.utils.load_shedding import stamp_request_start
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    replicas.dispose(close=False)
+    if worker.cfg.worker_class_str == 'gevent':
+        # Let psycopg2 yield to other greenlets while it waits on the database
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    else:
+        pubsub.max_streams = min(pubsub.max_streams, int(worker.cfg.threads * app.config['SSE_THREAD_SHARE']))
+    if hasattr(worker, 'enqueue_req'):
+        stamp_request_start(worker, app.config['LOAD_SHEDDING_QUEUE_HEADER'])
+
+def worker_exit(server, worker):
+    """
+    Finish queued background tasks (image uploads and deletions) before the
+    worker goes, whether it is recycled by max_requests or shut down. The
+    arbiter kills a worker that is silent for `timeout`, or still running
+    `graceful_timeout` after a shutdown, so the drain stops short of both;
+    anything left is for `flask images sweep`. The image process pool is
+    stopped last.
+    """
+    from app import tasks
+    from app.services.image_service import shutdown_pool
+
+    app = server.app.wsgi()
+    drain = min(app.config['TASK_QUEUE_DRAIN_SECONDS'], worker.cfg.timeout - 5, worker.cfg.graceful_timeout - 5)
+    if not tasks.wait(max(drain, 0)):
+        server.log.warning(f"Worker {worker.pid} exiting with {tasks.stats()['pending']} background tasks unfinished")
+    # The image processes would otherwise outlive the worker
+    shutdown_pool()
@@ -0,0 +1,49 @@
+import pytest
+from app import create_app, db
+from app.models import Category, Product, Review, User
+from app.utils.query_stats import query_budget as _query_budget
+
+@pytest.fixture
+def app():
+    """
+    The testing app on in-memory SQLite, with a seller, a customer, two
+    categories and a few reviewed products
+    """
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seller = User(username='seller', email='seller@example.com', role='seller')
+        customer = User(username='customer', email='customer@example.com')
+        for user in (seller, customer):
+            user.set_password('secret123')
+        rings = Category(name='Rings', slug='rings')
+        necklaces = Category(name='Necklaces', slug='necklaces')
+        db.session.add_all([seller, customer, rings, necklaces])
+        db.session.flush()
+        for i in range(10):
+            product = Product(title=f'Ring {i}', price=10 + i, sku=f'RING-{i}', inventory_count=5, seller_id=seller.id)
+            product.categories.append(rings if i % 2 else necklaces)
+            db.session.add(product)
+        db.session.flush()
+        db.session.add(Review(author_id=customer.id, product_id=1, rating=4, title='Lovely'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def query_budget():
+    """
+    query_stats.query_budget: fails the test when the block runs more
+    statements than its budget
+
+        def test_product_list(client, query_budget):
+            with query_budget(3, max_repeats=1):
+                client.get('/api/products?include=categories')
+    """
+    return _query_budget
@@ -0,0 +1,303 @@
+import fnmatch
+import sys
+import types
+import pytest
+from flask import Flask
+import app.utils.cache as cache_module
+from app.utils.cache import Cache, LocalTier, RedisStore, SQLiteStore
+
+class Clock:
+    """
+    Stands in for the time module in app.utils.cache
+    """
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+class FakeRedis:
+    """
+    The commands RedisStore uses, with its Lua scripts run as Python
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}  # key -> [value, expires_at or None]
+        self.scripts = {
+            RedisStore.SET_SCRIPT: self._set_script,
+            RedisStore.INVALIDATE_SCRIPT: self._invalidate_script,
+            RedisStore.RELEASE_SCRIPT: self._release_script,
+        }
+
+    def _entry(self, key):
+        entry = self.values.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock.time():
+            del self.values[key]
+            return None
+        return entry
+
+    def get(self, key):
+        entry = self._entry(key)
+        return entry[0] if entry else None
+
+    def pttl(self, key):
+        entry = self._entry(key)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int((entry[1] - self.clock.time()) * 1000)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and self._entry(key) is not None:
+            return None
+        self.values[key] = [value, self.clock.time() + px / 1000 if px else None]
+        return True
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.values.pop(key, None) is not None)
+
+    def pexpire(self, key, ttl):
+        self._entry(key)[1] = self.clock.time() + ttl / 1000
+
+    def sadd(self, key, member):
+        entry = self._entry(key)
+        if entry is None:
+            entry = self.values[key] = [set(), None]
+        entry[0].add(member)
+
+    def smembers(self, key):
+        entry = self._entry(key)
+        return set(entry[0]) if entry else set()
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.values) if fnmatch.fnmatchcase(key, pattern)]
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args: self.calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis, name)(*args) for name, args in self.calls]
+
+        return Pipeline()
+
+    def register_script(self, source):
+        script = self.scripts[source]
+        return lambda keys=(), args=(): script(list(keys), list(args))
+
+    def _set_script(self, keys, args):
+        value, ttl = args[0], int(args[1])
+        self.set(keys[0], value, px=ttl)
+        for tag_key in keys[1:]:
+            self.sadd(tag_key, keys[0])
+            if self.pttl(tag_key) < ttl:
+                self.pexpire(tag_key, ttl)
+
+    def _invalidate_script(self, keys, args):
+        for tag_key in keys:
+            self.delete(*self.smembers(tag_key))
+            self.delete(tag_key)
+
+    def _release_script(self, keys, args):
+        if self.get(keys[0]) == args[0]:
+            self.delete(keys[0])
+
+@pytest.fixture
+def fake_redis(monkeypatch, clock):
+    server = FakeRedis(clock)
+    redis = types.ModuleType('redis')
+    redis.Redis = types.SimpleNamespace(from_url=lambda url: server)
+    monkeypatch.setitem(sys.modules, 'redis', redis)
+    return server
+
+def make_cache(**config):
+    """
+    A Cache on its own Flask app, as each gunicorn worker has one
+    """
+    app = Flask(__name__)
+    app.config.update(CACHE_EARLY_REFRESH_BETA=0, **config)
+    return Cache(app)
+
+def test_local_tier_expires_entries():
+    tier = LocalTier()
+    tier.set('a', b'1', expires_at=10)
+    assert tier.get('a', now=9) == (b'1', 10)
+    assert tier.get('a', now=10) is None
+    assert tier.stats()['entries'] == 0
+
+def test_local_tier_evicts_least_recently_used():
+    tier = LocalTier(max_entries=2)
+    tier.set('a', b'1', 100)
+    tier.set('b', b'2', 100)
+    tier.get('a', 0)
+    tier.set('c', b'3', 100)
+    assert tier.get('b', 0) is None
+    assert tier.get('a', 0) and tier.get('c', 0)
+    assert tier.stats()['evictions'] == 1
+
+def test_local_tier_evicts_by_size():
+    tier = LocalTier(max_bytes=64)
+    for key in 'abcd':
+        tier.set(key, b'x' * 4, 100)
+    tier.set('e', b'x' * 60, 100)  # too big for a sixteenth of the tier
+    assert tier.get('e', 0) is None
+    for key in 'fghijklmnopqrstu':
+        tier.set(key, b'x' * 4, 100)
+    assert tier.stats()['bytes'] <= 64
+    assert tier.get('a', 0) is None and tier.get('u', 0)
+
+def test_local_tier_invalidates_tags():
+    tier = LocalTier()
+    tier.set('product:1', b'1', 100, tags=['product:1', 'list'])
+    tier.set('product:2', b'2', 100, tags=['product:2', 'list'])
+    tier.set('categories', b'3', 100, tags=['categories'])
+    tier.invalidate_tags(['product:1'])
+    assert tier.get('product:1', 0) is None and tier.get('product:2', 0)
+    tier.invalidate_tags(['list'])
+    assert tier.get('product:2', 0) is None and tier.get('categories', 0)
+
+def test_sqlite_store(tmp_path, clock):
+    store = SQLiteStore(str(tmp_path / 'cache.db'))
+    store.set('a', b'1', clock.now + 10, tags=['t'])
+    store.set('b', b'2', clock.now + 20, tags=['t', 'u'])
+    store.set('c', b'3', clock.now + 20, tags=['u'])
+    assert store.get('a', clock.now) == (b'1', clock.now + 10)
+    assert store.get('a', clock.now + 10) is None
+    assert set(store.get_many(['a', 'b', 'x'], clock.now)) == {'a', 'b'}
+
+    store.invalidate_tags(['t'])
+    assert store.get_many(['a', 'b', 'c'], clock.now).keys() == {'c'}
+
+    # A second connection, as another worker would have, sees the same file
+    other = SQLiteStore(store.path)
+    assert other.get('c', clock.now) == (b'3', clock.now + 20)
+    token = store.acquire_lock('c', ttl=5)
+    assert token and other.acquire_lock('c', ttl=5) is False
+    store.release_lock('c', token)
+    assert other.acquire_lock('c', ttl=5)
+
+def test_sqlite_store_evicts_oldest_writes(tmp_path, clock):
+    store = SQLiteStore(str(tmp_path / 'cache.db'), max_bytes=100, evict_every=1000)
+    for i in range(10):
+        clock.now += 1
+        store.set(f'k{i}', b'x' * 20, clock.now + 100)
+    store.set('expired', b'x', clock.now + 1)
+    clock.now += 2
+    store.evict()
+    stats = store.stats()
+    assert stats['bytes'] <= 90
+    kept = store.get_many([f'k{i}' for i in range(10)] + ['expired'], clock.now)
+    assert 'k9' in kept and 'k0' not in kept and 'expired' not in kept
+
+def test_redis_store(fake_redis, clock):
+    store = RedisStore('redis://localhost:6379/1')
+    store.set('a', b'1', clock.now + 10, tags=['t'])
+    store.set('b', b'2', clock.now + 20, tags=['t', 'u'])
+    assert store.get('a', clock.now) == (b'1', clock.now + 10)
+    assert fake_redis.pttl('cache:tag:t') == 20000  # lives as long as its longest member
+    clock.now += 10
+    assert store.get('a', clock.now) is None
+    assert store.get_many(['a', 'b'], clock.now).keys() == {'b'}
+
+    store.invalidate_tags(['u'])
+    assert store.get('b', clock.now) is None and fake_redis.get('cache:tag:u') is None
+
+    token = store.acquire_lock('b', ttl=5)
+    assert token and store.acquire_lock('b', ttl=5) is False
+    store.release_lock('b', 'someone else')
+    assert store.acquire_lock('b', ttl=5) is False
+    store.release_lock('b', token)
+    assert store.acquire_lock('b', ttl=5)
+
+def test_cache_expires_values(clock):
+    cache = make_cache(CACHE_URL='local://', CACHE_LOCAL_TTL=5)
+    cache.set('a', 'value', ttl=60)
+    assert cache.get('a') == 'value'
+    clock.now += 5  # the LRU only keeps its copy CACHE_LOCAL_TTL seconds
+    assert cache.get('a') is None
+
+@pytest.mark.parametrize('url', ['sqlite', 'redis'])
+def test_shared_tier_reaches_every_worker(url, tmp_path, clock, fake_redis):
+    url = f'sqlite:///{tmp_path}/cache.db' if url == 'sqlite' else 'redis://localhost:6379/1'
+    worker, other = make_cache(CACHE_URL=url), make_cache(CACHE_URL=url)
+
+    worker.set('product:1', {'id': 1}, ttl=60, tags=['product:1'])
+    assert other.get('product:1') == {'id': 1}
+    assert other.stats()['shared_hits'] == 1
+    assert other.get_many(['product:1', 'product:2']) == {'product:1': {'id': 1}}
+
+    # Invalidating drops the shared copy; the other LRU's copy ages out
+    worker.invalidate_tags('product:1')
+    assert worker.get('product:1') is None
+    clock.now += other.local_ttl
+    assert other.get('product:1') is None
+
+    worker.set('categories', ['rings'], ttl=60)
+    clock.now += 60
+    assert other.get('categories') is None
+
+def test_get_or_set_loads_once_per_key(tmp_path, clock):
+    cache = make_cache(CACHE_URL=f'sqlite:///{tmp_path}/cache.db')
+    loads = []
+    load = lambda: loads.append(1) or 'value'
+    assert cache.get_or_set('a', load) == 'value'
+    assert cache.get_or_set('a', load) == 'value'
+    assert cache.get_or_set('missing', lambda: None) is None
+    assert cache.get('missing', 'default') == 'default'
+    assert len(loads) == 1
+
+@pytest.mark.parametrize('url', ['local', 'sqlite'])
+def test_fills_right_after_an_invalidation_are_cached_briefly(url, tmp_path, clock):
+    url = f'sqlite:///{tmp_path}/cache.db' if url == 'sqlite' else 'local://'
+    config = {'CACHE_URL': url, 'CACHE_DEFAULT_TTL': 300, 'CACHE_LOCAL_TTL': 300,
+              'CACHE_INVALIDATED_FILL_TTL': 5, 'SQLALCHEMY_REPLICA_URIS': ['sqlite://']}
+    worker = make_cache(**config)
+    # Another worker only learns of the invalidation through the shared tier
+    other = make_cache(**config) if url != 'local://' else worker
+
+    worker.invalidate_tags('product:1')
+    other.set('product:1', 'maybe stale', tags=['product:1'])
+    other.set('product:2', 'fresh', tags=['product:2'])
+    clock.now += 5
+    assert other.get('product:1') is None
+    assert other.get('product:2') == 'fresh'
+
+    # Once the replicas have had time to catch up, fills get the full TTL
+    other.set('product:1', 'fresh', tags=['product:1'])
+    clock.now += 5
+    assert other.get('product:1') == 'fresh'
+
+def test_fills_after_an_invalidation_keep_their_ttl_without_replicas(clock):
+    cache = make_cache(CACHE_URL='local://', CACHE_LOCAL_TTL=300)
+    cache.invalidate_tags('product:1')
+    cache.set('product:1', 'value', tags=['product:1'])
+    clock.now += 5
+    assert cache.get('product:1') == 'value'
+
+def test_disabled_cache_always_loads():
+    cache = make_cache(CACHE_URL='null://')
+    cache.set('a', 'value')
+    assert cache.get('a') is None
+    assert cache.get_or_set('a', lambda: 'loaded') == 'loaded'
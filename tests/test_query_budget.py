@@ -0,0 +1,19 @@
+import pytest
+from app.utils.query_stats import QueryBudgetExceeded
+
+def test_endpoint_within_budget_passes(client, query_budget):
+    with query_budget(6, max_repeats=1):
+        response = client.get('/api/products?include=categories')
+    assert response.status_code == 200
+    assert len(response.get_json()['products']) == 10
+
+def test_endpoint_over_budget_fails(client, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match=r'queries, budget 2'):
+        with query_budget(2):
+            client.get('/api/products?include=categories')
+
+def test_repeated_statement_fails(client, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match=r'2 x SELECT'):
+        with query_budget(20, max_repeats=1):
+            client.get('/api/products/1')
+            client.get('/api/products/2')
@@ -0,0 +1,127 @@
+import shutil
+import sqlite3
+import time
+import pytest
+from sqlalchemy import event
+from app import cache, create_app, db
+from app.models import Category, Product, User
+
+@pytest.fixture
+def replicated(tmp_path):
+    """
+    An app on a primary SQLite file with one replica file. ``sync()`` copies
+    the primary over the replica; ``served`` records which file each
+    statement ran against.
+    """
+    primary = tmp_path / 'primary.db'
+    replica = tmp_path / 'replica' / 'replica.db'
+    replica.parent.mkdir()
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{replica}'],
+        'REPLICA_READ_YOUR_WRITES_SECONDS': 60,
+    })
+    with app.app_context():
+        db.create_all()
+        seller = User(username='seller', email='seller@example.com', role='seller')
+        seller.set_password('secret123')
+        rings = Category(name='Rings', slug='rings')
+        db.session.add_all([seller, rings])
+        db.session.flush()
+        db.session.add(Product(title='Gold ring', price=100, sku='RING-1', inventory_count=5, seller_id=seller.id))
+        db.session.commit()
+        primary_engine = db.engine
+    router = app.extensions['replica_router']
+    replica_engine = router.replicas[0].engine
+
+    def sync():
+        source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    served = []
+    for name, engine in (('primary', primary_engine), ('replica', replica_engine)):
+        event.listen(engine, 'before_cursor_execute', lambda *args, name=name: served.append(name))
+
+    sync()
+    yield app, router, sync, served, replica
+    router.dispose()
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'secret123'})
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+def test_read_only_handlers_read_from_the_replica(replicated):
+    app, router, sync, served, _ = replicated
+    client = app.test_client()
+
+    assert client.get('/api/categories').status_code == 200
+    assert client.get('/api/products/1').status_code == 200
+
+    assert served and set(served) == {'replica'}
+    assert router.stats()['replica_reads'] == 2
+
+def test_writes_and_the_writers_reads_stay_on_the_primary(replicated):
+    app, router, sync, served, _ = replicated
+    client = app.test_client()
+    headers = login(client, 'seller@example.com')
+    served.clear()
+
+    response = client.post('/api/products', headers=headers, json={
+        'title': 'Silver ring', 'price': 50, 'sku': 'RING-2', 'inventory_count': 3
+    })
+    assert response.status_code == 201
+    assert 'replica' not in served
+    product_id = response.get_json()['product']['id']
+
+    # Not synced yet: only the primary has it, and the seller still sees it
+    served.clear()
+    assert client.get(f'/api/products/{product_id}', headers=headers).status_code == 200
+    assert set(served) == {'primary'}
+
+    # Other clients read the replica, which is behind until it syncs
+    served.clear()
+    assert client.get(f'/api/products/{product_id}').status_code == 404
+    assert set(served) == {'replica'}
+    sync()
+    assert client.get(f'/api/products/{product_id}').status_code == 200
+
+    # Once the window has passed, the seller reads the replica again
+    router.window = 0
+    served.clear()
+    assert client.get(f'/api/products/{product_id}', headers=headers).status_code == 200
+    assert set(served) == {'replica'}
+
+def test_falls_back_to_the_primary_when_the_replica_fails(replicated):
+    app, router, sync, served, replica = replicated
+    client = app.test_client()
+    router.dispose()
+    shutil.rmtree(replica.parent)
+    served.clear()
+
+    assert client.get('/api/categories').status_code == 200
+    assert served[-1] == 'primary'
+
+    stats = router.stats()['replicas'][0]
+    assert not stats['healthy'] and stats['failures'] == 1
+
+    # Down replicas are skipped until REPLICA_RETRY_INTERVAL has passed
+    served.clear()
+    assert client.get('/api/products/1').status_code == 200
+    assert set(served) == {'primary'}
+
+def test_fills_right_after_an_update_are_cached_briefly(replicated, tmp_path):
+    app, router, sync, served, _ = replicated
+    app.config['CACHE_URL'] = f'sqlite:///{tmp_path}/cache.db'
+    cache.init_app(app)
+    client = app.test_client()
+    headers = login(client, 'seller@example.com')
+
+    assert client.put('/api/products/1', headers=headers, json={'title': 'Rose gold ring'}).status_code == 200
+
+    # The replica is behind, so this caches the old title, but not for long
+    assert client.get('/api/products/1').get_json()['product']['title'] == 'Gold ring'
+    with app.app_context():
+        _, expires_at = cache.shared.get('gemcart:product:1', time.time())
+    assert expires_at - time.time() <= app.config['CACHE_INVALIDATED_FILL_TTL']